@@ -1,8 +1,6 @@
 import os
 import sys
 import csv
-import win32print
-import win32api
 import time
 from datetime import datetime
 from pathlib import Path
@@ -97,6 +95,8 @@ class PrintWorker(QThread):
         try:
             import subprocess
             import os
+            import win32api
+            import win32print
             
             # 检查文件是否存在
             if not os.path.exists(file_path):
@@ -191,6 +191,7 @@ class PrintWorker(QThread):
         """使用DEVMODE结构设置打印参数进行打印"""
         try:
             import win32con
+            import win32print
             import pywintypes
             
             # 检查文件是否存在
@@ -408,6 +409,9 @@ class PrintWorker(QThread):
     def print_with_system_association(self, file_path, devmode):
         """使用系统关联程序打印"""
         try:
+            import win32api
+            import win32print
+
             # 临时设置打印机为默认打印机
             original_printer = None
             try:
@@ -701,7 +705,8 @@ class BatchPrinterGUI(QMainWindow):
         
         self.combo_printer = QComboBox()
         self.combo_printer.setFont(param_font)
-        self.load_printers()
+        # 枚举打印机需要导入 pywin32 并查询打印后台服务，等窗口显示后再加载
+        QTimer.singleShot(0, self.load_printers)
         printer_layout.addWidget(self.combo_printer)
         
         self.btn_refresh_printers = QPushButton("🔄 刷新")
@@ -1043,6 +1048,9 @@ class BatchPrinterGUI(QMainWindow):
     def load_printers(self):
         """加载系统打印机列表"""
         try:
+            # pywin32 只在需要访问打印机时导入，不拖慢程序启动
+            import win32print
+
             self.combo_printer.clear()
             
             # 获取系统打印机列表
@@ -1067,6 +1075,7 @@ class BatchPrinterGUI(QMainWindow):
             QTimer.singleShot(100, lambda: self.setup_printer_connection())
                 
             self.status_bar.showMessage(f"找到 {len(printers)} 台打印机")
+            self.update_start_button_state()
             
         except Exception as e:
             QMessageBox.warning(self, "警告", f"无法获取打印机列表: {str(e)}")
@@ -1113,6 +1122,7 @@ class BatchPrinterGUI(QMainWindow):
         
         try:
             import win32con
+            import win32print
             
             # 获取打印机句柄
             hprinter = win32print.OpenPrinter(printer_name)
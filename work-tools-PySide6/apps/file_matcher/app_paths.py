@@ -0,0 +1,12 @@
+import os
+import platform
+
+
+def get_cache_dir() -> str:
+    """获取用户配置目录下的缓存目录"""
+    system = platform.system()
+    if system == "Windows":
+        return os.path.join(os.environ.get("APPDATA", ""), "FileMatcherTool")
+    if system == "Darwin":
+        return os.path.join(os.path.expanduser("~"), "Library", "Application Support", "FileMatcherTool")
+    return os.path.join(os.path.expanduser("~"), ".config", "FileMatcherTool")
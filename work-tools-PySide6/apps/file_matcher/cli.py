@@ -0,0 +1,181 @@
+"""
+文件名匹配工具 - 命令行入口
+
+不启动界面，递归扫描一个或多个目录并按规则分类，结果以 JSONL 或 CSV 流式输出。
+适合定时批量处理大量文件：
+
+    python -m apps.file_matcher.cli D:\\归档 E:\\共享 --format csv --output result.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+
+# 与 gui.py 一致按同级模块导入，使 `python -m` 和直接运行脚本两种方式都可用
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parallel import ParallelMatcher  # noqa: E402
+from rule_manager import RuleManager  # noqa: E402
+from scanner import iter_directories_parallel, parse_extensions  # noqa: E402
+
+OUTPUT_FIELDS = ["path", "code", "30d", "matched_rule"]
+
+# 每个匹配分片包含的文件数
+DEFAULT_CHUNK_SIZE = 20000
+# 默认扫描线程数，网络共享上主要在等待I/O，线程数可以多于CPU核数
+DEFAULT_SCAN_WORKERS = 16
+
+
+class ResultWriter:
+    """结果输出 - 支持 JSONL 和 CSV"""
+
+    def __init__(self, stream, output_format: str):
+        self.stream = stream
+        self.output_format = output_format
+        self._csv_writer = None
+        if output_format == "csv":
+            self._csv_writer = csv.writer(stream)
+            self._csv_writer.writerow(OUTPUT_FIELDS)
+
+    def write(self, path: str, match_info):
+        if self._csv_writer is not None:
+            if match_info:
+                self._csv_writer.writerow([path, match_info["code"], match_info["30d"],
+                                           match_info["matched_rule"]])
+            else:
+                self._csv_writer.writerow([path, "", "", ""])
+        else:
+            record = {"path": path, "code": None, "30d": None, "matched_rule": None}
+            if match_info:
+                record.update((field, match_info[field]) for field in OUTPUT_FIELDS[1:])
+            self.stream.write(json.dumps(record, ensure_ascii=False))
+            self.stream.write("\n")
+
+
+def _iter_chunks(entries, chunk_size: int):
+    """把扫描结果按固定大小分片"""
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def classify(roots, rule_manager: RuleManager, writer: ResultWriter, recursive: bool = True,
+             extensions=None, scan_workers: int = DEFAULT_SCAN_WORKERS,
+             match_workers=None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """扫描目录并分类所有文件，返回 (文件总数, 匹配成功数)
+
+    扫描在线程池中进行，匹配分片交给进程池；同时在途的分片数量有上限，
+    内存占用不随文件总数增长，结果按分片提交顺序写出。
+    """
+    rule_set = rule_manager.get_rule_set()
+    rules = rule_set.rules
+    patterns = rule_set.matcher.patterns
+    max_in_flight = 2 * (match_workers or os.cpu_count() or 1)
+
+    total_count = 0
+    matched_count = 0
+
+    def write_chunk(chunk, future):
+        nonlocal total_count, matched_count
+        rule_indices, pattern_ids = future.result()
+        for entry, rule_index, pattern_id in zip(chunk, rule_indices, pattern_ids):
+            if rule_index < 0:
+                writer.write(entry.path, None)
+                continue
+            rule = rules[rule_index]
+            writer.write(entry.path, {
+                "code": rule.get("code", ""),
+                "30d": rule.get("30d", ""),
+                "matched_rule": patterns[pattern_id][1]
+            })
+            matched_count += 1
+        total_count += len(chunk)
+
+    entries = iter_directories_parallel(roots, recursive, extensions, scan_workers)
+    with ParallelMatcher(rule_set.matcher, match_workers) as pool:
+        in_flight = deque()
+        for chunk in _iter_chunks(entries, chunk_size):
+            in_flight.append((chunk, pool.submit([entry.name for entry in chunk])))
+            while in_flight and (len(in_flight) > max_in_flight or in_flight[0][1].done()):
+                write_chunk(*in_flight.popleft())
+        while in_flight:
+            write_chunk(*in_flight.popleft())
+
+    return total_count, matched_count
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="文件名匹配工具 - 命令行批量分类")
+    parser.add_argument("roots", nargs="+", help="要扫描的目录")
+    parser.add_argument("--config", help="规则配置文件路径，默认使用工具自带的 config.json")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="输出格式")
+    parser.add_argument("--output", "-o", help="输出文件，默认输出到标准输出")
+    parser.add_argument("--extensions", default="", help="只处理这些扩展名，如 pdf,docx")
+    parser.add_argument("--no-recursive", action="store_true", help="不扫描子目录")
+    parser.add_argument("--scan-workers", type=int, default=DEFAULT_SCAN_WORKERS,
+                        help="扫描线程数")
+    parser.add_argument("--match-workers", type=int, default=None,
+                        help="匹配进程数，默认等于CPU核数，0表示在当前进程内匹配")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="每个匹配分片的文件数")
+    return parser
+
+
+def main(argv=None):
+    """命令行主函数"""
+    args = build_parser().parse_args(argv)
+
+    for root in args.roots:
+        if not os.path.isdir(root):
+            print(f"目录不存在: {root}", file=sys.stderr)
+            return 2
+
+    # RuleManager 在配置文件不存在时会创建默认配置，命令行下应直接报错
+    if args.config and not os.path.isfile(args.config):
+        print(f"配置文件不存在: {args.config}", file=sys.stderr)
+        return 2
+
+    rule_manager = RuleManager(args.config)
+    if rule_manager.load_error:
+        print(rule_manager.load_error, file=sys.stderr)
+        return 2
+    if not rule_manager.rules:
+        print(f"没有可用的规则: {rule_manager.config_path}", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    if args.output:
+        output = open(args.output, "w", newline="", encoding="utf-8")
+    else:
+        sys.stdout.reconfigure(encoding="utf-8", newline="")
+        output = sys.stdout
+    try:
+        total_count, matched_count = classify(
+            args.roots, rule_manager, ResultWriter(output, args.format),
+            recursive=not args.no_recursive,
+            extensions=parse_extensions(args.extensions),
+            scan_workers=args.scan_workers,
+            match_workers=args.match_workers,
+            chunk_size=args.chunk_size
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"共 {total_count} 个文件，匹配成功 {matched_count} 个，"
+          f"未匹配 {total_count - matched_count} 个，用时 {elapsed:.1f} 秒", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+JOURNAL_SUFFIX = ".journal"
+
+# 日志中的操作达到该数量后合并为新的快照
+JOURNAL_COMPACT_THRESHOLD = 500
+
+
+def atomic_write(path: str, content: bytes):
+    """先写入同目录的临时文件再替换目标文件，写入中途崩溃不会损坏原文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _file_signature(path: str) -> Optional[tuple]:
+    """获取文件的 (mtime, size)，文件不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_bytes(path: str) -> Optional[bytes]:
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _sha1(content: Optional[bytes]) -> Optional[str]:
+    return hashlib.sha1(content).hexdigest() if content is not None else None
+
+
+class ConfigJournal:
+    """配置文件的快照 + 追加式修改日志
+
+    config.json 为快照，每次修改只在 config.json.journal 末尾追加一行操作记录，
+    加载时在快照上回放日志。日志第一行记录所基于快照的哈希，快照被替换后旧日志自动失效；
+    崩溃时写了一半的最后一行在回放时被忽略，下次追加前截掉。
+    """
+
+    def __init__(self, config_path: str):
+        self.config_path = config_path
+        self.journal_path = config_path + JOURNAL_SUFFIX
+        self.op_count = 0  # 日志中有效操作的数量
+        self._snapshot_hash = None
+        self._journal_length = None  # 日志有效部分的字节数，None 表示没有可追加的日志
+        self._signature = None
+        self._content_hash = None
+
+    def _current_signature(self) -> tuple:
+        return _file_signature(self.config_path), _file_signature(self.journal_path)
+
+    def load(self) -> Tuple[Optional[bytes], List[Dict]]:
+        """读取快照和基于该快照的日志操作，快照不存在时返回 (None, [])"""
+        signature = self._current_signature()
+        snapshot = _read_bytes(self.config_path)
+        journal = _read_bytes(self.journal_path)
+        self._signature = signature
+        self._snapshot_hash = _sha1(snapshot)
+        self._content_hash = (self._snapshot_hash, _sha1(journal))
+        self._journal_length = None
+        self.op_count = 0
+        if snapshot is None or journal is None:
+            return snapshot, []
+
+        ops = []
+        position = 0
+        for line in journal.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # 写了一半的最后一行
+            try:
+                record = json.loads(line.decode('utf-8'))
+            except ValueError:
+                break
+            if position == 0:
+                if record.get('op') != 'base' or record.get('snapshot') != self._snapshot_hash:
+                    return snapshot, []  # 日志不是基于当前快照写入的
+            else:
+                ops.append(record)
+            position += len(line)
+        if position:
+            self._journal_length = position
+        self.op_count = len(ops)
+        return snapshot, ops
+
+    def has_changed(self) -> bool:
+        """快照或日志是否被其他程序修改过
+
+        先比较 mtime/size，签名变化后再比较内容哈希，内容未变则只更新签名。
+        """
+        signature = self._current_signature()
+        if signature == self._signature:
+            return False
+        content_hash = (_sha1(_read_bytes(self.config_path)), _sha1(_read_bytes(self.journal_path)))
+        if content_hash == self._content_hash:
+            self._signature = signature
+            return False
+        return True
+
+    def append(self, ops: List[Dict]):
+        """在日志末尾追加操作记录并刷到磁盘，失败时抛出 OSError"""
+        lines = [json.dumps(op, ensure_ascii=False) + "\n" for op in ops]
+        if self._journal_length is None:
+            header = json.dumps({'op': 'base', 'snapshot': self._snapshot_hash}) + "\n"
+            with open(self.journal_path, 'wb') as f:
+                f.write((header + "".join(lines)).encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(self._journal_length)  # 去掉崩溃遗留的残缺行
+                f.seek(self._journal_length)
+                f.write("".join(lines).encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+        self._journal_length = os.path.getsize(self.journal_path)
+        self.op_count += len(ops)
+        self._remember()
+
+    def needs_compaction(self, pending: int = 0) -> bool:
+        return self.op_count + pending >= JOURNAL_COMPACT_THRESHOLD
+
+    def write_snapshot(self, content: bytes):
+        """原子地写入新快照并删除已合并进快照的日志，失败时抛出 OSError"""
+        directory = os.path.dirname(self.config_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        atomic_write(self.config_path, content)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._snapshot_hash = _sha1(content)
+        self._journal_length = None
+        self.op_count = 0
+        self._remember()
+
+    def _remember(self):
+        """记录自己写入后的签名和内容哈希，避免把自己的写入当作外部修改"""
+        self._signature = self._current_signature()
+        self._content_hash = (self._snapshot_hash, _sha1(_read_bytes(self.journal_path)))
+
+    def backup_corrupt(self, content: bytes) -> str:
+        """备份无法解析的配置文件，返回备份路径；同样内容只备份一次"""
+        backup_path = f"{self.config_path}.corrupt-{hashlib.sha1(content).hexdigest()[:8]}"
+        if not os.path.exists(backup_path):
+            atomic_write(backup_path, content)
+        return backup_path
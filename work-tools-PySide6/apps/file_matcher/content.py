@@ -0,0 +1,273 @@
+import codecs
+import html
+import mmap
+import os
+import re
+import sqlite3
+import zipfile
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from app_paths import get_cache_dir
+from matcher import CompiledMatcher
+from scanner import path_key
+
+CONTENT_CACHE_FILE_NAME = "content_cache.sqlite3"
+
+# 每个文件最多读取的字节数（PDF 另外读取同样大小的文件末尾以获取文档信息）
+DEFAULT_CONTENT_BYTES = 16 * 1024
+# 读取文件的线程数，网络共享上主要在等待I/O
+DEFAULT_CONTENT_WORKERS = 8
+# 每读取多少个文件报告一次进度、检查一次取消
+PROGRESS_INTERVAL = 50
+
+# 表结构版本，结构变化时旧缓存整体重建
+SCHEMA_VERSION = "1"
+# SQLite 单条语句的参数数量有上限，批量查询时分段
+QUERY_CHUNK_SIZE = 500
+
+# 开头一段中含有 NUL 字节的文件按二进制文件处理，不提取文本
+BINARY_SNIFF_BYTES = 1024
+
+_PDF_INFO_FIELD = re.compile(rb"/(?:Title|Subject|Keywords)\s*(\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>)", re.DOTALL)
+_XMP_FIELD = re.compile(rb"<dc:(?:title|subject|description)\b.*?<rdf:li[^>]*>(.*?)</rdf:li>", re.DOTALL)
+_OFFICE_CORE_FIELD = re.compile(r"<(?:dc:title|dc:subject|dc:description|cp:keywords)\b[^>]*>(.*?)</", re.DOTALL)
+_PDF_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+_PDF_ESCAPE = re.compile(rb"\\([0-7]{1,3}|\r\n|[\r\n]|.)", re.DOTALL)
+
+
+class ContentCancelled(Exception):
+    """内容匹配被用户取消"""
+
+
+def _decode_pdf_string(token: bytes) -> str:
+    """解码PDF字符串：(字面量) 或 <十六进制>，UTF-16BE 带BOM，其余按 Latin-1 近似 PDFDocEncoding"""
+    if token.startswith(b"<"):
+        digits = re.sub(rb"\s", b"", token[1:-1])
+        data = bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode("ascii"))
+    else:
+        def unescape(match):
+            escaped = match.group(1)
+            if escaped[:1].isdigit():
+                return bytes([int(escaped, 8) & 0xFF])
+            if escaped in (b"\r\n", b"\r", b"\n"):
+                return b""  # 续行
+            return _PDF_ESCAPES.get(escaped, escaped)
+        data = _PDF_ESCAPE.sub(unescape, token[1:-1])
+    if data.startswith(codecs.BOM_UTF16_BE):
+        return data[2:].decode("utf-16-be", errors="ignore")
+    return data.decode("latin-1")
+
+
+def _pdf_metadata(data: bytes) -> List[str]:
+    """从PDF的一段原始数据中提取标题、主题和关键词（文档信息字典和XMP）"""
+    fields = [_decode_pdf_string(match.group(1)) for match in _PDF_INFO_FIELD.finditer(data)]
+    fields.extend(html.unescape(match.group(1).decode("utf-8", errors="ignore"))
+                  for match in _XMP_FIELD.finditer(data))
+    return [field.strip() for field in fields if field.strip()]
+
+
+def _office_metadata(path: str, max_bytes: int) -> List[str]:
+    """从 Office Open XML 文件（docx/xlsx/pptx）的 docProps/core.xml 中提取标题、主题等"""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            info = archive.getinfo("docProps/core.xml")
+            if info.file_size > max_bytes:
+                return []
+            core = archive.read(info).decode("utf-8", errors="ignore")
+    except (KeyError, zipfile.BadZipFile, RuntimeError):
+        return []
+    fields = (html.unescape(match.group(1)).strip() for match in _OFFICE_CORE_FIELD.finditer(core))
+    return [field for field in fields if field]
+
+
+def _decode_text(data: bytes) -> str:
+    """把文件开头一段解码为文本，截断处不完整的多字节字符被丢弃"""
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return data.decode("utf-16", errors="ignore")
+    if b"\0" in data[:BINARY_SNIFF_BYTES]:
+        return ""
+    for encoding in ("utf-8", "gb18030"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError as e:
+            if e.end == len(data):
+                return data[:e.start].decode(encoding, errors="ignore")
+    return data.decode("utf-8", errors="ignore")
+
+
+def extract_text(path: str, max_bytes: int = DEFAULT_CONTENT_BYTES) -> str:
+    """提取文件中可用于匹配的文本，读取失败时抛出 OSError
+
+    通过 mmap 只读取文件开头 max_bytes 字节：PDF 取文档信息（另读同样大小的末尾），
+    Office 文档取 docProps/core.xml 中的属性，其他文件把开头一段按文本解码。
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            head = mapped[:max_bytes]
+            if head.startswith(b"%PDF"):
+                tail = mapped[max(size - max_bytes, len(head)):]
+                return "\n".join(_pdf_metadata(head) + _pdf_metadata(tail))
+    if head.startswith(b"PK\x03\x04"):
+        return "\n".join(_office_metadata(path, max_bytes))
+    return _decode_text(head)
+
+
+class ContentCache:
+    """提取文本的磁盘缓存 - 按 (规范化路径, 大小, 修改时间, 读取字节数) 保存
+
+    与规则无关，规则修改后仍然有效。数据库无法打开或读写出错时缓存自动停用。
+    连接只能在创建它的线程中使用。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(get_cache_dir(), CONTENT_CACHE_FILE_NAME)
+        self.hits = 0
+        self.misses = 0
+        self.enabled = True
+        self._connection = None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """按需打开数据库，失败时停用缓存"""
+        if self._connection is None and self.enabled:
+            try:
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                connection = sqlite3.connect(self.db_path)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+                row = connection.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+                if row is None or row[0] != SCHEMA_VERSION:
+                    connection.execute("DROP TABLE IF EXISTS texts")
+                    connection.execute("DELETE FROM meta")
+                    connection.execute("INSERT INTO meta VALUES ('schema', ?)", (SCHEMA_VERSION,))
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS texts ("
+                    "path TEXT PRIMARY KEY, size INTEGER, mtime REAL, max_bytes INTEGER, "
+                    "text TEXT) WITHOUT ROWID"
+                )
+                connection.commit()
+                self._connection = connection
+            except (sqlite3.Error, OSError):
+                self.enabled = False
+        return self._connection
+
+    def _disable(self):
+        """读写出错后停用缓存"""
+        self.enabled = False
+        self.close()
+
+    def lookup(self, records: Sequence[Tuple[str, Optional[int], Optional[float]]],
+               max_bytes: int) -> List[Optional[str]]:
+        """批量查询 (规范化路径, 大小, 修改时间)，命中返回提取的文本，未命中返回None"""
+        results = [None] * len(records)
+        connection = self._connect()
+        if connection is not None:
+            try:
+                for start in range(0, len(records), QUERY_CHUNK_SIZE):
+                    chunk = records[start:start + QUERY_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    cached = {row[0]: row[1:] for row in connection.execute(
+                        f"SELECT path, size, mtime, max_bytes, text FROM texts WHERE path IN ({placeholders})",
+                        [record[0] for record in chunk]
+                    )}
+                    for offset, (key, size, mtime) in enumerate(chunk):
+                        row = cached.get(key)
+                        if (row is not None and size is not None
+                                and row[0] == size and row[1] == mtime and row[2] == max_bytes):
+                            results[start + offset] = row[3]
+            except sqlite3.Error:
+                self._disable()
+                results = [None] * len(records)
+
+        hit_count = len(records) - results.count(None)
+        self.hits += hit_count
+        self.misses += len(records) - hit_count
+        return results
+
+    def store(self, rows: Sequence[Tuple[str, int, float, int, str]]):
+        """保存 (规范化路径, 大小, 修改时间, 读取字节数, 文本)"""
+        connection = self._connect()
+        if connection is None or not rows:
+            return
+        try:
+            with connection:
+                connection.executemany("INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            self._disable()
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except sqlite3.Error:
+                pass
+            self._connection = None
+
+
+def _safe_extract(path: str, max_bytes: int) -> Optional[str]:
+    """提取文本，文件无法读取时返回None"""
+    try:
+        return extract_text(path, max_bytes)
+    except (OSError, ValueError):
+        return None
+
+
+def match_contents(matcher: CompiledMatcher, files: Sequence[Tuple[str, Optional[int], Optional[float]]],
+                   cache: Optional[ContentCache] = None,
+                   max_workers: int = DEFAULT_CONTENT_WORKERS,
+                   max_bytes: int = DEFAULT_CONTENT_BYTES,
+                   progress_callback: Optional[Callable[[int], None]] = None,
+                   is_cancelled: Optional[Callable[[], bool]] = None) -> Tuple[array, array]:
+    """按文件内容匹配 (路径, 大小, 修改时间) 列表，返回 (规则索引数组, 模式编号数组)
+
+    缓存中没有的文件在线程池中读取，同时在途的文件数有上限；
+    取消时抛出 ContentCancelled。无法读取的文件视为没有内容，且不写入缓存。
+    """
+    keys = [path_key(path) for path, _, _ in files]
+    if cache is not None:
+        texts = cache.lookup([(key, size, mtime) for key, (_, size, mtime) in zip(keys, files)], max_bytes)
+    else:
+        texts = [None] * len(files)
+    missing = [position for position, text in enumerate(texts) if text is None]
+
+    new_rows = []
+    done_count = len(files) - len(missing)
+    max_in_flight = 4 * max_workers
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        pending = iter(missing)
+        try:
+            while True:
+                for position in pending:
+                    in_flight.append((position, executor.submit(_safe_extract, files[position][0], max_bytes)))
+                    if len(in_flight) >= max_in_flight:
+                        break
+                if not in_flight:
+                    break
+                position, future = in_flight.popleft()
+                text = future.result()
+                texts[position] = text or ""
+                path, size, mtime = files[position]
+                if text is not None and size is not None and mtime is not None:
+                    new_rows.append((keys[position], size, mtime, max_bytes, text))
+                done_count += 1
+                if done_count % PROGRESS_INTERVAL == 0:
+                    if is_cancelled and is_cancelled():
+                        raise ContentCancelled()
+                    if progress_callback:
+                        progress_callback(done_count)
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+            if cache is not None:
+                cache.store(new_rows)  # 取消前已读取的文本同样保存
+
+    if progress_callback:
+        progress_callback(done_count)
+    return matcher.match_many(texts)
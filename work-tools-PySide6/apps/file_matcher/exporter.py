@@ -0,0 +1,107 @@
+import csv
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from file_store import FileStore
+from matcher import UNMATCHED
+
+EXPORT_HEADERS = ["文件名", "文件路径", "是否匹配成功", "Code", "30d", "匹配的规则"]
+
+# 每写入多少行报告一次进度、检查一次取消
+PROGRESS_INTERVAL = 1000
+
+SUPPORTED_FORMATS = ("xlsx", "csv")
+
+
+class ExportCancelled(Exception):
+    """导出被用户取消"""
+
+
+def export_format_for(file_path: str) -> str:
+    """根据文件扩展名确定导出格式，不支持的格式抛出 ValueError"""
+    extension = os.path.splitext(file_path)[1].lower().lstrip('.')
+    if extension == "xls":
+        raise ValueError("不支持导出旧版 Excel 97-2003 (.xls) 格式，请选择 .xlsx 或 .csv")
+    if extension not in SUPPORTED_FORMATS:
+        raise ValueError(f"不支持的导出格式: .{extension}")
+    return extension
+
+
+def iter_export_rows(files: FileStore) -> Iterator[List]:
+    """逐行生成导出数据，不在内存中构建完整的表
+
+    直接遍历列式存储的文件名、目录编号和模式编号列，每个关键字的 Code/30d/匹配规则只生成一次。
+    """
+    rule_set = files.rule_set
+    matched_fields: Dict[int, List] = {}
+    for name, directory_id, pattern_id in zip(files.names, files.directory_ids, files.pattern_ids):
+        directory = files.directory_text(directory_id)
+        if pattern_id == UNMATCHED:
+            yield [name, directory, "否", "", "", ""]
+            continue
+        fields = matched_fields.get(pattern_id)
+        if fields is None:
+            rule_index, matched_rule = rule_set.matcher.patterns[pattern_id]
+            rule = rule_set.rules[rule_index]
+            fields = matched_fields[pattern_id] = ["是", rule.get('code', ''), rule.get('30d', ''), matched_rule]
+        yield [name, directory, *fields]
+
+
+def export_rows(rows: Iterable[List[str]], file_path: str,
+                progress_callback: Optional[Callable[[int], None]] = None,
+                is_cancelled: Optional[Callable[[], bool]] = None,
+                headers: List[str] = EXPORT_HEADERS) -> int:
+    """流式写出导出文件，返回写入的行数
+
+    headers 为表头，默认为匹配结果的表头。xlsx 使用 openpyxl 的只写模式，内存占用不随行数增长；csv 使用 csv.writer 逐行写入。
+    取消或出错时删除未写完的文件。
+    """
+    file_format = export_format_for(file_path)
+    writer = _write_xlsx if file_format == "xlsx" else _write_csv
+    try:
+        return writer(rows, file_path, headers, progress_callback, is_cancelled)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+
+def _counted_rows(rows, progress_callback, is_cancelled):
+    """遍历数据行，按间隔报告进度并检查取消"""
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if count % PROGRESS_INTERVAL == 0:
+            if is_cancelled and is_cancelled():
+                raise ExportCancelled()
+            if progress_callback:
+                progress_callback(count)
+    if progress_callback:
+        progress_callback(count)
+
+
+def _write_csv(rows, file_path, headers, progress_callback, is_cancelled) -> int:
+    count = 0
+    with open(file_path, 'w', newline='', encoding='utf_8_sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for row in _counted_rows(rows, progress_callback, is_cancelled):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _write_xlsx(rows, file_path, headers, progress_callback, is_cancelled) -> int:
+    # openpyxl 较重，只在导出 xlsx 时加载
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(headers)
+    count = 0
+    for row in _counted_rows(rows, progress_callback, is_cancelled):
+        sheet.append(row)
+        count += 1
+    workbook.save(file_path)
+    return count
@@ -0,0 +1,303 @@
+import math
+import os
+from array import array
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from matcher import UNMATCHED
+from scanner import path_key
+
+# 匹配来源
+SOURCE_FILENAME = 0
+SOURCE_CONTENT = 1
+
+# 大小未知（从路径清单导入）时 sizes 中的值，修改时间未知时 mtimes 中为 NaN
+UNKNOWN_SIZE = -1
+
+
+class FileStore:
+    """文件列表的列式存储 - 每列一个数组，不为每个文件创建字典
+
+    目录字符串保存在去重的目录表中，每行只保存目录编号；匹配结果只保存命中的规则索引和模式编号，
+    显示和导出时再按 rule_set 生成匹配信息。所有行的匹配结果都对应同一个规则集 rule_set。
+    每行另有一个不会复用的行编号，后台任务用快照工作，结束后据此找回在此期间被移除或重新排序的行。
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.directory_ids = array('i')
+        self.sizes = array('q')
+        self.mtimes = array('d')
+        self.rule_indices = array('i')
+        self.pattern_ids = array('i')
+        self.sources = bytearray()
+        self.checked = bytearray()
+        self.row_ids = array('q')
+        self.rule_set = None  # 匹配结果所用的规则集
+        self.layout_version = 0  # 行被移除、排序或清空时加1，快照据此判断行号是否仍然有效
+        self._next_row_id = 0
+        self._prefixes: List[str] = []  # 目录编号 -> 路径中文件名之前的部分，与文件名拼接得到原路径
+        self._directories: List[str] = []  # 目录编号 -> 显示的目录
+        self._directory_ids: Dict[str, int] = {}  # 路径前缀 -> 目录编号
+        self._row_index: Dict[str, Dict[str, int]] = {}  # 规范化目录 -> {规范化文件名: 行号}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    # 行访问
+
+    def path(self, row: int) -> str:
+        return self._prefixes[self.directory_ids[row]] + self.names[row]
+
+    def name(self, row: int) -> str:
+        return self.names[row]
+
+    def directory(self, row: int) -> str:
+        return self._directories[self.directory_ids[row]]
+
+    def directory_text(self, directory_id: int) -> str:
+        """按目录编号获取显示的目录"""
+        return self._directories[directory_id]
+
+    def directory_count(self) -> int:
+        return len(self._directories)
+
+    def size(self, row: int) -> Optional[int]:
+        size = self.sizes[row]
+        return None if size == UNKNOWN_SIZE else size
+
+    def mtime(self, row: int) -> Optional[float]:
+        mtime = self.mtimes[row]
+        return None if math.isnan(mtime) else mtime
+
+    def is_matched(self, row: int) -> bool:
+        return self.rule_indices[row] != UNMATCHED
+
+    def is_checked(self, row: int) -> bool:
+        return bool(self.checked[row])
+
+    def set_checked(self, row: int, checked: bool):
+        self.checked[row] = checked
+
+    def match_info(self, row: int) -> Optional[Dict]:
+        """生成与 match_filename 相同格式的匹配信息，内容匹配的结果另有 source 为 "content"，未匹配返回None"""
+        return self.pattern_info(self.pattern_ids[row], self.sources[row])
+
+    def pattern_info(self, pattern_id: int, source: int = SOURCE_FILENAME) -> Optional[Dict]:
+        """按 rule_set 中的模式编号和匹配来源生成匹配信息"""
+        if pattern_id == UNMATCHED:
+            return None
+        rule_index, matched_rule = self.rule_set.matcher.patterns[pattern_id]
+        rule = self.rule_set.rules[rule_index]
+        info = {
+            'index': rule_index,
+            'code': rule.get('code', ''),
+            '30d': rule.get('30d', ''),
+            'matched_rule': matched_rule
+        }
+        if source == SOURCE_CONTENT:
+            info['source'] = "content"
+        return info
+
+    def matched_count(self) -> int:
+        """统计匹配成功的行数"""
+        return len(self.rule_indices) - self.rule_indices.count(UNMATCHED)
+
+    def match_records(self) -> 'MatchRecords':
+        """按需生成 (路径, 文件名, 大小, 修改时间) 的只读序列，供匹配缓存使用"""
+        return MatchRecords(self)
+
+    # 路径索引
+
+    @staticmethod
+    def _index_keys(path: str, name: str) -> Tuple[str, str]:
+        """路径索引的两级键：规范化路径拆分为目录部分和文件名部分，文件名未变化时复用原字符串"""
+        directory_key, _, name_key = path_key(path).rpartition(os.sep)
+        return directory_key, (name if name_key == name else name_key)
+
+    def row_for_path(self, path: str) -> int:
+        """按路径查找行号，不存在返回-1"""
+        directory_key, _, name_key = path_key(path).rpartition(os.sep)
+        return self._row_index.get(directory_key, {}).get(name_key, -1)
+
+    def contains(self, path: str) -> bool:
+        return self.row_for_path(path) >= 0
+
+    def _rebuild_row_index(self):
+        """行顺序变化后重建路径索引"""
+        self._row_index = {}
+        for row, name in enumerate(self.names):
+            directory_key, name_key = self._index_keys(self.path(row), name)
+            self._row_index.setdefault(directory_key, {})[name_key] = row
+
+    def _directory_id(self, path: str, name: str, directory: str) -> int:
+        """获取路径所在目录的编号，新目录加入目录表"""
+        prefix = path[:len(path) - len(name)] if name and path.endswith(name) else os.path.join(directory, "")
+        directory_id = self._directory_ids.get(prefix)
+        if directory_id is None:
+            directory_id = len(self._prefixes)
+            self._directory_ids[prefix] = directory_id
+            self._prefixes.append(prefix)
+            self._directories.append(directory)
+        return directory_id
+
+    # 修改
+
+    def add_files(self, entries: Iterable[Tuple[str, str, str, Optional[int], Optional[float]]],
+                  rule_indices: Optional[Sequence] = None, pattern_ids: Optional[Sequence] = None,
+                  before_insert: Optional[Callable[[int], None]] = None) -> int:
+        """批量追加 (路径, 文件名, 目录, 大小, 修改时间)，跳过已存在的路径，返回实际添加的数量
+
+        可同时传入每个条目在 rule_set 中的匹配结果；before_insert 在写入前以添加数量调用（表格模型在此发出插入通知）。
+        """
+        accepted = []
+        pending = {}
+        for position, (path, name, directory, size, mtime) in enumerate(entries):
+            directory_key, name_key = self._index_keys(path, name)
+            names = self._row_index.get(directory_key)
+            if names is not None and name_key in names:
+                continue
+            pending_names = pending.setdefault(directory_key, {})
+            if name_key in pending_names:
+                continue
+            pending_names[name_key] = len(self.names) + len(accepted)
+            accepted.append((position, path, name, directory, size, mtime))
+
+        if accepted:
+            if before_insert is not None:
+                before_insert(len(accepted))
+            for position, path, name, directory, size, mtime in accepted:
+                self.names.append(name)
+                self.directory_ids.append(self._directory_id(path, name, directory))
+                self.sizes.append(UNKNOWN_SIZE if size is None else size)
+                self.mtimes.append(math.nan if mtime is None else mtime)
+                if rule_indices is None:
+                    self.rule_indices.append(UNMATCHED)
+                    self.pattern_ids.append(UNMATCHED)
+                else:
+                    self.rule_indices.append(rule_indices[position])
+                    self.pattern_ids.append(pattern_ids[position])
+            count = len(accepted)
+            self.sources.extend(bytes(count))
+            self.checked.extend(b'\x01' * count)
+            self.row_ids.extend(range(self._next_row_id, self._next_row_id + count))
+            self._next_row_id += count
+            for directory_key, names in pending.items():
+                self._row_index.setdefault(directory_key, {}).update(names)
+        return len(accepted)
+
+    def set_rule_set(self, rule_set):
+        """切换匹配结果所用的规则集，与当前规则集不同时清除所有行的匹配结果"""
+        if rule_set is not self.rule_set:
+            self.rule_indices = array('i', [UNMATCHED]) * len(self.names)
+            self.pattern_ids = array('i', [UNMATCHED]) * len(self.names)
+            self.sources = bytearray(len(self.names))
+            self.rule_set = rule_set
+
+    def set_matches(self, rows: Iterable[int], rule_indices: Sequence[int], pattern_ids: Sequence[int],
+                    source: int = SOURCE_FILENAME):
+        """写入指定行在 rule_set 中的匹配结果，行号为-1的位置跳过"""
+        for position, row in enumerate(rows):
+            if row >= 0:
+                self.rule_indices[row] = rule_indices[position]
+                self.pattern_ids[row] = pattern_ids[position]
+                self.sources[row] = source
+
+    def remap_matches(self, rule_set, remap: Callable[[int], int]):
+        """规则修改后切换到新规则集：用 remap 换算每行命中的规则索引，并按 (规则, 关键字) 换算模式编号
+
+        换算后规则已不存在的行标记为未匹配。
+        """
+        old_patterns = self.rule_set.matcher.patterns
+        new_patterns = rule_set.matcher.patterns
+        new_ids = {}
+        for pattern_id, pattern in enumerate(new_patterns):
+            new_ids.setdefault(pattern, pattern_id)
+
+        pattern_map = {UNMATCHED: UNMATCHED}
+        for pattern_id in set(self.pattern_ids):
+            if pattern_id != UNMATCHED:
+                rule_index, text = old_patterns[pattern_id]
+                pattern_map[pattern_id] = new_ids.get((remap(rule_index), text), UNMATCHED)
+
+        self.pattern_ids = array('i', [pattern_map[pattern_id] for pattern_id in self.pattern_ids])
+        self.rule_indices = array('i', [UNMATCHED if pattern_id == UNMATCHED else new_patterns[pattern_id][0]
+                                        for pattern_id in self.pattern_ids])
+        self.rule_set = rule_set
+
+    def _keep_rows(self, rows: List[int]):
+        """按给定的行号顺序重建各列，用于移除和排序"""
+        self.names = [self.names[row] for row in rows]
+        for column in ('directory_ids', 'sizes', 'mtimes', 'rule_indices', 'pattern_ids', 'row_ids'):
+            values = getattr(self, column)
+            setattr(self, column, array(values.typecode, [values[row] for row in rows]))
+        self.sources = bytearray(self.sources[row] for row in rows)
+        self.checked = bytearray(self.checked[row] for row in rows)
+        self.layout_version += 1
+        self._rebuild_row_index()
+
+    def remove_rows(self, rows: Iterable[int]):
+        """移除指定行，目录表保留"""
+        removed = set(rows)
+        self._keep_rows([row for row in range(len(self.names)) if row not in removed])
+
+    def reorder(self, order: List[int]):
+        """按新顺序排列各行，order[i] 为新的第i行原来的行号"""
+        self._keep_rows(order)
+
+    def clear(self):
+        """清空所有行和目录表，保留规则集"""
+        rule_set = self.rule_set
+        layout_version = self.layout_version + 1
+        next_row_id = self._next_row_id
+        self.__init__()
+        self.rule_set = rule_set
+        self.layout_version = layout_version
+        self._next_row_id = next_row_id
+
+    # 快照
+
+    def copy(self) -> 'FileStore':
+        """复制各列作为后台任务的快照，文件名等字符串与目录表共享，不复制路径索引"""
+        snapshot = FileStore.__new__(FileStore)
+        snapshot.__dict__.update(self.__dict__)
+        snapshot.names = list(self.names)
+        for column in ('directory_ids', 'sizes', 'mtimes', 'rule_indices', 'pattern_ids', 'row_ids'):
+            setattr(snapshot, column, array(getattr(self, column).typecode, getattr(self, column)))
+        snapshot.sources = bytearray(self.sources)
+        snapshot.checked = bytearray(self.checked)
+        snapshot._prefixes = list(self._prefixes)
+        snapshot._directories = list(self._directories)
+        snapshot._directory_ids = {}
+        snapshot._row_index = {}
+        return snapshot
+
+    def rows_of(self, snapshot: 'FileStore') -> Sequence:
+        """快照中每一行现在的行号，已被移除的行为-1"""
+        if snapshot.layout_version == self.layout_version:
+            return range(len(snapshot))
+        rows_by_id = {row_id: row for row, row_id in enumerate(self.row_ids)}
+        return [rows_by_id.get(row_id, -1) for row_id in snapshot.row_ids]
+
+    def rows_added_since(self, snapshot: 'FileStore') -> List[int]:
+        """快照之后新加入的行"""
+        if snapshot.layout_version == self.layout_version:
+            return list(range(len(snapshot), len(self.names)))
+        first_id = snapshot._next_row_id
+        return [row for row, row_id in enumerate(self.row_ids) if row_id >= first_id]
+
+
+class MatchRecords(Sequence):
+    """FileStore 的 (路径, 文件名, 大小, 修改时间) 视图，访问时才生成每行的元组"""
+
+    def __init__(self, store: FileStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[index] for index in range(*row.indices(len(self)))]
+        store = self.store
+        return store.path(row), store.names[row], store.size(row), store.mtime(row)
@@ -0,0 +1,444 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+from PySide6.QtCore import (QAbstractProxyModel, QAbstractTableModel, QEvent,
+                            QModelIndex, Qt, Signal)
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import (QApplication, QStyle, QStyledItemDelegate,
+                               QStyleOptionButton)
+
+from file_store import FileStore
+from matcher import NameIndex
+from search import RowFilter
+
+# 表格列定义
+COLUMN_CHECK = 0
+COLUMN_NAME = 1
+COLUMN_PATH = 2
+COLUMN_RESULT = 3
+COLUMN_CODE = 4
+COLUMN_30D = 5
+COLUMN_RULE = 6
+COLUMN_ACTION = 7
+
+# 自定义数据角色：文件完整路径
+PATH_ROLE = Qt.UserRole + 1
+
+HEADER_LABELS = ["选择", "文件名", "路径", "匹配结果", "Code", "30d", "匹配规则", "操作"]
+
+# 搜索时文件名的规范化方式，与其他列的 casefold 一致
+SEARCH_NORMALIZE = ("casefold",)
+
+MATCHED_COLOR = QColor(144, 238, 144)  # 淡绿色
+UNMATCHED_COLOR = QColor(255, 182, 193)  # 淡红色
+
+EDIT_RULE_TEXT = "✏️ 修改规则"
+ADD_RULE_TEXT = "➕ 添加规则"
+
+# 操作按钮在单元格内的尺寸
+ACTION_BUTTON_WIDTH = 100
+ACTION_BUTTON_HEIGHT = 25
+ACTION_BUTTON_MARGIN = 2
+
+
+class FileTableModel(QAbstractTableModel):
+    """文件匹配表格模型 - 直接基于列式存储 FileStore，视图只请求可见行的数据
+
+    路径去重和按路径定位行由 FileStore 的路径索引完成；搜索直接在各列上进行，不为每行保存搜索文本。
+    """
+
+    def __init__(self, files_data: FileStore, parent=None):
+        super().__init__(parent)
+        self.files_data = files_data
+        self._name_index = None  # 文件名子串索引，按需构建
+        self._search = None  # 最近一次搜索的列匹配结果缓存
+
+    def name_index(self) -> NameIndex:
+        """获取文件名子串索引，用于查找包含某个关键字的行"""
+        if self._name_index is None:
+            self._name_index = NameIndex(self.files_data.names)
+        return self._name_index
+
+    def _searcher(self, query: str) -> '_ColumnSearch':
+        """获取查询对应的列搜索，规则集或行顺序变化后重新创建"""
+        files = self.files_data
+        key = (query, files.rule_set, files.layout_version)
+        if self._search is None or self._search.key != key:
+            self._search = _ColumnSearch(self, query, key)
+        return self._search
+
+    def search_rows(self, query: str, candidates=None) -> List[int]:
+        """返回 candidates（None 表示全部行）中可搜索列的显示文本包含查询文本（已 casefold）的行号"""
+        return self._searcher(query).rows(candidates)
+
+    def row_matches(self, query: str, row: int) -> bool:
+        """判断一行的可搜索列是否包含查询文本（已 casefold）"""
+        return self._searcher(query).row_matches(row)
+
+    def contains(self, path: str) -> bool:
+        """判断文件是否已在列表中"""
+        return self.files_data.contains(path)
+
+    def row_for_path(self, path: str) -> int:
+        """按路径查找行号，不存在返回-1"""
+        return self.files_data.row_for_path(path)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.files_data)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADER_LABELS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADER_LABELS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == COLUMN_CHECK:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = index.row()
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            return self._display_text(row, column)
+        if role == Qt.ToolTipRole:
+            return self._tooltip_text(row, column)
+        if role == Qt.BackgroundRole and COLUMN_RESULT <= column <= COLUMN_RULE:
+            return MATCHED_COLOR if self.files_data.is_matched(row) else UNMATCHED_COLOR
+        if role == Qt.CheckStateRole and column == COLUMN_CHECK:
+            return Qt.Checked if self.files_data.is_checked(row) else Qt.Unchecked
+        if role == PATH_ROLE:
+            return self.files_data.path(row)
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or index.column() != COLUMN_CHECK or role != Qt.CheckStateRole:
+            return False
+        self.files_data.set_checked(index.row(), Qt.CheckState(value) == Qt.Checked)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """按列排序，直接调整 FileStore 中各行的顺序"""
+        if column < 0 or column == COLUMN_ACTION:
+            return
+        self.layoutAboutToBeChanged.emit()
+        files = self.files_data
+        if column == COLUMN_CHECK:
+            sort_key = files.checked.__getitem__
+        elif column == COLUMN_NAME:
+            sort_key = files.names.__getitem__
+        else:
+            sort_key = lambda row: self._display_text(row, column)
+        files.reorder(sorted(range(len(files)), key=sort_key, reverse=(order == Qt.DescendingOrder)))
+        self._name_index = None
+        self.layoutChanged.emit()
+
+    def _display_text(self, row: int, column: int) -> str:
+        """获取单元格显示文本"""
+        if column == COLUMN_NAME:
+            return self.files_data.names[row]
+        if column == COLUMN_PATH:
+            return self.files_data.directory(row)
+        return self._match_text(self.files_data.match_info(row), column)
+
+    @staticmethod
+    def _match_text(info: Optional[Dict], column: int) -> str:
+        """获取与匹配结果有关的单元格显示文本"""
+        if column == COLUMN_RESULT:
+            if info and info.get("source") == "content":
+                return "✅ 内容匹配"
+            return "✅ 匹配" if info else "❌ 未匹配"
+        if column == COLUMN_CODE:
+            return str(info["code"]) if info else ""
+        if column == COLUMN_30D:
+            return str(info["30d"]) if info else ""
+        if column == COLUMN_RULE:
+            return info["matched_rule"] if info else ""
+        if column == COLUMN_ACTION:
+            return EDIT_RULE_TEXT if info else ADD_RULE_TEXT
+        return ""
+
+    def _tooltip_text(self, row: int, column: int) -> str:
+        """获取单元格提示文本"""
+        files = self.files_data
+        if column == COLUMN_NAME:
+            if files.size(row) is None:
+                return f"{files.names[row]}\n大小: 未知（从路径清单导入，未读取文件系统）"
+            return files.names[row]
+        if column == COLUMN_PATH:
+            return files.path(row)
+        info = files.match_info(row)
+        if column == COLUMN_RESULT:
+            if info and info.get("source") == "content":
+                return "文件名未匹配，根据文件内容匹配成功"
+            return "文件匹配成功" if info else "文件未匹配到任何规则"
+        if column == COLUMN_CODE:
+            return f"Code: {info['code']}" if info else "无匹配结果"
+        if column == COLUMN_30D:
+            return f"30d: {info['30d']}" if info else "无匹配结果"
+        if column == COLUMN_RULE:
+            return f"匹配规则: {info['matched_rule']}" if info else "无匹配规则"
+        if column == COLUMN_ACTION:
+            return "修改规则" if info else "添加规则"
+        return None
+
+    def add_files(self, entries, rule_indices=None, pattern_ids=None) -> int:
+        """批量添加 (路径, 文件名, 目录, 大小, 修改时间)，跳过已存在的路径，只发出一次插入通知，返回实际添加的数量
+
+        可同时传入每个条目在 FileStore.rule_set 中的匹配结果。
+        """
+        first = len(self.files_data)
+        added_count = self.files_data.add_files(
+            entries, rule_indices, pattern_ids,
+            before_insert=lambda count: self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        )
+        if added_count:
+            self._name_index = None
+            self.endInsertRows()
+        return added_count
+
+    def remove_rows(self, rows):
+        """移除指定行"""
+        self.beginResetModel()
+        self.files_data.remove_rows(rows)
+        self._name_index = None
+        self.endResetModel()
+
+    def clear(self):
+        """清空所有文件"""
+        self.beginResetModel()
+        self.files_data.clear()
+        self._name_index = None
+        self.endResetModel()
+
+    def refresh(self):
+        """数据已在外部修改，通知视图重绘所有单元格"""
+        if len(self.files_data):
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(len(self.files_data) - 1, len(HEADER_LABELS) - 1)
+            )
+
+    def refresh_rows(self, rows):
+        """通知视图重绘指定的行"""
+        if rows:
+            self.dataChanged.emit(
+                self.index(min(rows), 0),
+                self.index(max(rows), len(HEADER_LABELS) - 1)
+            )
+
+    def checked_rows(self) -> List[int]:
+        """获取勾选的行"""
+        return [row for row, checked in enumerate(self.files_data.checked) if checked]
+
+
+class _ColumnSearch:
+    """一个查询在列式存储上的搜索
+
+    文件名用 casefold 后的子串索引查找；目录和匹配结果相关的列取值很少，
+    分别按目录编号和 (模式编号, 来源) 缓存是否包含查询文本，不逐行拼接各列文本。
+    """
+
+    def __init__(self, model: FileTableModel, query: str, key: tuple):
+        self.model = model
+        self.query = query
+        self.key = key
+        self._directories: Dict[int, bool] = {}
+        self._results: Dict[tuple, bool] = {}
+
+    def _directory_matches(self, directory_id: int) -> bool:
+        matches = self._directories.get(directory_id)
+        if matches is None:
+            text = self.model.files_data.directory_text(directory_id)
+            matches = self._directories[directory_id] = self.query in text.casefold()
+        return matches
+
+    def _result_matches(self, pattern_id: int, source: int) -> bool:
+        matches = self._results.get((pattern_id, source))
+        if matches is None:
+            info = self.model.files_data.pattern_info(pattern_id, source)
+            matches = any(self.query in FileTableModel._match_text(info, column).casefold()
+                          for column in range(COLUMN_RESULT, COLUMN_RULE + 1))
+            self._results[pattern_id, source] = matches
+        return matches
+
+    def row_matches(self, row: int) -> bool:
+        files = self.model.files_data
+        return (self.query in files.names[row].casefold()
+                or self._directory_matches(files.directory_ids[row])
+                or self._result_matches(files.pattern_ids[row], files.sources[row]))
+
+    def rows(self, candidates=None) -> List[int]:
+        if candidates is not None:
+            return [row for row in candidates if self.row_matches(row)]
+
+        files = self.model.files_data
+        name_rows = self.model.name_index().normalized(SEARCH_NORMALIZE).rows_containing(self.query)
+        directory_hits = [self._directory_matches(directory_id)
+                          for directory_id in range(files.directory_count())]
+        result_hits = {key for key in set(zip(files.pattern_ids, files.sources)) if self._result_matches(*key)}
+        if not any(directory_hits) and not result_hits:
+            return list(name_rows)
+        name_hits = set(name_rows)
+        return [row for row, (directory_id, pattern_id, source)
+                in enumerate(zip(files.directory_ids, files.pattern_ids, files.sources))
+                if row in name_hits or directory_hits[directory_id] or (pattern_id, source) in result_hits]
+
+
+class SearchFilterProxyModel(QAbstractProxyModel):
+    """搜索过滤代理模型 - 由源模型在各列上搜索
+
+    只保存可见行对应的源行号（升序），不为每行调用 filterAcceptsRow；
+    没有搜索条件时直接使用 range 映射。排序交给源模型完成。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._filter = RowFilter()
+        self._source_rows = range(0)
+
+    def setSourceModel(self, source_model):
+        self.beginResetModel()
+        super().setSourceModel(source_model)
+        source_model.dataChanged.connect(self._on_source_data_changed)
+        source_model.rowsInserted.connect(self._on_source_rows_inserted)
+        # 移除行、重置和排序时源行号整体变化，代理随之重置
+        for about_to_change, changed in ((source_model.rowsAboutToBeRemoved, source_model.rowsRemoved),
+                                         (source_model.modelAboutToBeReset, source_model.modelReset),
+                                         (source_model.layoutAboutToBeChanged, source_model.layoutChanged)):
+            about_to_change.connect(self._begin_source_change)
+            changed.connect(self._end_source_change)
+        self._set_rows(None)
+        self.endResetModel()
+
+    def set_filter_text(self, text: str):
+        """设置搜索文本并重新过滤"""
+        self.beginResetModel()
+        self._set_rows(self._filter.apply(self.sourceModel(), text))
+        self.endResetModel()
+
+    def _set_rows(self, rows):
+        self._source_rows = range(self.sourceModel().rowCount()) if rows is None else rows
+
+    def _refilter(self):
+        """源模型的行或显示文本发生变化后重新过滤"""
+        self._begin_source_change()
+        self._end_source_change()
+
+    def _begin_source_change(self, *args):
+        self.beginResetModel()
+
+    def _end_source_change(self, *args):
+        self._set_rows(self._filter.refilter(self.sourceModel()))
+        self.endResetModel()
+
+    def _on_source_data_changed(self, top_left, bottom_right, roles=()):
+        first, last = top_left.row(), bottom_right.row()
+        if self._filter.query and (not roles or Qt.DisplayRole in roles):
+            # 显示文本变化可能改变行是否满足搜索条件，有变化时重新过滤
+            for row in range(first, last + 1):
+                if self._filter.accepts(self.sourceModel(), row) != self._contains_source_row(row):
+                    self._refilter()
+                    return
+        start = bisect_left(self._source_rows, first)
+        end = bisect_right(self._source_rows, last) - 1
+        if start <= end:
+            self.dataChanged.emit(self.index(start, top_left.column()),
+                                  self.index(end, bottom_right.column()), roles)
+
+    def _on_source_rows_inserted(self, parent, first, last):
+        if parent.isValid():
+            return
+        if last != self.sourceModel().rowCount() - 1:
+            # 只有追加到末尾的行可以增量处理
+            self._refilter()
+            return
+        if self._filter.query:
+            accepted = [row for row in range(first, last + 1) if self._filter.accepts(self.sourceModel(), row)]
+            if accepted:
+                count = len(self._source_rows)
+                self.beginInsertRows(QModelIndex(), count, count + len(accepted) - 1)
+                self._filter.append_rows(self.sourceModel(), accepted)
+                self.endInsertRows()
+        else:
+            self.beginInsertRows(QModelIndex(), len(self._source_rows), last)
+            self._source_rows = range(last + 1)
+            self.endInsertRows()
+
+    def _contains_source_row(self, row: int) -> bool:
+        position = bisect_left(self._source_rows, row)
+        return position < len(self._source_rows) and self._source_rows[position] == row
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._source_rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.sourceModel().columnCount()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Vertical and role == Qt.DisplayRole:
+            return section + 1  # 行号按过滤后的顺序显示
+        return self.sourceModel().headerData(section, orientation, role)
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self._source_rows)) or column < 0:
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index):
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self._source_rows[proxy_index.row()], proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid() or not self._contains_source_row(source_index.row()):
+            return QModelIndex()
+        return self.index(bisect_left(self._source_rows, source_index.row()), source_index.column())
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """排序交给源模型，源模型发出布局变化后重新过滤"""
+        self.sourceModel().sort(column, order)
+
+
+class ActionButtonDelegate(QStyledItemDelegate):
+    """操作列委托 - 直接绘制按钮，不为每行创建按钮控件"""
+
+    clicked = Signal(str)  # 参数为被点击行的文件路径，避免排序或移除后行号失效
+
+    def _button_rect(self, option):
+        rect = option.rect
+        return rect.adjusted(
+            ACTION_BUTTON_MARGIN, ACTION_BUTTON_MARGIN,
+            ACTION_BUTTON_WIDTH + ACTION_BUTTON_MARGIN - rect.width(),
+            ACTION_BUTTON_HEIGHT + ACTION_BUTTON_MARGIN - rect.height()
+        )
+
+    def paint(self, painter, option, index):
+        button_option = QStyleOptionButton()
+        button_option.rect = self._button_rect(option)
+        button_option.text = index.data(Qt.DisplayRole)
+        button_option.state = QStyle.State_Enabled | QStyle.State_Raised
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button_option, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.MouseButtonRelease
+                and event.button() == Qt.LeftButton
+                and self._button_rect(option).contains(event.position().toPoint())):
+            self.clicked.emit(index.data(PATH_ROLE))
+            return True
+        return super().editorEvent(event, model, option, index)
@@ -0,0 +1,103 @@
+import os
+from typing import Dict, List, Optional, Set
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+
+from scanner import diff_directory
+
+# 文件夹变化通知的合并间隔（毫秒），批量复制文件时只处理一次
+WATCH_DEBOUNCE_MS = 500
+
+
+class FolderWatcher(QObject):
+    """文件夹监视器 - 文件夹内容变化后只报告新增和消失的文件
+
+    QFileSystemWatcher 只通知哪个文件夹发生了变化，短时间内的连续通知合并为一次处理；
+    处理时对比文件名列表，只为新文件读取大小和修改时间。只监视文件夹本身，不包含子文件夹。
+    """
+    files_added = Signal(list)  # List[ScanEntry]
+    files_removed = Signal(list)  # 已消失文件的路径
+    folder_lost = Signal(str)  # 被删除或无法访问的文件夹
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._known_names: Dict[str, Set[str]] = {}
+        self._extensions: Dict[str, Optional[frozenset]] = {}
+        self._pending: Set[str] = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(WATCH_DEBOUNCE_MS)
+        self._timer.timeout.connect(self._process_pending)
+
+    def folders(self) -> List[str]:
+        """正在监视的文件夹"""
+        return list(self._known_names)
+
+    def watch(self, folder: str, extensions: Optional[frozenset] = None) -> bool:
+        """开始监视文件夹，文件夹中现有的文件作为新增文件报告一次"""
+        folder = os.path.normpath(folder)
+        if folder in self._known_names:
+            return True
+        known_names = set()
+        try:
+            added, _ = diff_directory(folder, known_names, extensions)
+        except OSError:
+            return False
+        if not self._watcher.addPath(folder):
+            return False
+        self._known_names[folder] = known_names
+        self._extensions[folder] = extensions
+        if added:
+            self.files_added.emit(added)
+        return True
+
+    def unwatch_all(self):
+        """停止监视所有文件夹"""
+        directories = self._watcher.directories()
+        if directories:
+            self._watcher.removePaths(directories)
+        self._known_names.clear()
+        self._extensions.clear()
+        self._pending.clear()
+        self._timer.stop()
+
+    def _on_directory_changed(self, path: str):
+        self._pending.add(os.path.normpath(path))
+        # 不重新计时，持续写入时也会按间隔处理
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _process_pending(self):
+        """处理积累的变化通知"""
+        pending, self._pending = self._pending, set()
+        added_entries = []
+        removed_paths = []
+        for folder in pending:
+            known_names = self._known_names.get(folder)
+            if known_names is None:
+                continue
+            try:
+                added, removed = diff_directory(folder, known_names, self._extensions[folder])
+            except OSError:
+                # 文件夹被删除或无法访问，其中的文件全部视为消失
+                removed_paths.extend(os.path.join(folder, name) for name in known_names)
+                self._forget(folder)
+                self.folder_lost.emit(folder)
+                continue
+            added_entries.extend(added)
+            removed_paths.extend(os.path.join(folder, name) for name in removed)
+            # 部分平台在文件夹被替换后会丢失监视，重新加入
+            if folder not in self._watcher.directories():
+                self._watcher.addPath(folder)
+
+        if removed_paths:
+            self.files_removed.emit(removed_paths)
+        if added_entries:
+            self.files_added.emit(added_entries)
+
+    def _forget(self, folder: str):
+        self._watcher.removePath(folder)
+        self._known_names.pop(folder, None)
+        self._extensions.pop(folder, None)
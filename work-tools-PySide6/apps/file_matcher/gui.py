@@ -1,21 +1,34 @@
 import datetime
 import os
 import sys
+import time
+from itertools import repeat
 from pathlib import Path
 
-import pandas as pd
-from PySide6.QtCore import  Qt, QUrl
-from PySide6.QtGui import (QAction, QColor, QDesktopServices,
-                           QIcon)
-from PySide6.QtWidgets import (QAbstractItemView, QApplication, QCheckBox,
+from PySide6.QtCore import Qt, QTimer, QUrl
+from PySide6.QtGui import QAction, QDesktopServices, QIcon
+from PySide6.QtWidgets import (QAbstractItemView, QApplication,
                                QDialog, QFileDialog, QHBoxLayout,
                                QHeaderView, QLabel, QLineEdit, QMainWindow,
-                               QMenu, QMessageBox, QPushButton,
-                               QSplitter, QStatusBar, QTableWidget,
-                               QTableWidgetItem, QToolBar, QVBoxLayout,
-                               QWidget)
+                               QMenu, QMessageBox, QProgressBar,
+                               QProgressDialog, QPushButton,
+                               QSplitter, QStatusBar, QTableView,
+                               QToolBar, QVBoxLayout, QWidget)
+
+from exporter import export_format_for
+from file_store import SOURCE_CONTENT, FileStore
+from file_table_model import (COLUMN_ACTION, ActionButtonDelegate,
+                              FileTableModel, SearchFilterProxyModel)
+from match_stats import count_shadowed, get_stats_path
+from match_stats_dialog import MatchStatsDialog
+from matcher import UNMATCHED
 from rule_manager import RuleManager
 from rule_settings import RuleEditDialog, RuleSettingsDialog
+from scanner import ScanEntry, parse_extensions
+from search import SEARCH_DELAY_MS
+
+# 需要重新匹配的文件数达到该值时改用多进程匹配，可在配置的 settings 中用 parallel_match_threshold 调整
+PARALLEL_MATCH_THRESHOLD = 200000
 
 
 class FileMatcherGUI(QMainWindow):
@@ -29,7 +42,19 @@ class FileMatcherGUI(QMainWindow):
 
         # 初始化数据
         self.rule_manager = RuleManager()
-        self.files_data = []  # 存储文件信息的列表
+        self.files_data = FileStore()  # 文件列表的列式存储
+        self.scan_worker = None  # 后台目录扫描线程
+        self.manifest_worker = None  # 后台路径清单导入线程
+        self.manifest_rule_set = None  # 路径清单导入所用的规则集
+        self.export_worker = None  # 后台导出线程
+        self.match_worker = None  # 后台多进程匹配线程
+        self.pending_match = None  # 多进程匹配进行中时保存的 (规则集, 文件列表快照, 文件记录, 缓存查询结果)
+        self.content_worker = None  # 后台内容匹配线程
+        self.pending_content = None  # 内容匹配进行中时保存的 (规则集, 文件列表快照, 未匹配的行)
+        # 匹配缓存、文件夹监视和后台线程所在的模块在首次使用时才导入，不拖慢程序启动
+        self.match_cache = None  # 匹配结果的磁盘缓存，首次匹配时打开
+        self.rule_manager.match_stats.load(get_stats_path())  # 之前运行累计的匹配统计
+        self.folder_watcher = None  # 监视文件夹，新文件自动加入并匹配，首次监视时创建
         
         # 设置苹果风格
         self.setup_apple_style()
@@ -37,6 +62,9 @@ class FileMatcherGUI(QMainWindow):
         
         # 启用拖拽
         self.setAcceptDrops(True)
+        
+        if self.rule_manager.load_error:
+            QMessageBox.warning(self, "配置文件错误", self.rule_manager.load_error)
 
     def set_window_icon(self):
         """设置窗口图标 - 安全的资源加载方式"""
@@ -131,7 +159,7 @@ class FileMatcherGUI(QMainWindow):
                     stop:1 rgba(235, 235, 237, 1.0));
             }}
             
-            QTableWidget {{
+            QTableView {{
                 background: white;
                 border: 1px solid rgba(0, 0, 0, 0.1);
                 border-radius: 8px;
@@ -250,6 +278,36 @@ class FileMatcherGUI(QMainWindow):
         add_folder_action.triggered.connect(self.add_folder)
         toolbar.addAction(add_folder_action)
 
+        # 导入路径清单：按文本文件中的路径直接匹配，不访问文件系统
+        manifest_action = QAction("📜 导入路径清单", self)
+        manifest_action.setToolTip("从文本文件（如 dir /s /b /a-d 或 find -type f 的输出）导入路径，"
+                                   "不访问文件系统，直接按文件名匹配，文件大小显示为未知")
+        manifest_action.triggered.connect(self.import_manifest)
+        toolbar.addAction(manifest_action)
+
+        # 扫描文件夹时是否包含子文件夹
+        self.recursive_action = QAction("🗂 包含子文件夹", self)
+        self.recursive_action.setCheckable(True)
+        toolbar.addAction(self.recursive_action)
+
+        # 扫描文件夹时的扩展名过滤
+        self.extension_edit = QLineEdit()
+        self.extension_edit.setPlaceholderText("扩展名过滤，如 pdf,docx")
+        self.extension_edit.setToolTip("扫描文件夹时只添加这些扩展名的文件，留空添加全部文件")
+        self.extension_edit.setFixedWidth(180)
+        toolbar.addWidget(self.extension_edit)
+
+        # 监视文件夹：新增文件自动加入列表并匹配
+        watch_folder_action = QAction("👁 监视文件夹", self)
+        watch_folder_action.setToolTip("监视文件夹（不含子文件夹），新文件自动加入列表并匹配，删除的文件自动移除")
+        watch_folder_action.triggered.connect(self.add_watch_folder)
+        toolbar.addAction(watch_folder_action)
+
+        self.stop_watch_action = QAction("⏹ 停止监视", self)
+        self.stop_watch_action.triggered.connect(self.stop_watching)
+        self.stop_watch_action.setEnabled(False)
+        toolbar.addAction(self.stop_watch_action)
+
         toolbar.addSeparator()
 
         # 匹配按钮
@@ -258,6 +316,15 @@ class FileMatcherGUI(QMainWindow):
         match_action.triggered.connect(self.match_files)
         toolbar.addAction(match_action)
 
+        # 文件名未匹配时是否继续按文件内容匹配
+        self.content_match_action = QAction("📄 内容匹配", self)
+        self.content_match_action.setCheckable(True)
+        self.content_match_action.setChecked(bool(self.rule_manager.get_setting("content_matching", False)))
+        self.content_match_action.setToolTip("文件名未匹配的文件，继续读取文件开头一段和PDF/Office文档的标题、主题进行匹配")
+        self.content_match_action.toggled.connect(
+            lambda checked: self.rule_manager.set_setting("content_matching", checked))
+        toolbar.addAction(self.content_match_action)
+
         toolbar.addSeparator()
 
         # 清空列表按钮
@@ -281,6 +348,12 @@ class FileMatcherGUI(QMainWindow):
         rules_action.triggered.connect(self.show_rule_settings)
         toolbar.addAction(rules_action)
 
+        # 匹配统计按钮
+        stats_action = QAction("📊 匹配统计", self)
+        stats_action.setToolTip("查看每条规则的命中次数、被遮蔽次数和匹配耗时，找出从未命中的规则")
+        stats_action.triggered.connect(self.show_match_stats)
+        toolbar.addAction(stats_action)
+
     def create_file_section(self):
         """创建文件管理区域"""
         section_widget = QWidget()
@@ -296,10 +369,16 @@ class FileMatcherGUI(QMainWindow):
         
         self.search_edit = QLineEdit()
         self.search_edit.setPlaceholderText("输入关键字搜索文件...")
-        self.search_edit.textChanged.connect(self.filter_files)
         self.search_edit.setFixedWidth(200)
         self.search_edit.hide()  # 初始隐藏
         info_layout.addWidget(self.search_edit)
+
+        # 输入停顿后再过滤，连续输入时不逐键过滤
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.filter_files)
+        self.search_edit.textChanged.connect(self.search_timer.start)
         
         info_layout.addStretch()
 
@@ -310,26 +389,37 @@ class FileMatcherGUI(QMainWindow):
 
         layout.addLayout(info_layout)
 
-        # 创建表格
-        self.file_table = QTableWidget()
-        self.file_table.setColumnCount(8)
-        self.file_table.setHorizontalHeaderLabels([
-            "选择", "文件名", "路径", "匹配结果", "Code", "30d", "匹配规则", "操作"
-        ])
+        # 创建表格：模型/视图结构，只有可见行才会请求数据和绘制
+        self.file_model = FileTableModel(self.files_data, self)
+        self.file_proxy = SearchFilterProxyModel(self)
+        self.file_proxy.setSourceModel(self.file_model)
+        self.file_table = QTableView()
+        self.file_table.setModel(self.file_proxy)
+        self.action_delegate = ActionButtonDelegate(self.file_table)
+        self.action_delegate.clicked.connect(self.on_action_clicked)
+        self.file_table.setItemDelegateForColumn(COLUMN_ACTION, self.action_delegate)
 
         # 设置表格属性
         self.file_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.file_table.setAlternatingRowColors(True)
+        # 保持添加顺序，点击表头时再排序
+        self.file_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
         self.file_table.setSortingEnabled(True)
         
+        # 固定行高，避免视图为计算行高遍历所有行
+        vertical_header = self.file_table.verticalHeader()
+        vertical_header.setSectionResizeMode(QHeaderView.Fixed)
+        vertical_header.setDefaultSectionSize(30)
+        
         # 设置列宽策略：允许用户手动拖拽调整列宽
+        # 不使用 ResizeToContents，它需要测量所有行的内容
         header = self.file_table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.Fixed)  # 选择列固定宽度
         header.setSectionResizeMode(1, QHeaderView.Interactive)  # 文件名可拖拽调整
         header.setSectionResizeMode(2, QHeaderView.Interactive)  # 路径可拖拽调整
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # 匹配结果
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # Code
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # 30d
+        header.setSectionResizeMode(3, QHeaderView.Interactive)  # 匹配结果
+        header.setSectionResizeMode(4, QHeaderView.Interactive)  # Code
+        header.setSectionResizeMode(5, QHeaderView.Interactive)  # 30d
         header.setSectionResizeMode(6, QHeaderView.Interactive)  # 匹配规则可拖拽调整
         header.setSectionResizeMode(7, QHeaderView.Fixed)  # 操作列固定宽度
         
@@ -337,6 +427,9 @@ class FileMatcherGUI(QMainWindow):
         self.file_table.setColumnWidth(0, 60)   # 选择列宽度
         self.file_table.setColumnWidth(1, 250)  # 文件名列宽度
         self.file_table.setColumnWidth(2, 200)  # 路径列宽度
+        self.file_table.setColumnWidth(3, 100)  # 匹配结果列宽度
+        self.file_table.setColumnWidth(4, 100)  # Code列宽度
+        self.file_table.setColumnWidth(5, 50)   # 30d列宽度
         self.file_table.setColumnWidth(6, 180)  # 匹配规则列宽度
         self.file_table.setColumnWidth(7, 110)  # 操作列宽度
 
@@ -452,6 +545,23 @@ class FileMatcherGUI(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("就绪")
 
+        # 目录扫描进度，文件总数未知，使用忙碌状态
+        self.scan_progress_bar = QProgressBar()
+        self.scan_progress_bar.setRange(0, 0)
+        self.scan_progress_bar.setFixedWidth(120)
+        self.scan_progress_bar.hide()
+        self.status_bar.addPermanentWidget(self.scan_progress_bar)
+
+        self.cancel_scan_button = QPushButton("取消扫描")
+        self.cancel_scan_button.clicked.connect(self.cancel_directory_scan)
+        self.cancel_scan_button.hide()
+        self.status_bar.addPermanentWidget(self.cancel_scan_button)
+
+        # 匹配缓存命中情况，首次匹配后显示
+        self.cache_stats_label = QLabel()
+        self.cache_stats_label.hide()
+        self.status_bar.addPermanentWidget(self.cache_stats_label)
+
         # 版权信息
         copyright_label = QLabel("作者:荔枝鱼  @版权所有,请勿随意传播与商用")
         copyright_label.setStyleSheet("""
@@ -470,25 +580,29 @@ class FileMatcherGUI(QMainWindow):
 
     def dropEvent(self, event):
         """处理拖拽放置事件"""
+        files_paths = []
+        folders = []
         for url in event.mimeData().urls():
             if url.isLocalFile():
                 path = Path(url.toLocalFile())
                 if path.is_file():
-                    self.add_file_to_table(str(path))
+                    files_paths.append(str(path))
                 elif path.is_dir():
-                    for item in path.iterdir():
-                        if item.is_file():
-                            self.add_file_to_table(str(item))
+                    folders.append(str(path))
         
+        self.add_paths_to_table(files_paths)
         self.update_status("通过拖拽添加了文件")
         self.update_file_stats()
+        
+        # 文件夹在后台扫描，避免网络共享上界面卡死
+        if folders:
+            self.start_directory_scan(folders)
 
     def add_files(self):
         """添加文件对话框"""
         files_paths, _ = QFileDialog.getOpenFileNames(self, "选择文件")
         if files_paths:
-            for path in files_paths:
-                self.add_file_to_table(path)
+            self.add_paths_to_table(files_paths)
             self.update_status(f"添加了 {len(files_paths)} 个文件")
             self.update_file_stats()
 
@@ -496,148 +610,482 @@ class FileMatcherGUI(QMainWindow):
         """添加文件夹对话框"""
         folder_path = QFileDialog.getExistingDirectory(self, "选择文件夹")
         if folder_path:
-            paths = [str(item) for item in Path(folder_path).iterdir() if item.is_file()]
-            for path in paths:
-                self.add_file_to_table(path)
-            self.update_status(f"从文件夹添加了 {len(paths)} 个文件")
+            self.start_directory_scan([folder_path])
+
+    def start_directory_scan(self, folders):
+        """在后台线程中扫描文件夹，扫描结果分批加入表格"""
+        if self.scan_worker is not None:
+            QMessageBox.information(self, "提示", "正在扫描文件夹，请等待扫描完成或取消扫描")
+            return
+        
+        from workers import DirectoryScanWorker
+        self.scan_worker = DirectoryScanWorker(
+            folders,
+            recursive=self.recursive_action.isChecked(),
+            extensions=parse_extensions(self.extension_edit.text())
+        )
+        self.scan_worker.batch_found.connect(self.on_scan_batch_found)
+        self.scan_worker.progress_updated.connect(self.on_scan_progress)
+        self.scan_worker.scan_finished.connect(self.on_scan_finished)
+        self.scan_worker.finished.connect(self.on_scan_worker_done)
+        
+        self.scan_progress_bar.show()
+        self.cancel_scan_button.show()
+        self.update_status("正在扫描文件夹...")
+        self.scan_worker.start()
+
+    def cancel_directory_scan(self):
+        """取消正在进行的目录扫描"""
+        if self.scan_worker is not None:
+            self.scan_worker.stop()
+
+    def on_scan_batch_found(self, entries):
+        """处理扫描线程发送的一批文件"""
+        if self.file_model.add_files(entries):
+            self.show_file_table()
             self.update_file_stats()
 
+    def import_manifest(self):
+        """选择路径清单文件，在后台线程中逐批读取并匹配"""
+        if self.manifest_worker is not None or self.scan_worker is not None:
+            QMessageBox.information(self, "提示", "正在添加文件，请等待完成后再导入路径清单")
+            return
+        manifest_path, _ = QFileDialog.getOpenFileName(
+            self, "选择路径清单", "", "Text Files (*.txt *.lst *.csv);;All Files (*)"
+        )
+        if not manifest_path:
+            return
+
+        # 列表中已有结果时沿用其规则集，保证与其他行一致；列表为空时使用最新规则
+        self.rule_manager.reload_if_changed()
+        if not self.files_data or self.files_data.rule_set is None:
+            self.files_data.set_rule_set(self.rule_manager.get_rule_set())
+        self.manifest_rule_set = self.files_data.rule_set
+        from workers import ManifestWorker
+        self.manifest_worker = ManifestWorker(manifest_path, self.manifest_rule_set.matcher,
+                                              with_shadowed=self.rule_manager.collects_shadowed())
+        self.manifest_progress_dialog = QProgressDialog("正在导入路径清单...", "取消", 0, 100, self)
+        self.manifest_progress_dialog.setWindowTitle("导入路径清单")
+        self.manifest_progress_dialog.setWindowModality(Qt.WindowModal)
+        self.manifest_progress_dialog.setMinimumDuration(500)
+        self.manifest_progress_dialog.canceled.connect(self.manifest_worker.stop)
+
+        self.manifest_worker.batch_found.connect(self.on_manifest_batch_found)
+        self.manifest_worker.progress_updated.connect(self.on_manifest_progress)
+        self.manifest_worker.manifest_finished.connect(self.on_manifest_finished)
+        self.manifest_worker.manifest_failed.connect(self.on_manifest_failed)
+        self.manifest_worker.finished.connect(self.on_manifest_worker_done)
+        self.manifest_worker.start()
+        self.update_status("正在导入路径清单...")
+
+    def on_manifest_batch_found(self, batch, rule_indices, pattern_ids, seconds, shadowed):
+        """处理导入线程发送的一批已匹配的文件，大小和修改时间未知"""
+        rule_set = self.manifest_rule_set
+        self.rule_manager.record_match(rule_set, pattern_ids, seconds, "manifest", shadowed)
+        entries = zip(batch.paths, batch.names, batch.directories, repeat(None), repeat(None))
+
+        # 导入期间规则被修改时，按表格现在使用的规则集重新匹配这一批
+        if rule_set is self.files_data.rule_set:
+            if self.file_model.add_files(entries, rule_indices, pattern_ids):
+                self.show_file_table()
+            return
+        first_row = len(self.files_data)
+        added_count = self.file_model.add_files(entries)
+        if added_count:
+            self.show_file_table()
+            self.classify_rows(range(first_row, first_row + added_count), "manifest")
+
+    def on_manifest_progress(self, found_count: int, percent: int):
+        """更新路径清单导入进度，文件统计在导入结束后再更新"""
+        self.manifest_progress_dialog.setValue(percent)
+        self.update_status(f"正在导入路径清单... 已导入并匹配 {found_count} 个文件")
+
+    def on_manifest_finished(self, found_count: int, cancelled: bool, directories):
+        """路径清单导入结束，移除清单中本身是目录的行"""
+        self.manifest_progress_dialog.reset()
+        self.manifest_rule_set = None
+        rows = [row for row in map(self.file_model.row_for_path, directories) if row >= 0]
+        if rows:
+            self.file_model.remove_rows(rows)
+        self.update_file_stats()
+        imported_count = found_count - len(rows)
+        if cancelled:
+            self.update_status(f"已取消导入，已加入取消前读取的 {imported_count} 个文件")
+        else:
+            self.update_status(f"路径清单导入完成: {imported_count} 个文件已按文件名匹配（未读取文件大小和修改时间）")
+
+    def on_manifest_failed(self, message: str):
+        """路径清单读取失败，已导入的文件保留"""
+        self.manifest_progress_dialog.reset()
+        self.manifest_rule_set = None
+        self.update_file_stats()
+        QMessageBox.critical(self, "导入失败", f"读取路径清单时发生错误:\n{message}")
+
+    def on_manifest_worker_done(self):
+        """路径清单导入线程结束，释放线程对象"""
+        self.manifest_worker.deleteLater()
+        self.manifest_worker = None
+
+    def add_watch_folder(self):
+        """选择要监视的文件夹"""
+        folder_path = QFileDialog.getExistingDirectory(self, "选择要监视的文件夹")
+        if not folder_path:
+            return
+        if self.folder_watcher is None:
+            from folder_watcher import FolderWatcher
+            self.folder_watcher = FolderWatcher(self)
+            self.folder_watcher.files_added.connect(self.on_watched_files_added)
+            self.folder_watcher.files_removed.connect(self.on_watched_files_removed)
+            self.folder_watcher.folder_lost.connect(self.on_watched_folder_lost)
+        if not self.folder_watcher.watch(folder_path, parse_extensions(self.extension_edit.text())):
+            QMessageBox.warning(self, "监视失败", f"无法监视文件夹:\n{folder_path}")
+            return
+        self.stop_watch_action.setEnabled(True)
+        self.stop_watch_action.setToolTip("正在监视:\n" + "\n".join(self.folder_watcher.folders()))
+        self.update_status(f"正在监视 {len(self.folder_watcher.folders())} 个文件夹")
+
+    def stop_watching(self):
+        """停止监视所有文件夹，已加入列表的文件保留"""
+        if self.folder_watcher is not None:
+            self.folder_watcher.unwatch_all()
+        self.stop_watch_action.setEnabled(False)
+        self.stop_watch_action.setToolTip("")
+        self.update_status("已停止监视文件夹")
+
+    def on_watched_files_added(self, entries):
+        """监视的文件夹中出现新文件：加入列表并立即匹配"""
+        first_row = len(self.files_data)
+        added_count = self.file_model.add_files(entries)
+        if not added_count:
+            return
+        self.show_file_table()
+        self.classify_rows(range(first_row, first_row + added_count), "watch")
+        self.update_status(f"监视文件夹: 新增 {added_count} 个文件")
+
+    def on_watched_files_removed(self, paths):
+        """监视的文件夹中文件被删除或移走：从列表移除"""
+        rows = [row for row in map(self.file_model.row_for_path, paths) if row >= 0]
+        if not rows:
+            return
+        self.file_model.remove_rows(rows)
+        if not self.files_data:
+            self.file_table.hide()
+            self.empty_state_widget.show()
+        self.update_file_stats()
+        self.update_status(f"监视文件夹: 移除 {len(rows)} 个已不存在的文件")
+
+    def on_watched_folder_lost(self, folder):
+        """监视的文件夹被删除或无法访问"""
+        if not self.folder_watcher.folders():
+            self.stop_watch_action.setEnabled(False)
+        self.update_status(f"文件夹已无法访问，停止监视: {folder}")
+
+    def classify_rows(self, rows, source="filename"):
+        """用编译好的匹配器匹配指定的行，source 为计入匹配统计的来源
+
+        使用表格中现有结果所用的规则集，保证与其他行的结果一致，规则修改后仍可增量更新。
+        """
+        rows = list(rows)
+        if self.files_data.rule_set is None:
+            self.files_data.set_rule_set(self.rule_manager.get_rule_set())
+        rule_set = self.files_data.rule_set
+        names = [self.files_data.names[row] for row in rows]
+        started = time.perf_counter()
+        rule_indices, pattern_ids = rule_set.matcher.match_many(names)
+        self.record_match_stats(rule_set, names, pattern_ids, time.perf_counter() - started, source)
+        self.files_data.set_matches(rows, rule_indices, pattern_ids)
+        self.file_model.refresh_rows(rows)
+        self.update_file_stats()
+
+    def on_scan_progress(self, found_count: int):
+        """更新扫描进度"""
+        self.update_status(f"正在扫描文件夹... 已发现 {found_count} 个文件")
+
+    def on_scan_finished(self, found_count: int, cancelled: bool):
+        """目录扫描结束"""
+        self.scan_progress_bar.hide()
+        self.cancel_scan_button.hide()
+        
+        if cancelled:
+            self.update_status(f"已取消扫描，已加入取消前发现的 {found_count} 个文件")
+        else:
+            self.update_status(f"扫描完成，从文件夹发现 {found_count} 个文件")
+        self.update_file_stats()
+
+    def on_scan_worker_done(self):
+        """目录扫描线程结束，释放线程对象"""
+        self.scan_worker.deleteLater()
+        self.scan_worker = None
+
     def add_file_to_table(self, file_path: str):
         """添加文件到表格"""
-        path_obj = Path(file_path)
-        
-        # 检查是否已经存在
-        for file_data in self.files_data:
-            if file_data["path"] == file_path:
-                return  # 文件已存在，不重复添加
-        
-        # 添加到数据列表
-        file_info = {
-            "path": file_path,
-            "name": path_obj.name,
-            "directory": str(path_obj.parent),
-            "size": path_obj.stat().st_size if path_obj.exists() else 0,
-            "matched": False,
-            "match_info": None
-        }
-        self.files_data.append(file_info)
-        
-        # 显示表格，隐藏空状态
+        self.add_paths_to_table([file_path])
+
+    def add_paths_to_table(self, files_paths):
+        """批量添加文件到表格，已存在的文件不重复添加"""
+        entries = []
+        for file_path in files_paths:
+            # 已存在的文件直接跳过，不再访问文件系统
+            if self.file_model.contains(file_path):
+                continue
+            path_obj = Path(file_path)
+            try:
+                stat = path_obj.stat()
+                size, mtime = stat.st_size, stat.st_mtime
+            except OSError:
+                size, mtime = 0, None  # 无法读取修改时间的文件不使用匹配缓存
+            entries.append(ScanEntry(file_path, path_obj.name, str(path_obj.parent), size, mtime))
+        
+        if self.file_model.add_files(entries):
+            self.show_file_table()
+
+    def show_file_table(self):
+        """显示表格，隐藏空状态"""
         if self.file_table.isHidden():
             self.empty_state_widget.hide()
             self.file_table.show()
-        
-        # 更新表格显示
-        self.refresh_table_display()
 
     def refresh_table_display(self):
         """刷新表格显示"""
-        self.file_table.setRowCount(len(self.files_data))
-        
-        for row, file_data in enumerate(self.files_data):
-            # 选择框
-            checkbox = QCheckBox()
-            checkbox.setChecked(True)
-            self.file_table.setCellWidget(row, 0, checkbox)
-            
-            # 文件名
-            name_item = QTableWidgetItem(file_data["name"])
-            name_item.setToolTip(file_data["name"])
-            self.file_table.setItem(row, 1, name_item)
-            
-            # 路径
-            path_item = QTableWidgetItem(file_data["directory"])
-            path_item.setToolTip(file_data["path"])
-            self.file_table.setItem(row, 2, path_item)
-            
-            # 匹配结果
-            if file_data["matched"]:
-                match_item = QTableWidgetItem("✅ 匹配")
-                match_item.setBackground(QColor(144, 238, 144))  # 淡绿色
-                match_item.setToolTip("文件匹配成功")
-                
-                info = file_data["match_info"]
-                code_item = QTableWidgetItem(str(info["code"]))
-                code_item.setToolTip(f"Code: {info['code']}")
-                thirty_d_item = QTableWidgetItem(str(info["30d"]))
-                thirty_d_item.setToolTip(f"30d: {info['30d']}")
-                rule_item = QTableWidgetItem(info["matched_rule"])
-                rule_item.setToolTip(f"匹配规则: {info['matched_rule']}")
-                
-                code_item.setBackground(QColor(144, 238, 144))
-                thirty_d_item.setBackground(QColor(144, 238, 144))
-                rule_item.setBackground(QColor(144, 238, 144))
-            else:
-                match_item = QTableWidgetItem("❌ 未匹配")
-                match_item.setBackground(QColor(255, 182, 193))  # 淡红色
-                match_item.setToolTip("文件未匹配到任何规则")
-                
-                code_item = QTableWidgetItem("")
-                code_item.setToolTip("无匹配结果")
-                thirty_d_item = QTableWidgetItem("")
-                thirty_d_item.setToolTip("无匹配结果")
-                rule_item = QTableWidgetItem("")
-                rule_item.setToolTip("无匹配规则")
-                
-                code_item.setBackground(QColor(255, 182, 193))
-                thirty_d_item.setBackground(QColor(255, 182, 193))
-                rule_item.setBackground(QColor(255, 182, 193))
-            
-            self.file_table.setItem(row, 3, match_item)
-            self.file_table.setItem(row, 4, code_item)
-            self.file_table.setItem(row, 5, thirty_d_item)
-            self.file_table.setItem(row, 6, rule_item)
-            
-            # 操作按钮
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-            action_layout.setContentsMargins(2, 2, 2, 2)
-            action_layout.setSpacing(2)
-            
-            if file_data["matched"]:
-                # 匹配成功时显示编辑规则按钮
-                edit_rule_btn = QPushButton("✏️ 修改规则")
-                edit_rule_btn.setFixedSize(100, 25)
-                edit_rule_btn.setToolTip("修改规则")
-                edit_rule_btn.clicked.connect(lambda checked, r=row: self.edit_rule_for_file(r))
-                action_layout.addWidget(edit_rule_btn)
-            else:
-                # 未匹配时显示新增规则按钮
-                add_rule_btn = QPushButton("➕ 添加规则")
-                add_rule_btn.setFixedSize(100, 25)
-                add_rule_btn.setToolTip("添加规则")
-                add_rule_btn.clicked.connect(lambda checked, r=row: self.add_rule_for_file(r))
-                action_layout.addWidget(add_rule_btn)
-            
-            action_layout.addStretch()
-            self.file_table.setCellWidget(row, 7, action_widget)
+        self.file_model.refresh()
         
         # 更新统计信息
         self.update_file_stats()
 
+    def on_action_clicked(self, file_path: str):
+        """操作列按钮点击：已匹配修改规则，未匹配添加规则"""
+        row = self.file_model.row_for_path(file_path)
+        if row >= 0:
+            if self.files_data.is_matched(row):
+                self.edit_rule_for_file(row)
+            else:
+                self.add_rule_for_file(row)
+
     def match_files(self):
         """执行文件匹配"""
         if not self.files_data:
             QMessageBox.information(self, "提示", "请先添加文件")
             return
         
-        # 重新加载规则
-        self.rule_manager.load_rules()
+        if self.match_worker is not None or self.content_worker is not None:
+            QMessageBox.information(self, "提示", "正在匹配，请等待当前匹配完成")
+            return
+        
+        # 配置文件变化时才重新加载，规则未变化则复用已编译的规则集
+        self.rule_manager.reload_if_changed()
+        rule_set = self.rule_manager.get_rule_set()
+        
+        # 大小和修改时间未变的文件直接使用缓存的匹配结果
+        files = self.files_data.copy()
+        records = files.match_records()
+        match_cache = self.get_match_cache()
+        match_cache.reset_stats()
+        rule_indices, pattern_ids, missing = match_cache.lookup_files(rule_set, records)
+        self.update_cache_stats()
+        
+        # 未命中缓存的文件较多时交给进程池，界面保持响应
+        threshold = self.rule_manager.get_setting("parallel_match_threshold", PARALLEL_MATCH_THRESHOLD)
+        if threshold and len(missing) >= threshold:
+            self.pending_match = (rule_set, files, records, (rule_indices, pattern_ids, missing))
+            self.start_parallel_match(rule_set, [files.names[position] for position in missing])
+            return
+        
+        if missing:
+            names = [files.names[position] for position in missing]
+            started = time.perf_counter()
+            missing_result = rule_set.matcher.match_many(names)
+            self.record_match_stats(rule_set, names, missing_result[1], time.perf_counter() - started)
+            match_cache.complete(records, missing, missing_result, rule_indices, pattern_ids)
+        self.apply_match_result(rule_set, files, rule_indices, pattern_ids)
+
+    def start_parallel_match(self, rule_set, names):
+        """在后台线程中用进程池匹配文件名"""
+        from workers import MatchWorker
+        max_workers = self.rule_manager.get_setting("parallel_match_workers")
+        self.match_worker = MatchWorker(rule_set.matcher, names, max_workers,
+                                        with_shadowed=self.rule_manager.collects_shadowed())
+        self.match_progress_dialog = QProgressDialog("正在匹配...", "取消", 0, len(names), self)
+        self.match_progress_dialog.setWindowTitle("匹配文件")
+        self.match_progress_dialog.setWindowModality(Qt.WindowModal)
+        self.match_progress_dialog.setMinimumDuration(500)
+        self.match_progress_dialog.canceled.connect(self.match_worker.stop)
         
-        matched_count = 0
-        for file_data in self.files_data:
-            is_matched, match_info = self.rule_manager.match_filename(file_data["name"])
-            file_data["matched"] = is_matched
-            file_data["match_info"] = match_info
-            if is_matched:
-                matched_count += 1
+        self.match_worker.progress_updated.connect(self.on_match_progress)
+        self.match_worker.match_finished.connect(self.on_match_finished)
+        self.match_worker.match_failed.connect(self.on_match_failed)
+        self.match_worker.match_cancelled.connect(self.on_match_cancelled)
+        self.match_worker.finished.connect(self.on_match_worker_done)
+        self.match_worker.start()
+        self.update_status(f"正在使用多进程匹配 {len(names)} 个文件...")
+
+    def on_match_progress(self, matched_count: int):
+        """更新匹配进度"""
+        self.match_progress_dialog.setValue(matched_count)
+        self.update_status(f"正在匹配... 已完成 {matched_count} 个文件")
+
+    def on_match_finished(self, missing_rules, missing_patterns, seconds, shadowed):
+        """多进程匹配完成，合并缓存结果后更新表格"""
+        self.match_progress_dialog.reset()
+        rule_set, files, records, (rule_indices, pattern_ids, missing) = self.pending_match
+        self.pending_match = None
+        self.rule_manager.record_match(rule_set, missing_patterns, seconds, shadowed=shadowed)
+        self.get_match_cache().complete(records, missing, (missing_rules, missing_patterns), rule_indices, pattern_ids)
+        self.apply_match_result(rule_set, files, rule_indices, pattern_ids)
+
+    def on_match_failed(self, message: str):
+        """多进程匹配失败"""
+        self.match_progress_dialog.reset()
+        self.pending_match = None
+        QMessageBox.critical(self, "匹配失败", f"匹配文件时发生错误:\n{message}")
+
+    def on_match_cancelled(self):
+        """多进程匹配已取消"""
+        self.match_progress_dialog.reset()
+        self.pending_match = None
+        self.update_status("匹配已取消")
+
+    def on_match_worker_done(self):
+        """匹配线程结束，释放线程对象"""
+        self.match_worker.deleteLater()
+        self.match_worker = None
+
+    def record_match_stats(self, rule_set, names, pattern_ids, seconds, source="filename"):
+        """把实际匹配的一批文件计入匹配统计，缓存命中的文件已在首次匹配时计入"""
+        shadowed = None
+        if self.rule_manager.collects_shadowed():
+            shadowed = count_shadowed(rule_set.matcher, names, pattern_ids)
+        self.rule_manager.record_match(rule_set, pattern_ids, seconds, source, shadowed)
+
+    def apply_match_result(self, rule_set, files, rule_indices, pattern_ids):
+        """把匹配结果写回文件列表并刷新显示
+        
+        files 为开始匹配时的文件列表快照，匹配期间被移除的文件不影响其余文件的结果。
+        """
+        added_rows = []
+        if rule_set is not self.files_data.rule_set:
+            # 切换规则集会清除匹配期间新加入的行的结果，这些行随后按新规则集重新匹配
+            added_rows = self.files_data.rows_added_since(files)
+            self.files_data.set_rule_set(rule_set)
+        self.files_data.set_matches(self.files_data.rows_of(files), rule_indices, pattern_ids)
+        if added_rows:
+            self.classify_rows(added_rows)
         
         # 刷新显示
         self.refresh_table_display()
         
-        total_files = len(self.files_data)
-        unmatched_count = total_files - matched_count
+        total_files = len(files)
+        unmatched_count = rule_indices.count(UNMATCHED)
+        matched_count = total_files - unmatched_count
         self.update_status(f"匹配完成: 共{total_files}个文件，匹配成功{matched_count}个，未匹配{unmatched_count}个")
+        
+        if unmatched_count and self.content_match_action.isChecked():
+            positions = [position for position, rule_index in enumerate(rule_indices) if rule_index == UNMATCHED]
+            self.start_content_match(rule_set, files, positions)
+
+    def start_content_match(self, rule_set, files, positions):
+        """在后台线程中按文件内容匹配文件名未匹配的文件，positions 为这些文件在快照 files 中的行号"""
+        from content import DEFAULT_CONTENT_BYTES, DEFAULT_CONTENT_WORKERS
+        from workers import ContentMatchWorker
+        max_workers = self.rule_manager.get_setting("content_match_workers", DEFAULT_CONTENT_WORKERS)
+        max_bytes = self.rule_manager.get_setting("content_match_bytes", DEFAULT_CONTENT_BYTES)
+        records = [(files.path(position), files.size(position), files.mtime(position)) for position in positions]
+        self.pending_content = (rule_set, files, positions)
+        self.content_worker = ContentMatchWorker(rule_set.matcher, records, max_workers, max_bytes)
+        self.content_progress_dialog = QProgressDialog("正在读取文件内容...", "取消", 0, len(positions), self)
+        self.content_progress_dialog.setWindowTitle("内容匹配")
+        self.content_progress_dialog.setWindowModality(Qt.WindowModal)
+        self.content_progress_dialog.setMinimumDuration(500)
+        self.content_progress_dialog.canceled.connect(self.content_worker.stop)
+        
+        self.content_worker.progress_updated.connect(self.on_content_progress)
+        self.content_worker.match_finished.connect(self.on_content_finished)
+        self.content_worker.match_failed.connect(self.on_content_failed)
+        self.content_worker.match_cancelled.connect(self.on_content_cancelled)
+        self.content_worker.finished.connect(self.on_content_worker_done)
+        self.content_worker.start()
+
+    def on_content_progress(self, done_count: int):
+        """更新内容匹配进度"""
+        self.content_progress_dialog.setValue(done_count)
+        self.update_status(f"正在按内容匹配... 已读取 {done_count} 个文件")
+
+    def on_content_finished(self, rule_indices, pattern_ids, seconds):
+        """内容匹配完成，把命中的文件标记为内容匹配"""
+        self.content_progress_dialog.reset()
+        rule_set, files, positions = self.pending_content
+        self.pending_content = None
+        # 文件名匹配的结果已显示，期间规则被修改时放弃内容匹配的结果
+        if rule_set is not self.files_data.rule_set:
+            return
+        # 提取的文本只在工作线程中，内容匹配不统计被遮蔽的关键字
+        self.rule_manager.record_match(rule_set, pattern_ids, seconds, "content")
+        rows = self.files_data.rows_of(files)
+        matched = [offset for offset, rule_index in enumerate(rule_indices) if rule_index != UNMATCHED]
+        self.files_data.set_matches([rows[positions[offset]] for offset in matched],
+                                    [rule_indices[offset] for offset in matched],
+                                    [pattern_ids[offset] for offset in matched], SOURCE_CONTENT)
+        self.refresh_table_display()
+        self.update_status(f"内容匹配完成: {len(positions)}个未匹配文件中，按内容匹配成功{len(matched)}个")
+
+    def on_content_failed(self, message: str):
+        """内容匹配失败，文件名匹配的结果保持不变"""
+        self.content_progress_dialog.reset()
+        self.pending_content = None
+        QMessageBox.critical(self, "内容匹配失败", f"读取文件内容时发生错误:\n{message}")
+
+    def on_content_cancelled(self):
+        """内容匹配已取消"""
+        self.content_progress_dialog.reset()
+        self.pending_content = None
+        self.update_status("内容匹配已取消，保留文件名匹配的结果")
+
+    def on_content_worker_done(self):
+        """内容匹配线程结束，释放线程对象"""
+        self.content_worker.deleteLater()
+        self.content_worker = None
+
+    def rematch_after_rule_change(self, previous_rule_set):
+        """规则修改后只重新匹配受影响的文件
+        
+        仅当表格中的结果来自修改前的规则集时才能增量更新，否则保持原状，由用户重新匹配。
+        """
+        self.rule_manager.reload_if_changed()
+        rule_set = self.rule_manager.get_rule_set()
+        if self.files_data.rule_set is not previous_rule_set or rule_set is previous_rule_set:
+            return
+        
+        files = self.files_data
+        diff = self.rule_manager.diff_since(previous_rule_set)
+        affected_rows = diff.affected_rows(files.rule_indices, self.file_model.name_index())
+        
+        # 未受影响的行只需换算规则索引和模式编号
+        files.remap_matches(rule_set, diff.remap)
+        content_rows = {row for row, source in enumerate(files.sources) if source == SOURCE_CONTENT}
+        
+        # 与完整匹配相同：先查匹配缓存，未命中的文件按文件名匹配后计入统计并写入缓存
+        rows = sorted(affected_rows)
+        records = [(files.path(row), files.names[row], files.size(row), files.mtime(row)) for row in rows]
+        match_cache = self.get_match_cache()
+        rule_indices, pattern_ids, missing = match_cache.lookup_files(rule_set, records)
+        if missing:
+            names = [records[position][1] for position in missing]
+            started = time.perf_counter()
+            missing_result = rule_set.matcher.match_many(names)
+            self.record_match_stats(rule_set, names, missing_result[1], time.perf_counter() - started)
+            match_cache.complete(records, missing, missing_result, rule_indices, pattern_ids)
+        files.set_matches(rows, rule_indices, pattern_ids)
+        self.file_model.refresh_rows(affected_rows)
+        self.update_file_stats()
+        self.update_status(f"规则已更新，重新匹配了受影响的 {len(affected_rows)} 个文件")
+        
+        # 按内容匹配的行和重新匹配后文件名未匹配的行再按内容匹配，新规则可能命中它们的内容
+        if not self.content_match_action.isChecked() or self.content_worker is not None:
+            return
+        content_rows.update(row for row, rule_index in zip(rows, rule_indices) if rule_index == UNMATCHED)
+        content_rows = [row for row in sorted(content_rows) if not files.is_matched(row)
+                        or files.sources[row] == SOURCE_CONTENT]
+        if content_rows:
+            self.start_content_match(rule_set, files.copy(), content_rows)
 
     def clear_file_list(self):
         """清空文件列表"""
@@ -648,8 +1096,7 @@ class FileMatcherGUI(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            self.files_data.clear()
-            self.file_table.setRowCount(0)
+            self.file_model.clear()
             
             # 显示空状态
             self.file_table.hide()
@@ -662,9 +1109,9 @@ class FileMatcherGUI(QMainWindow):
         """显示表格右键菜单"""
         menu = QMenu(self)
         
-        clicked_item = self.file_table.itemAt(position)
-        if clicked_item:
-            row = clicked_item.row()
+        clicked_index = self.file_table.indexAt(position)
+        if clicked_index.isValid():
+            row = self.file_proxy.mapToSource(clicked_index).row()
             
             # 文件操作
             open_file_action = menu.addAction("📄 打开文件")
@@ -688,7 +1135,7 @@ class FileMatcherGUI(QMainWindow):
     def open_file(self, row: int):
         """打开文件"""
         if 0 <= row < len(self.files_data):
-            file_path = self.files_data[row]["path"]
+            file_path = self.files_data.path(row)
             try:
                 QDesktopServices.openUrl(QUrl.fromLocalFile(file_path))
                 self.update_status(f"已打开文件: {Path(file_path).name}")
@@ -698,7 +1145,7 @@ class FileMatcherGUI(QMainWindow):
     def open_file_folder(self, row: int):
         """打开文件所在文件夹"""
         if 0 <= row < len(self.files_data):
-            file_path = self.files_data[row]["path"]
+            file_path = self.files_data.path(row)
             try:
                 # 使用Qt的安全方式打开文件夹，避免直接执行系统命令
                 folder_path = str(Path(file_path).parent)
@@ -710,15 +1157,11 @@ class FileMatcherGUI(QMainWindow):
     def remove_selected_files(self):
         """移除选中的文件"""
         # 获取选中的行
-        selected_rows = set()
-        for row in range(self.file_table.rowCount()):
-            checkbox = self.file_table.cellWidget(row, 0)
-            if checkbox and checkbox.isChecked():
-                selected_rows.add(row)
+        selected_rows = set(self.file_model.checked_rows())
         
         if not selected_rows:
             # 如果没有选中，则获取当前行
-            current_row = self.file_table.currentRow()
+            current_row = self.file_proxy.mapToSource(self.file_table.currentIndex()).row()
             if current_row >= 0:
                 selected_rows.add(current_row)
         
@@ -726,17 +1169,12 @@ class FileMatcherGUI(QMainWindow):
             QMessageBox.information(self, "提示", "请先选择要移除的文件")
             return
         
-        # 按倒序删除，避免索引问题
-        for row in sorted(selected_rows, reverse=True):
-            if 0 <= row < len(self.files_data):
-                del self.files_data[row]
+        self.file_model.remove_rows(selected_rows)
         
         # 刷新显示
         if not self.files_data:
             self.file_table.hide()
             self.empty_state_widget.show()
-        else:
-            self.refresh_table_display()
         
         self.update_status(f"移除了 {len(selected_rows)} 个文件")
         self.update_file_stats()
@@ -747,89 +1185,137 @@ class FileMatcherGUI(QMainWindow):
             QMessageBox.information(self, "提示", "没有数据可导出")
             return
         
+        if self.export_worker is not None:
+            QMessageBox.information(self, "提示", "正在导出，请等待导出完成")
+            return
+        
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        default_name = f"file_match_result_{timestamp}.xlsx"
+
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "导出文件", default_name,
+            "Excel Files (*.xlsx);;CSV Files (*.csv)"
+        )
+
+        if not file_path:
+            return
+
+        # 补全扩展名
+        if selected_filter == "CSV Files (*.csv)":
+            if not file_path.endswith(".csv"):
+                file_path += ".csv"
+        elif not file_path.endswith((".xlsx", ".xls", ".csv")):
+            file_path += ".xlsx"
+
+        # 旧版 .xls 没有可用的写入器，明确拒绝而不是写出扩展名不符的 xlsx
         try:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            default_name = f"file_match_result_{timestamp}.xlsx"
-
-            file_path, selected_filter = QFileDialog.getSaveFileName(
-                self, "导出文件", default_name,
-                "Excel Files (*.xlsx);;Excel 97-2003 (*.xls);;CSV Files (*.csv)"
-            )
-
-            if not file_path:
-                return
-
-            # 准备数据
-            data = []
-            for file_data in self.files_data:
-                if file_data["matched"]:
-                    info = file_data["match_info"]
-                    data.append([
-                        file_data["name"],
-                        file_data["directory"],
-                        "是",
-                        info["code"],
-                        info["30d"],
-                        info["matched_rule"]
-                    ])
-                else:
-                    data.append([
-                        file_data["name"],
-                        file_data["directory"],
-                        "否",
-                        "",
-                        "",
-                        ""
-                    ])
-
-            df = pd.DataFrame(data, columns=[
-                "文件名", "文件路径", "是否匹配成功", "Code", "30d", "匹配的规则"
-            ])
-
-            # 导出文件
-            if selected_filter == "Excel Files (*.xlsx)":
-                if not file_path.endswith(".xlsx"):
-                    file_path += ".xlsx"
-                df.to_excel(file_path, index=False)
-            elif selected_filter == "Excel 97-2003 (*.xls)":
-                if not file_path.endswith(".xls"):
-                    file_path += ".xls"
-                df.to_excel(file_path, index=False)
-            else:
-                if not file_path.endswith(".csv"):
-                    file_path += ".csv"
-                df.to_csv(file_path, index=False, encoding="utf_8_sig")
+            export_format_for(file_path)
+        except ValueError as e:
+            QMessageBox.warning(self, "导出失败", str(e))
+            return
 
-            self.update_status(f"已导出到: {file_path}")
-            
-            # 询问是否打开文件
-            reply = QMessageBox.question(
-                self, "导出成功", 
-                f"文件已成功导出到:\n{file_path}\n\n是否打开文件？",
-                QMessageBox.Yes | QMessageBox.No
-            )
-            
-            if reply == QMessageBox.Yes:
-                try:
-                    QDesktopServices.openUrl(QUrl.fromLocalFile(file_path))
-                except Exception as e:
-                    QMessageBox.warning(self, "打开失败", f"无法打开文件:\n{str(e)}")
+        # 在后台线程中流式写出，使用当前行列表的快照
+        total_count = len(self.files_data)
+        from workers import ExportWorker
+        self.export_worker = ExportWorker(self.files_data.copy(), file_path)
+        self.export_progress_dialog = QProgressDialog("正在导出...", "取消", 0, total_count, self)
+        self.export_progress_dialog.setWindowTitle("导出结果")
+        self.export_progress_dialog.setWindowModality(Qt.WindowModal)
+        self.export_progress_dialog.setMinimumDuration(500)
+        self.export_progress_dialog.canceled.connect(self.export_worker.stop)
+
+        self.export_worker.progress_updated.connect(self.on_export_progress)
+        self.export_worker.export_finished.connect(self.on_export_finished)
+        self.export_worker.export_failed.connect(self.on_export_failed)
+        self.export_worker.export_cancelled.connect(self.on_export_cancelled)
+        self.export_worker.finished.connect(self.on_export_worker_done)
+        self.export_worker.start()
+
+    def on_export_progress(self, row_count: int):
+        """更新导出进度"""
+        self.export_progress_dialog.setValue(row_count)
+        self.update_status(f"正在导出... 已写入 {row_count} 行")
+
+    def on_export_finished(self, file_path: str, row_count: int):
+        """导出完成"""
+        self.export_progress_dialog.reset()
+        self.update_status(f"已导出 {row_count} 行到: {file_path}")
+        
+        # 询问是否打开文件
+        reply = QMessageBox.question(
+            self, "导出成功", 
+            f"文件已成功导出到:\n{file_path}\n\n是否打开文件？",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        
+        if reply == QMessageBox.Yes:
+            try:
+                QDesktopServices.openUrl(QUrl.fromLocalFile(file_path))
+            except Exception as e:
+                QMessageBox.warning(self, "打开失败", f"无法打开文件:\n{str(e)}")
+
+    def on_export_failed(self, message: str):
+        """导出失败"""
+        self.export_progress_dialog.reset()
+        QMessageBox.critical(self, "导出失败", f"导出文件时发生错误:\n{message}")
+
+    def on_export_cancelled(self):
+        """导出已取消"""
+        self.export_progress_dialog.reset()
+        self.update_status("导出已取消")
 
-        except Exception as e:
-            QMessageBox.critical(self, "导出失败", f"导出文件时发生错误:\n{str(e)}")
+    def on_export_worker_done(self):
+        """导出线程结束，释放线程对象"""
+        self.export_worker.deleteLater()
+        self.export_worker = None
 
     def show_rule_settings(self):
         """显示规则设置对话框"""
-        dialog = RuleSettingsDialog(self)
+        previous_rule_set = self.rule_manager.get_rule_set()
+        dialog = RuleSettingsDialog(self, self.rule_manager)
         if dialog.exec() == QDialog.Accepted:
-            # 重新加载规则
-            self.rule_manager.load_rules()
             self.update_status("规则设置已更新")
+            # 规则设置对话框已写入配置文件，按文件变化重新加载并增量更新匹配结果
+            self.rematch_after_rule_change(previous_rule_set)
+
+    def show_match_stats(self):
+        """显示匹配统计对话框"""
+        dialog = MatchStatsDialog(self, self.rule_manager)
+        dialog.exec()
+
+    def closeEvent(self, event):
+        """关闭窗口前停止后台扫描、路径清单导入、匹配、内容匹配和导出"""
+        for worker in (self.scan_worker, self.manifest_worker, self.match_worker,
+                       self.content_worker, self.export_worker):
+            if worker is not None:
+                worker.stop()
+                worker.wait()
+        if self.match_cache is not None:
+            self.match_cache.close()
+        self.rule_manager.match_stats.save(get_stats_path())
+        super().closeEvent(event)
 
     def update_status(self, message: str):
         """更新状态栏消息"""
         self.status_bar.showMessage(message)
 
+    def get_match_cache(self):
+        """获取匹配缓存，首次调用时打开"""
+        if self.match_cache is None:
+            from match_cache import MatchCache
+            self.match_cache = MatchCache()
+        return self.match_cache
+
+    def update_cache_stats(self):
+        """在状态栏显示最近一次匹配的缓存命中情况"""
+        match_cache = self.get_match_cache()
+        if not match_cache.enabled:
+            self.cache_stats_label.setText("匹配缓存不可用")
+        else:
+            self.cache_stats_label.setText(
+                f"缓存命中: {match_cache.hits} | 未命中: {match_cache.misses}")
+        self.cache_stats_label.show()
+
     def update_file_stats(self):
         """更新文件统计显示"""
         total_count = len(self.files_data)
@@ -846,63 +1332,59 @@ class FileMatcherGUI(QMainWindow):
         self.search_edit.show()
         
         # 统计匹配结果
-        matched_count = sum(1 for file_data in self.files_data if file_data["matched"])
+        matched_count = self.files_data.matched_count()
         unmatched_count = total_count - matched_count
         
         stats_text = f"总计: {total_count} | 匹配成功: {matched_count} | 未匹配: {unmatched_count}"
         self.file_stats_label.setText(stats_text)
         self.file_stats_label.show()
     
-    def filter_files(self, text):
+    def filter_files(self):
         """根据搜索文本过滤文件表格"""
-        text = text.lower()
-        for row in range(self.file_table.rowCount()):
-            show_row = False
-            for col in range(self.file_table.columnCount() - 1):  # 排除操作列
-                item = self.file_table.item(row, col)
-                if item and text in item.text().lower():
-                    show_row = True
-                    break
-            self.file_table.setRowHidden(row, not show_row)
+        self.file_proxy.set_filter_text(self.search_edit.text())
 
     def edit_rule_for_file(self, row: int):
         """为匹配的文件编辑规则"""
         if 0 <= row < len(self.files_data):
-            file_data = self.files_data[row]
-            if file_data["matched"] and file_data["match_info"]:
-                # 获取匹配信息中的规则索引
-                match_info = file_data["match_info"]
-                rule_index = match_info["index"]
+            if self.files_data.is_matched(row):
+                # 获取命中的规则索引
+                rule_index = self.files_data.rule_indices[row]
                 
                 # 获取规则数据
-                df_rules = self.rule_manager.get_all_rules()
-                if rule_index < len(df_rules):
-                    rule_data = df_rules.iloc[rule_index].to_dict()
+                rules = self.rule_manager.get_all_rules()
+                if rule_index < len(rules):
+                    previous_rule_set = self.rule_manager.get_rule_set()
                     
                     # 打开编辑对话框
-                    dialog = RuleSettingsDialog(self)
-                    dialog.rules_table.selectRow(rule_index)
+                    dialog = RuleSettingsDialog(self, self.rule_manager)
+                    dialog.select_rule(rule_index)
                     dialog.edit_rule()
                     
-                    # 重新匹配文件
-                    self.match_files()
+                    # 只重新匹配受规则修改影响的文件
+                    self.rematch_after_rule_change(previous_rule_set)
 
     def add_rule_for_file(self, row: int):
         """为未匹配的文件添加规则"""
         if 0 <= row < len(self.files_data):
-            file_data = self.files_data[row]
-            filename = file_data["name"]
+            filename = self.files_data.names[row]
             
             # 打开新增规则对话框，并预填文件名作为匹配规则
             dialog = RuleEditDialog(self, rule_manager=self.rule_manager)
-            # 预填match_rule1为文件名的一部分（去掉扩展名）
-            if dialog.match_rule_widgets and "match_rule1" in dialog.match_rule_widgets:
+            # 预填第一条匹配规则为文件名的一部分（去掉扩展名）
+            if dialog.match_rule_widgets:
                 base_name = filename.rsplit('.', 1)[0] if '.' in filename else filename
-                dialog.match_rule_widgets["match_rule1"].setText(base_name)
+                dialog.match_rule_widgets[0].setText(base_name)
             
             if dialog.exec() == QDialog.Accepted:
-                # 重新匹配文件
-                self.match_files()
+                previous_rule_set = self.rule_manager.get_rule_set()
+                result = dialog.result_data
+                if not self.rule_manager.add_rule(result['code'], result['30d'], result['match_rules'],
+                                                  result['normalize']):
+                    QMessageBox.critical(self, "错误", "规则添加失败")
+                    return
+                
+                # 只重新匹配包含新规则关键字的文件
+                self.rematch_after_rule_change(previous_rule_set)
 
 
 def main():
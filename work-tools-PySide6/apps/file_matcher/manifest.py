@@ -0,0 +1,117 @@
+import codecs
+import mmap
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+# 每次从映射的文件中解码的字节数
+MANIFEST_CHUNK_BYTES = 1024 * 1024
+# 判断编码时检查的开头字节数
+ENCODING_SNIFF_BYTES = 64 * 1024
+
+# 文件开头的BOM与对应编码，UTF-8 BOM 放在最后，避免与 UTF-16 混淆
+_BOMS = (
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+)
+
+
+class ManifestBatch(NamedTuple):
+    """路径清单中的一批文件，按列保存"""
+    paths: List[str]
+    names: List[str]
+    directories: List[str]
+
+
+class ManifestProgress:
+    """路径清单读取进度"""
+
+    def __init__(self, total_bytes: int):
+        self.total_bytes = total_bytes
+        self.read_bytes = 0
+
+    def percent(self) -> int:
+        return int(self.read_bytes * 100 / self.total_bytes) if self.total_bytes else 100
+
+
+def detect_encoding(head: bytes) -> Tuple[str, int]:
+    """根据文件开头判断路径清单的编码，返回 (编码, BOM长度)
+
+    带BOM时按BOM判断（PowerShell 重定向输出为 UTF-16），否则开头能按 UTF-8 解码时使用 UTF-8，
+    不能时按 GB18030 处理（中文 Windows 下 cmd 的 dir 输出）。
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding, len(bom)
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # 只是截断在多字节字符中间时仍按 UTF-8 处理
+        if e.start < len(head) - 3:
+            return "gb18030", 0
+    return "utf-8", 0
+
+
+def split_path(line: str) -> Tuple[str, str]:
+    """把一行路径拆分为 (文件名, 所在目录)，同时识别 \\ 和 / 两种分隔符"""
+    directory, separator, name = line.rpartition("\\")
+    if "/" in name:
+        directory, separator, name = line.rpartition("/")
+    if separator and (not directory or directory.endswith(":")):
+        directory += separator  # 根目录保留分隔符，如 "C:\\" 和 "/"
+    return name, directory
+
+
+def iter_manifest_lines(path: str, progress: Optional[ManifestProgress] = None) -> Iterator[str]:
+    """内存映射路径清单文件，逐块解码并逐行返回去掉首尾空白和引号的非空行"""
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return  # 空文件无法映射
+        with data:
+            encoding, start = detect_encoding(data[:ENCODING_SNIFF_BYTES])
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            size = len(data)
+            pending = ""
+            for offset in range(start, size, MANIFEST_CHUNK_BYTES):
+                end = min(offset + MANIFEST_CHUNK_BYTES, size)
+                lines = (pending + decoder.decode(data[offset:end], final=end >= size)).split("\n")
+                pending = lines.pop()
+                if progress is not None:
+                    progress.read_bytes = end
+                for line in lines:
+                    line = line.strip().strip('"')
+                    if line:
+                        yield line
+            line = pending.strip().strip('"')
+            if line:
+                yield line
+
+
+def iter_manifest(path: str, batch_size: int,
+                  is_cancelled: Optional[Callable[[], bool]] = None,
+                  progress: Optional[ManifestProgress] = None,
+                  directories: Optional[Dict[str, str]] = None) -> Iterator[ManifestBatch]:
+    """把路径清单中的每一行作为一个文件，分批返回路径、文件名和目录，不访问文件系统
+
+    每批按列保存，不为每个文件创建对象。同一目录的目录字符串只保留一份，结束后 directories 中
+    为出现过的全部目录，可用于剔除清单中本身是目录的行（如 dir /s /b 未加 /a-d 时）。
+    """
+    if directories is None:
+        directories = {}
+    batch = ManifestBatch([], [], [])
+    for line in iter_manifest_lines(path, progress):
+        name, directory = split_path(line)
+        if not name:
+            continue  # 以分隔符结尾的行是目录
+        batch.paths.append(line)
+        batch.names.append(name)
+        batch.directories.append(directories.setdefault(directory, directory))
+        if len(batch.paths) >= batch_size:
+            yield batch
+            batch = ManifestBatch([], [], [])
+            if is_cancelled and is_cancelled():
+                return
+    if batch.paths:
+        yield batch
@@ -0,0 +1,172 @@
+import os
+import sqlite3
+from array import array
+from typing import List, Optional, Sequence, Tuple
+
+from app_paths import get_cache_dir
+from matcher import UNMATCHED, MatchResult
+from scanner import path_key
+
+CACHE_FILE_NAME = "match_cache.sqlite3"
+
+# 表结构版本，结构变化时旧缓存整体重建
+SCHEMA_VERSION = "1"
+
+# SQLite 单条语句的参数数量有上限，批量查询时分段
+QUERY_CHUNK_SIZE = 500
+
+
+class MatchCache:
+    """匹配结果的磁盘缓存 - 按 (规范化路径, 大小, 修改时间) 保存命中的规则和模式编号
+
+    缓存只对应一个规则集：meta 表记录规则集内容哈希，规则变化后整个缓存清空。
+    数据库无法打开或读写出错时缓存自动停用，匹配照常进行。
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(get_cache_dir(), CACHE_FILE_NAME)
+        self.hits = 0
+        self.misses = 0
+        self.enabled = True
+        self._connection = None
+        self._rule_hash = None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """按需打开数据库，失败时停用缓存"""
+        if self._connection is None and self.enabled:
+            try:
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                connection = sqlite3.connect(self.db_path)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+                row = connection.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+                if row is None or row[0] != SCHEMA_VERSION:
+                    connection.execute("DROP TABLE IF EXISTS results")
+                    connection.execute("DELETE FROM meta")
+                    connection.execute("INSERT INTO meta VALUES ('schema', ?)", (SCHEMA_VERSION,))
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "path TEXT PRIMARY KEY, size INTEGER, mtime REAL, "
+                    "rule_index INTEGER, pattern_id INTEGER) WITHOUT ROWID"
+                )
+                connection.commit()
+                self._connection = connection
+            except (sqlite3.Error, OSError):
+                self.enabled = False
+        return self._connection
+
+    def _disable(self):
+        """读写出错后停用缓存"""
+        self.enabled = False
+        self.close()
+
+    def use_rule_set(self, content_hash: str):
+        """切换到指定规则集，与缓存中记录的规则集不同时清空缓存"""
+        if content_hash == self._rule_hash:
+            return
+        connection = self._connect()
+        if connection is None:
+            return
+        try:
+            row = connection.execute("SELECT value FROM meta WHERE key = 'rule_hash'").fetchone()
+            if row is None or row[0] != content_hash:
+                with connection:
+                    connection.execute("DELETE FROM results")
+                    connection.execute("INSERT OR REPLACE INTO meta VALUES ('rule_hash', ?)", (content_hash,))
+            self._rule_hash = content_hash
+        except sqlite3.Error:
+            self._disable()
+
+    def lookup(self, records: Sequence[Tuple[str, Optional[int], Optional[float]]]
+               ) -> List[Optional[Tuple[int, int]]]:
+        """批量查询 (规范化路径, 大小, 修改时间)，命中返回 (规则索引, 模式编号)，未命中返回None"""
+        results = [None] * len(records)
+        connection = self._connect() if self._rule_hash is not None else None
+        if connection is not None:
+            try:
+                for start in range(0, len(records), QUERY_CHUNK_SIZE):
+                    chunk = records[start:start + QUERY_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    cached = {row[0]: row[1:] for row in connection.execute(
+                        f"SELECT path, size, mtime, rule_index, pattern_id FROM results "
+                        f"WHERE path IN ({placeholders})",
+                        [record[0] for record in chunk]
+                    )}
+                    for offset, (key, size, mtime) in enumerate(chunk):
+                        row = cached.get(key)
+                        if row is not None and size is not None and row[0] == size and row[1] == mtime:
+                            results[start + offset] = (row[2], row[3])
+            except sqlite3.Error:
+                self._disable()
+                results = [None] * len(records)
+
+        hit_count = len(records) - results.count(None)
+        self.hits += hit_count
+        self.misses += len(records) - hit_count
+        return results
+
+    def store(self, rows: Sequence[Tuple[str, int, float, int, int]]):
+        """保存 (规范化路径, 大小, 修改时间, 规则索引, 模式编号)"""
+        connection = self._connect() if self._rule_hash is not None else None
+        if connection is None or not rows:
+            return
+        try:
+            with connection:
+                connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            self._disable()
+
+    def lookup_files(self, rule_set, files: Sequence[Tuple[str, str, Optional[int], Optional[float]]]
+                     ) -> Tuple[array, array, List[int]]:
+        """查询 (路径, 文件名, 大小, 修改时间) 列表的缓存结果
+
+        返回 (规则索引数组, 模式编号数组, 未命中的位置列表)，未命中的位置在数组中为 UNMATCHED。
+        没有大小或修改时间的文件不使用缓存。
+        """
+        self.use_rule_set(rule_set.content_hash)
+        cached = self.lookup([(path_key(path), size, mtime) for path, _, size, mtime in files])
+
+        rule_indices = array('i', [UNMATCHED]) * len(files)
+        pattern_ids = array('i', [UNMATCHED]) * len(files)
+        missing = []
+        for position, result in enumerate(cached):
+            if result is None:
+                missing.append(position)
+            else:
+                rule_indices[position], pattern_ids[position] = result
+        return rule_indices, pattern_ids, missing
+
+    def complete(self, files, missing: List[int], missing_result: Tuple[array, array],
+                 rule_indices: array, pattern_ids: array):
+        """把未命中文件的匹配结果填入 lookup_files 返回的数组，并写入缓存"""
+        missing_rules, missing_patterns = missing_result
+        new_rows = []
+        for offset, position in enumerate(missing):
+            rule_indices[position] = missing_rules[offset]
+            pattern_ids[position] = missing_patterns[offset]
+            path, _, size, mtime = files[position]
+            if size is not None and mtime is not None:
+                new_rows.append((path_key(path), size, mtime, missing_rules[offset], missing_patterns[offset]))
+        self.store(new_rows)
+
+    def match(self, rule_set, files: Sequence[Tuple[str, str, Optional[int], Optional[float]]]) -> MatchResult:
+        """匹配 (路径, 文件名, 大小, 修改时间) 列表：命中缓存的文件直接取结果，其余文件批量匹配后写入缓存"""
+        rule_indices, pattern_ids, missing = self.lookup_files(rule_set, files)
+        matcher = rule_set.matcher
+        if missing:
+            missing_result = matcher.match_many(files[position][1] for position in missing)
+            self.complete(files, missing, missing_result, rule_indices, pattern_ids)
+        return MatchResult(rule_indices, pattern_ids, rule_set.rules, matcher.patterns)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except sqlite3.Error:
+                pass
+            self._connection = None
@@ -0,0 +1,231 @@
+import json
+import os
+import time
+from collections import Counter, deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app_paths import get_cache_dir
+from config_journal import atomic_write
+from matcher import UNMATCHED, CompiledMatcher
+
+STATS_FILE_NAME = "match_stats.json"
+STATS_FILE_VERSION = 1
+
+# 最多保留最近多少批匹配的耗时记录
+MAX_BATCH_RECORDS = 1000
+
+# 匹配来源在统计中的名称
+SOURCE_LABELS = {
+    "filename": "文件名",
+    "content": "文件内容",
+    "watch": "监视文件夹",
+    "manifest": "路径清单",
+}
+
+# 规则状态：从未命中，或只在优先级更高的规则之后被命中（永远不会胜出）
+STATUS_DEAD = "从未命中"
+STATUS_SHADOWED = "总被遮蔽"
+
+STATS_EXPORT_HEADERS = ["Code", "30d", "匹配规则", "关键字命中次数", "关键字被遮蔽次数",
+                        "规则命中次数", "规则被遮蔽次数", "规则状态"]
+
+
+def get_stats_path() -> str:
+    """匹配统计文件的默认路径，与匹配缓存放在同一目录"""
+    return os.path.join(get_cache_dir(), STATS_FILE_NAME)
+
+
+class BatchRecord(NamedTuple):
+    """一批匹配的耗时记录"""
+    timestamp: float
+    source: str
+    count: int
+    seconds: float
+
+
+class RuleStats(NamedTuple):
+    """一条规则的统计"""
+    rule_index: int
+    code: str
+    thirty_d: str
+    pattern_count: int
+    hits: int
+    shadowed: int
+    status: str
+
+
+class PatternStats(NamedTuple):
+    """一个匹配关键字的统计"""
+    rule_index: int
+    code: str
+    pattern: str
+    hits: int
+    shadowed: int
+
+
+def count_shadowed(matcher: CompiledMatcher, names: Iterable[str],
+                   pattern_ids: Sequence[int]) -> Tuple[Counter, Counter]:
+    """对已匹配的文件名查找全部命中的关键字，返回 (模式编号 -> 被遮蔽次数, 规则索引 -> 被遮蔽的文件数)
+
+    只统计属于其他规则的关键字，同一规则内排在后面的关键字不算被遮蔽。
+    结果只含整数，可以从工作进程返回。
+    """
+    patterns = matcher.patterns
+    pattern_counts = Counter()
+    rule_counts = Counter()
+    for name, winner in zip(names, pattern_ids):
+        if winner == UNMATCHED:
+            continue
+        winner_rule = patterns[winner][0]
+        shadowed_rules = set()
+        for pattern_id in matcher.match_all(name):
+            rule_index = patterns[pattern_id][0]
+            if rule_index != winner_rule:
+                pattern_counts[pattern_id] += 1
+                shadowed_rules.add(rule_index)
+        rule_counts.update(shadowed_rules)
+    return pattern_counts, rule_counts
+
+
+class MatchStats:
+    """匹配统计 - 累计每条规则、每个关键字的命中次数和被遮蔽次数，以及每批匹配的耗时
+
+    被遮蔽指关键字同样出现在文件名中，但排在前面的另一条规则先命中。
+    计数按 (规则键, 关键字文本) 保存而不是按编号，规则修改后未变化的规则和关键字继续累计，
+    也可以保存到文件，跨多次运行累计。
+    """
+
+    def __init__(self):
+        self.pattern_hits: Counter = Counter()  # (规则键, 关键字) -> 命中次数
+        self.pattern_shadowed: Counter = Counter()  # (规则键, 关键字) -> 被遮蔽次数
+        self.rule_hits: Counter = Counter()  # 规则键 -> 命中次数
+        self.rule_shadowed: Counter = Counter()  # 规则键 -> 被遮蔽的文件数
+        self.batches = deque(maxlen=MAX_BATCH_RECORDS)
+        self.name_count = 0
+        self.matched_count = 0
+        self.batch_count = 0
+        self.total_seconds = 0.0
+        self.timed_count = 0  # 记录了耗时的文件数
+
+    def reset(self):
+        """清零全部统计"""
+        self.__init__()
+
+    def record_batch(self, rule_set, pattern_ids: Sequence[int], seconds: Optional[float] = None,
+                     source: str = "filename", shadowed: Optional[Tuple[Counter, Counter]] = None):
+        """记录一批匹配结果
+
+        pattern_ids 为每个文件命中的模式编号（未匹配为-1），seconds 为匹配耗时，没有计时的批次传入None；
+        shadowed 为 count_shadowed 对同一批文件的结果。
+        """
+        patterns = rule_set.matcher.patterns
+        keys = rule_set.keys
+        counts = Counter(pattern_ids)
+        unmatched = counts.pop(UNMATCHED, 0)
+        for pattern_id, count in counts.items():
+            rule_index, pattern = patterns[pattern_id]
+            self.pattern_hits[keys[rule_index], pattern] += count
+            self.rule_hits[keys[rule_index]] += count
+
+        self.name_count += len(pattern_ids)
+        self.matched_count += len(pattern_ids) - unmatched
+        if seconds is not None:
+            self.batch_count += 1
+            self.total_seconds += seconds
+            self.timed_count += len(pattern_ids)
+            self.batches.append(BatchRecord(time.time(), source, len(pattern_ids), seconds))
+        if shadowed is not None:
+            pattern_counts, rule_counts = shadowed
+            for pattern_id, count in pattern_counts.items():
+                rule_index, pattern = patterns[pattern_id]
+                self.pattern_shadowed[keys[rule_index], pattern] += count
+            for rule_index, count in rule_counts.items():
+                self.rule_shadowed[keys[rule_index]] += count
+
+    def names_per_second(self) -> float:
+        """实际匹配的平均速度（个/秒）"""
+        return self.timed_count / self.total_seconds if self.total_seconds > 0 else 0.0
+
+    def rule_stats(self, rule_set) -> List[RuleStats]:
+        """按规则顺序返回当前规则集中每条未删除规则的统计"""
+        result = []
+        for rule_index, (rule, key) in enumerate(zip(rule_set.rules, rule_set.keys)):
+            if rule.get('deleted', False):
+                continue
+            hits = self.rule_hits.get(key, 0)
+            shadowed = self.rule_shadowed.get(key, 0)
+            if hits:
+                status = ""
+            else:
+                status = STATUS_SHADOWED if shadowed else STATUS_DEAD
+            result.append(RuleStats(rule_index, str(rule.get('code', '')), str(rule.get('30d', '')),
+                                    len(rule.get('match_rules', [])), hits, shadowed, status))
+        return result
+
+    def pattern_stats(self, rule_set) -> List[PatternStats]:
+        """按模式编号顺序返回当前规则集中每个关键字的统计"""
+        keys = rule_set.keys
+        result = []
+        for rule_index, pattern in rule_set.matcher.patterns:
+            key = (keys[rule_index], pattern)
+            result.append(PatternStats(rule_index, str(rule_set.rules[rule_index].get('code', '')), pattern,
+                                       self.pattern_hits.get(key, 0), self.pattern_shadowed.get(key, 0)))
+        return result
+
+    def dead_rules(self, rule_set) -> List[RuleStats]:
+        """从未命中的规则（包括只被遮蔽的规则），可以考虑删除"""
+        return [stats for stats in self.rule_stats(rule_set) if stats.status]
+
+    def iter_export_rows(self, rule_set) -> Iterable[List]:
+        """逐行生成统计导出数据：每个关键字一行，附带所属规则的统计"""
+        rules_by_index: Dict[int, RuleStats] = {stats.rule_index: stats for stats in self.rule_stats(rule_set)}
+        for pattern_stats in self.pattern_stats(rule_set):
+            rule_stats = rules_by_index[pattern_stats.rule_index]
+            yield [rule_stats.code, rule_stats.thirty_d, pattern_stats.pattern,
+                   pattern_stats.hits, pattern_stats.shadowed,
+                   rule_stats.hits, rule_stats.shadowed, rule_stats.status]
+
+    def save(self, path: str) -> bool:
+        """保存统计到JSON文件，失败时返回False"""
+        data = {
+            "version": STATS_FILE_VERSION,
+            "pattern_hits": [[key, pattern, count] for (key, pattern), count in self.pattern_hits.items()],
+            "pattern_shadowed": [[key, pattern, count] for (key, pattern), count in self.pattern_shadowed.items()],
+            "rule_hits": dict(self.rule_hits),
+            "rule_shadowed": dict(self.rule_shadowed),
+            "batches": [list(batch) for batch in self.batches],
+            "name_count": self.name_count,
+            "matched_count": self.matched_count,
+            "batch_count": self.batch_count,
+            "total_seconds": self.total_seconds,
+            "timed_count": self.timed_count,
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write(path, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+            return True
+        except OSError:
+            return False
+
+    def load(self, path: str) -> bool:
+        """从JSON文件读取之前保存的统计，文件不存在或无法解析时保持为空并返回False"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != STATS_FILE_VERSION:
+                return False
+            self.pattern_hits = Counter({(key, pattern): count for key, pattern, count in data["pattern_hits"]})
+            self.pattern_shadowed = Counter(
+                {(key, pattern): count for key, pattern, count in data["pattern_shadowed"]})
+            self.rule_hits = Counter(data["rule_hits"])
+            self.rule_shadowed = Counter(data["rule_shadowed"])
+            self.batches = deque((BatchRecord(*batch) for batch in data["batches"]), maxlen=MAX_BATCH_RECORDS)
+            self.name_count = data["name_count"]
+            self.matched_count = data["matched_count"]
+            self.batch_count = data["batch_count"]
+            self.total_seconds = data["total_seconds"]
+            self.timed_count = data["timed_count"]
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            self.reset()
+            return False
@@ -0,0 +1,181 @@
+import datetime
+from typing import List
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtWidgets import (QAbstractItemView, QCheckBox, QDialog,
+                               QFileDialog, QHBoxLayout, QHeaderView, QLabel,
+                               QMessageBox, QPushButton, QTableView,
+                               QTabWidget, QVBoxLayout, QWidget)
+
+from exporter import export_rows
+from match_stats import SOURCE_LABELS, STATS_EXPORT_HEADERS
+
+RULE_HEADERS = ["Code", "30d", "关键字数", "命中次数", "被遮蔽次数", "状态"]
+PATTERN_HEADERS = ["Code", "匹配规则", "命中次数", "被遮蔽次数"]
+BATCH_HEADERS = ["时间", "来源", "文件数", "耗时(秒)", "速度(个/秒)"]
+
+
+class StatsTableModel(QAbstractTableModel):
+    """只读统计表格模型 - 每行为一个值列表，数值列按数值排序、右对齐
+
+    行中超出表头数量的值不显示，可用于附带规则索引等数据。
+    """
+
+    def __init__(self, headers: List[str], parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self._rows: List[list] = []
+
+    def set_rows(self, rows: List[list]):
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+    def row_values(self, row: int) -> list:
+        """获取一行的全部值，包括表头之外附带的值（如规则索引）"""
+        return self._rows[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self._rows[index.row()][index.column()]
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return f"{value:.3f}" if isinstance(value, float) else str(value)
+        if role == Qt.TextAlignmentRole and isinstance(value, (int, float)):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self._rows.sort(key=lambda row: row[column], reverse=(order == Qt.DescendingOrder))
+        self.layoutChanged.emit()
+
+
+class MatchStatsDialog(QDialog):
+    """匹配统计对话框 - 显示每条规则、每个关键字的命中和被遮蔽次数以及每批匹配的耗时"""
+
+    def __init__(self, parent=None, rule_manager=None):
+        super().__init__(parent)
+        self.rule_manager = rule_manager
+        self.stats = rule_manager.match_stats
+        self.setWindowTitle("匹配统计")
+        self.setModal(True)
+        self.setWindowFlags(Qt.Dialog | Qt.WindowTitleHint | Qt.WindowSystemMenuHint |
+                            Qt.WindowMinimizeButtonHint | Qt.WindowCloseButtonHint)
+        self.resize(900, 600)
+
+        self.rule_model = StatsTableModel(RULE_HEADERS, self)
+        self.pattern_model = StatsTableModel(PATTERN_HEADERS, self)
+        self.batch_model = StatsTableModel(BATCH_HEADERS, self)
+        self.setup_ui()
+        self.load_stats()
+
+    def setup_ui(self):
+        """设置界面"""
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        self.tabs = QTabWidget()
+        rules_page = QWidget()
+        rules_layout = QVBoxLayout(rules_page)
+        self.dead_only_check = QCheckBox("只显示从未命中或总被遮蔽的规则")
+        self.dead_only_check.toggled.connect(lambda checked: self.load_stats())
+        rules_layout.addWidget(self.dead_only_check)
+        rules_layout.addWidget(self.create_table(self.rule_model))
+        self.tabs.addTab(rules_page, "规则")
+        self.tabs.addTab(self.create_table(self.pattern_model), "关键字")
+        self.tabs.addTab(self.create_table(self.batch_model), "匹配批次")
+        layout.addWidget(self.tabs)
+
+        button_layout = QHBoxLayout()
+        export_btn = QPushButton("💾 导出统计")
+        export_btn.clicked.connect(self.export_stats)
+        button_layout.addWidget(export_btn)
+
+        reset_btn = QPushButton("🔄 清零统计")
+        reset_btn.clicked.connect(self.reset_stats)
+        button_layout.addWidget(reset_btn)
+        button_layout.addStretch()
+
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+    @staticmethod
+    def create_table(model: StatsTableModel) -> QTableView:
+        """创建只读、可排序的统计表格"""
+        table = QTableView()
+        table.setModel(model)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSortingEnabled(True)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def load_stats(self):
+        """按当前规则集刷新各表格和摘要"""
+        self.rule_manager.reload_if_changed()
+        rule_set = self.rule_manager.get_rule_set()
+        rule_stats = self.stats.rule_stats(rule_set)
+        dead_rules = [stats for stats in rule_stats if stats.status]
+
+        shown_rules = dead_rules if self.dead_only_check.isChecked() else rule_stats
+        self.rule_model.set_rows([[stats.code, stats.thirty_d, stats.pattern_count,
+                                   stats.hits, stats.shadowed, stats.status] for stats in shown_rules])
+        self.pattern_model.set_rows([[stats.code, stats.pattern, stats.hits, stats.shadowed]
+                                     for stats in self.stats.pattern_stats(rule_set)])
+        self.batch_model.set_rows([[
+            datetime.datetime.fromtimestamp(batch.timestamp).strftime("%Y-%m-%d %H:%M:%S"),
+            SOURCE_LABELS.get(batch.source, batch.source),
+            batch.count,
+            batch.seconds,
+            int(batch.count / batch.seconds) if batch.seconds > 0 else 0,
+        ] for batch in reversed(self.stats.batches)])
+
+        self.summary_label.setText(
+            f"已统计 {self.stats.name_count} 个文件，匹配成功 {self.stats.matched_count} 个；"
+            f"共 {self.stats.batch_count} 批匹配，耗时 {self.stats.total_seconds:.2f} 秒，"
+            f"平均 {self.stats.names_per_second():.0f} 个/秒。\n"
+            f"{len(rule_stats)} 条规则中 {len(dead_rules)} 条从未胜出"
+            f"（从未命中或总被排在前面的规则遮蔽），可以考虑删除。"
+        )
+
+    def export_stats(self):
+        """导出每个关键字的统计"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "导出统计", f"匹配统计_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+            "Excel Files (*.xlsx);;CSV Files (*.csv)"
+        )
+        if not file_path:
+            return
+        try:
+            row_count = export_rows(self.stats.iter_export_rows(self.rule_manager.get_rule_set()),
+                                    file_path, headers=STATS_EXPORT_HEADERS)
+        except Exception as e:
+            QMessageBox.critical(self, "导出失败", f"导出统计时发生错误:\n{str(e)}")
+            return
+        QMessageBox.information(self, "导出成功", f"已导出 {row_count} 个关键字的统计到:\n{file_path}")
+
+    def reset_stats(self):
+        """清零全部统计"""
+        reply = QMessageBox.question(self, "确认清零", "确定要清零全部匹配统计吗？",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.stats.reset()
+            self.load_stats()
@@ -0,0 +1,457 @@
+import fnmatch
+import re
+import unicodedata
+from array import array
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+# 未命中时的优先级哨兵值，大于任何有效的模式编号
+NO_MATCH = 1 << 62
+
+# 批量结果中表示未匹配的索引值
+UNMATCHED = -1
+
+# 匹配关键字的类型：包含、通配符（匹配整个文件名）、正则表达式（在文件名中搜索）、开头、结尾
+PATTERN_TYPES = ("literal", "glob", "regex", "prefix", "suffix")
+
+# 规则可选的规范化选项，按此顺序应用：NFKC 规范化、全角转半角、忽略大小写、连续空白合并为一个空格
+NORMALIZE_OPTIONS = ("nfkc", "width", "casefold", "whitespace")
+
+# 全角ASCII字符和全角空格转换为对应的半角字符
+_FULL_TO_HALF_WIDTH = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+_FULL_TO_HALF_WIDTH[0x3000] = 0x20
+_WHITESPACE = re.compile(r"\s+")
+
+# 开头的全局标志如 (?i) 不能出现在合并后的表达式中间，改写为只作用于该模式的 (?i:...)
+_GLOBAL_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+# 含反向引用或命名分组的正则嵌入合并表达式后编号会错位或重名，单独匹配
+_STANDALONE_SYNTAX = re.compile(r"\\[1-9]|\(\?P[<=]")
+
+
+def parse_match_rule(match_rule: Union[str, Dict]) -> Tuple[str, str]:
+    """解析 match_rules 中的一项，返回 (类型, 关键字)
+
+    字符串为包含匹配的关键字，其他类型保存为 {"type": 类型, "pattern": 关键字}。
+    """
+    if isinstance(match_rule, dict):
+        return match_rule.get('type', 'literal'), match_rule.get('pattern', '')
+    return 'literal', match_rule
+
+
+def make_match_rule(pattern_type: str, pattern: str) -> Union[str, Dict]:
+    """生成 match_rules 中的一项，包含匹配仍保存为字符串，与旧版配置兼容"""
+    if pattern_type == 'literal':
+        return pattern
+    return {'type': pattern_type, 'pattern': pattern}
+
+
+def format_match_rule(match_rule: Union[str, Dict]) -> str:
+    """匹配关键字的显示文本，非包含类型带类型前缀，如 regex:^IMG_\\d+"""
+    pattern_type, pattern = parse_match_rule(match_rule)
+    return pattern if pattern_type == 'literal' else f"{pattern_type}:{pattern}"
+
+
+def parse_match_rule_text(text: str) -> Union[str, Dict]:
+    """format_match_rule 的逆操作：带类型前缀的文本解析为对应类型，其余按包含匹配"""
+    pattern_type, separator, pattern = text.partition(':')
+    if separator and pattern_type in PATTERN_TYPES and pattern_type != 'literal':
+        return make_match_rule(pattern_type, pattern)
+    return text
+
+
+def validate_match_rule(match_rule: Union[str, Dict]) -> Optional[str]:
+    """检查匹配关键字，有问题时返回错误信息"""
+    pattern_type, pattern = parse_match_rule(match_rule)
+    if pattern_type not in PATTERN_TYPES:
+        return f"未知的匹配类型: {pattern_type}"
+    if not isinstance(pattern, str) or not pattern:
+        return "匹配关键字不能为空"
+    if pattern_type == 'regex':
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            return f"正则表达式无效: {pattern} ({e})"
+    return None
+
+
+def normalize_options(rule: Dict) -> Tuple[str, ...]:
+    """规则的规范化选项，按 NORMALIZE_OPTIONS 中的应用顺序排列，忽略未知选项"""
+    options = rule.get('normalize') or ()
+    return tuple(option for option in NORMALIZE_OPTIONS if option in options)
+
+
+def normalize_text(text: str, options: Tuple[str, ...]) -> str:
+    """按选项规范化文件名或关键字"""
+    if 'nfkc' in options:
+        text = unicodedata.normalize('NFKC', text)
+    if 'width' in options:
+        text = text.translate(_FULL_TO_HALF_WIDTH)
+    if 'casefold' in options:
+        text = text.casefold()
+    if 'whitespace' in options:
+        text = _WHITESPACE.sub(' ', text)
+    return text
+
+
+def normalize_pattern(pattern_type: str, pattern: str, options: Tuple[str, ...]) -> str:
+    """编译时规范化关键字；正则表达式的语法可能被改写，保持原样，只规范化文件名"""
+    if not options or pattern_type == 'regex':
+        return pattern
+    return normalize_text(pattern, options)
+
+
+def iter_pattern_entries(rules: List[Dict]) -> Iterator[Tuple[int, int, Union[str, Dict], Tuple[str, ...], str, str]]:
+    """按编号顺序展开规则中的匹配关键字
+
+    依次产生 (模式编号, 规则索引, 原始匹配规则, 规范化选项, 匹配类型, 规范化后的关键字)，
+    跳过已删除的规则和空关键字；规范化后为空的关键字仍占用编号，但不参与匹配。
+    """
+    pattern_id = 0
+    for rule_index, rule in enumerate(rules):
+        if rule.get('deleted', False):
+            continue
+        options = normalize_options(rule)
+        for match_rule in rule.get('match_rules', []):
+            pattern_type, pattern = parse_match_rule(match_rule)
+            if not pattern:
+                continue
+            yield (pattern_id, rule_index, match_rule, options, pattern_type,
+                   normalize_pattern(pattern_type, pattern, options))
+            pattern_id += 1
+
+
+def _pattern_regex(pattern_type: str, pattern: str) -> str:
+    """把非包含类型的关键字转换为从文件名开头匹配的正则表达式"""
+    if pattern_type == 'prefix':
+        return re.escape(pattern)
+    if pattern_type == 'suffix':
+        return f".*?{re.escape(pattern)}\\Z"
+    if pattern_type == 'glob':
+        return fnmatch.translate(pattern)
+    flags = _GLOBAL_FLAGS.match(pattern)
+    if flags:
+        pattern = f"(?{flags.group(1)}:{pattern[flags.end():]})"
+    return f".*?(?:{pattern})"
+
+
+class TypedPatternSet:
+    """非包含类型的关键字 - 合并为一个带命名分组的正则表达式
+
+    每个关键字改写为从文件名开头匹配的分支，按编号顺序组成多选结构，
+    第一个能匹配的分支即为编号最小的命中关键字，一次调用完成全部判断。
+    无法安全合并的正则单独编译，按编号顺序补充检查。
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, str, str]]):
+        combined = []
+        self._group_ids: Dict[str, int] = {}
+        self._standalone: List[Tuple[int, 're.Pattern']] = []
+        self.min_id = NO_MATCH
+        for pattern_id, pattern_type, pattern in sorted(entries):
+            if validate_match_rule(make_match_rule(pattern_type, pattern)) is not None:
+                continue  # 无效的正则不参与匹配
+            self.min_id = min(self.min_id, pattern_id)
+            regex = _pattern_regex(pattern_type, pattern)
+            if pattern_type == 'regex' and _STANDALONE_SYNTAX.search(pattern):
+                self._standalone.append((pattern_id, re.compile(regex, re.DOTALL)))
+            else:
+                combined.append((pattern_id, regex))
+
+        self._combined = None
+        self._combined_sources = combined
+        self._separate = None  # 查找全部命中时使用的逐个编译的正则，按需构建
+        if combined:
+            try:
+                self._combined = re.compile(
+                    "|".join(f"(?P<p{pattern_id}>{regex})" for pattern_id, regex in combined), re.DOTALL)
+                self._group_ids = {f"p{pattern_id}": pattern_id for pattern_id, _ in combined}
+            except re.error:
+                # 个别正则的写法无法合并时退回逐个匹配，结果不变
+                self._standalone = sorted(self._standalone + [
+                    (pattern_id, re.compile(regex, re.DOTALL)) for pattern_id, regex in combined])
+                self._combined_sources = []
+
+    def __bool__(self) -> bool:
+        return self.min_id != NO_MATCH
+
+    def search(self, filename: str, limit: int = NO_MATCH) -> int:
+        """返回编号小于 limit 的最小命中编号，没有时返回 limit"""
+        best = limit
+        if self._combined is not None:
+            match = self._combined.match(filename)
+            if match is not None:
+                best = min(best, self._group_ids[match.lastgroup])
+        for pattern_id, regex in self._standalone:
+            if pattern_id >= best:
+                break
+            if regex.match(filename):
+                best = pattern_id
+                break
+        return best
+
+    def search_all(self, filename: str) -> List[int]:
+        """返回所有命中的关键字编号，合并表达式只能给出一个分支，因此逐个匹配"""
+        if self._separate is None:
+            self._separate = sorted(self._standalone + [
+                (pattern_id, re.compile(regex, re.DOTALL)) for pattern_id, regex in self._combined_sources])
+        return [pattern_id for pattern_id, regex in self._separate if regex.match(filename)]
+
+
+class PatternGroup:
+    """一组使用相同规范化选项的关键字 - 包含类型的关键字构建Aho-Corasick自动机，其他类型由 TypedPatternSet 合并匹配
+
+    对每个文件名只做一次线性扫描，两者取编号较小者。
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, str, str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[int] = [NO_MATCH]
+        self._terminals: Dict[int, List[int]] = {}  # 节点 -> 在该节点结束的全部模式编号
+        self.min_id = NO_MATCH
+        typed_entries = []
+
+        for pattern_id, pattern_type, pattern in entries:
+            self.min_id = min(self.min_id, pattern_id)
+            if pattern_type == 'literal':
+                self._insert(pattern, pattern_id)
+            else:
+                typed_entries.append((pattern_id, pattern_type, pattern))
+
+        self._build_failure_links()
+        self._typed = TypedPatternSet(typed_entries)
+
+    def _insert(self, pattern: str, pattern_id: int):
+        """将模式插入字典树，同一节点只保留优先级最高的模式"""
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(NO_MATCH)
+            state = next_state
+        if pattern_id < self._output[state]:
+            self._output[state] = pattern_id
+        self._terminals.setdefault(state, []).append(pattern_id)
+
+    def _build_failure_links(self):
+        """广度优先构建失败指针，并把后缀节点的最优输出合并到当前节点"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # 父节点先出队，失败目标深度更浅，其输出已经合并完毕
+                if self._output[self._fail[next_state]] < self._output[next_state]:
+                    self._output[next_state] = self._output[self._fail[next_state]]
+
+    def search(self, text: str, limit: int = NO_MATCH) -> int:
+        """扫描文本，返回编号小于 limit 的最小命中编号，没有时返回 limit"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        best = limit
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] < best:
+                best = output[state]
+                if best == 0:
+                    break
+        if best > self._typed.min_id:
+            best = self._typed.search(text, best)
+        return best
+
+    def search_all(self, text: str) -> Set[int]:
+        """扫描文本，返回所有命中的模式编号（包括被优先级更高的模式掩盖的）"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        terminals = self._terminals
+        state = 0
+        found = set()
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] == NO_MATCH:
+                continue  # 该节点及其后缀节点都不是模式结尾
+            node = state
+            while node:
+                if node in terminals:
+                    found.update(terminals[node])
+                node = fail[node]
+        if self._typed:
+            found.update(self._typed.search_all(text))
+        return found
+
+
+class CompiledMatcher:
+    """多模式匹配器 - 基于Aho-Corasick自动机
+
+    由合并后的规则列表一次性构建，对每个文件名只做一次线性扫描。
+    所有匹配关键字按 (规则顺序, 规则内顺序) 展平编号，编号越小优先级越高，
+    因此扫描结束时取到的最小编号即为原逐条 `in` 判断的第一个命中结果。
+    规则设置了规范化选项时，关键字在编译时规范化，每种选项组合构建一个 PatternGroup，
+    文件名对每种选项组合只规范化一次，各组取编号最小者。
+    """
+
+    def __init__(self, rules: List[Dict]):
+        # 展平后的模式表：pattern_id -> (规则索引, 匹配关键字的显示文本)
+        self.patterns: List[Tuple[int, str]] = []
+        entries_by_options: Dict[Tuple[str, ...], List[Tuple[int, str, str]]] = {}
+
+        for pattern_id, rule_index, match_rule, options, pattern_type, pattern in iter_pattern_entries(rules):
+            if pattern:
+                entries_by_options.setdefault(options, []).append((pattern_id, pattern_type, pattern))
+            self.patterns.append((rule_index, format_match_rule(match_rule)))
+
+        # 按组内最小编号排序，已命中更靠前的关键字时可以跳过后面的组
+        groups = [(options, PatternGroup(entries)) for options, entries in entries_by_options.items()]
+        self._groups = sorted(groups, key=lambda item: item[1].min_id)
+        # 模式编号 -> 规则索引，批量匹配时直接查表
+        self._rule_of_pattern = array('i', (rule_index for rule_index, _ in self.patterns))
+
+    def option_sets(self) -> List[Tuple[str, ...]]:
+        """规则中用到的规范化选项组合，空元组表示不规范化"""
+        return [options for options, _ in self._groups]
+
+    def _search(self, filename: str) -> int:
+        """依次在各组中查找，返回最小命中编号，未命中返回 NO_MATCH"""
+        best = NO_MATCH
+        for options, group in self._groups:
+            if group.min_id >= best:
+                break
+            best = group.search(normalize_text(filename, options) if options else filename, best)
+        return best
+
+    def match(self, filename: str) -> Optional[int]:
+        """扫描文件名，返回优先级最高的命中模式编号，未命中返回None"""
+        best = self._search(filename)
+        return None if best == NO_MATCH else best
+
+    def match_all(self, filename: str) -> List[int]:
+        """返回文件名命中的全部模式编号（升序），第一个即为 match 的结果"""
+        found = set()
+        for options, group in self._groups:
+            found.update(group.search_all(normalize_text(filename, options) if options else filename))
+        return sorted(found)
+
+    def match_many(self, names: Iterable[str]) -> Tuple[array, array]:
+        """批量匹配，返回 (规则索引数组, 模式编号数组)，未匹配的位置为-1"""
+        rule_of_pattern = self._rule_of_pattern
+        rule_indices = array('i')
+        pattern_ids = array('i')
+        if len(self._groups) == 1 and not self._groups[0][0]:
+            # 常见情况：所有规则都不规范化，直接在唯一的一组中查找
+            search = self._groups[0][1].search
+        else:
+            search = self._search
+        for name in names:
+            pattern_id = search(name)
+            if pattern_id == NO_MATCH:
+                rule_indices.append(UNMATCHED)
+                pattern_ids.append(UNMATCHED)
+            else:
+                rule_indices.append(rule_of_pattern[pattern_id])
+                pattern_ids.append(pattern_id)
+        return rule_indices, pattern_ids
+
+    def pattern_count(self) -> int:
+        """获取已编译的模式数量"""
+        return len(self.patterns)
+
+
+class MatchResult:
+    """批量匹配结果 - 列式存储
+
+    rule_indices[i] 为第i个文件名命中的规则索引，pattern_ids[i] 为命中的模式编号，
+    未匹配时均为-1。只有调用 match_info 时才生成单条结果字典。
+    """
+
+    def __init__(self, rule_indices: array, pattern_ids: array,
+                 rules: List[Dict], patterns: List[Tuple[int, str]]):
+        self.rule_indices = rule_indices
+        self.pattern_ids = pattern_ids
+        self.rules = rules
+        self.patterns = patterns
+
+    def __len__(self) -> int:
+        return len(self.rule_indices)
+
+    def matched_count(self) -> int:
+        """统计匹配成功的数量"""
+        return len(self.rule_indices) - self.rule_indices.count(UNMATCHED)
+
+    def match_info(self, position: int) -> Optional[Dict]:
+        """生成与 match_filename 相同格式的单条匹配信息，未匹配返回None"""
+        rule_index = self.rule_indices[position]
+        if rule_index == UNMATCHED:
+            return None
+        rule = self.rules[rule_index]
+        return {
+            'index': rule_index,
+            'code': rule.get('code', ''),
+            '30d': rule.get('30d', ''),
+            'matched_rule': self.patterns[self.pattern_ids[position]][1]
+        }
+
+
+class NameIndex:
+    """文件名子串索引 - 把所有文件名用分隔符拼接成一个字符串
+
+    查找包含某个关键字的文件时使用 str.find 在拼接串上跳跃搜索，
+    不需要逐个文件名做Python层面的判断。
+    """
+
+    # 文件名中不可能出现的分隔符
+    SEPARATOR = '\0'
+
+    def __init__(self, names: Iterable[str]):
+        names = list(names)
+        self._text = self.SEPARATOR.join(names)
+        self._starts = array('q')
+        position = 0
+        for name in names:
+            self._starts.append(position)
+            position += len(name) + 1
+        self._normalized: Dict[Tuple[str, ...], 'NameIndex'] = {}
+
+    def names(self) -> List[str]:
+        """按行顺序返回全部文件名"""
+        return self._text.split(self.SEPARATOR) if self._starts else []
+
+    def normalized(self, options: Tuple[str, ...]) -> 'NameIndex':
+        """按规范化选项转换后的文件名索引，每个文件名对每种选项组合只规范化一次"""
+        if not options:
+            return self
+        index = self._normalized.get(options)
+        if index is None:
+            index = NameIndex(normalize_text(name, options) for name in self.names())
+            self._normalized[options] = index
+        return index
+
+    def rows_containing(self, pattern: str) -> Iterable[int]:
+        """依次返回包含关键字的文件名所在行"""
+        if not pattern or self.SEPARATOR in pattern:
+            return
+        text = self._text
+        starts = self._starts
+        position = text.find(pattern)
+        while position >= 0:
+            row = bisect_right(starts, position) - 1
+            yield row
+            if row + 1 >= len(starts):
+                return
+            position = text.find(pattern, starts[row + 1])
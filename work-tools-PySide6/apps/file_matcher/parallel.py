@@ -0,0 +1,74 @@
+from array import array
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from match_stats import count_shadowed
+from matcher import CompiledMatcher
+
+# 工作进程内的匹配器，由进程池初始化函数接收一次，之后每个分片直接复用
+_worker_matcher: Optional[CompiledMatcher] = None
+
+
+def _init_worker(matcher: CompiledMatcher):
+    """进程池初始化：每个工作进程只接收一次已编译的自动机，反序列化比重新编译快得多"""
+    global _worker_matcher
+    _worker_matcher = matcher
+
+
+def _match_chunk(names: List[str]) -> Tuple[array, array]:
+    """在工作进程中匹配一个分片，返回紧凑的整数数组"""
+    return _worker_matcher.match_many(names)
+
+
+def _match_chunk_with_shadowed(names: List[str]) -> Tuple[array, array, tuple]:
+    """在工作进程中匹配一个分片，并统计被遮蔽的关键字"""
+    rule_indices, pattern_ids = _worker_matcher.match_many(names)
+    return rule_indices, pattern_ids, count_shadowed(_worker_matcher, names, pattern_ids)
+
+
+class ParallelMatcher:
+    """多进程匹配器 - 把文件名分片交给进程池匹配
+
+    编译好的自动机只在进程启动时传给每个工作进程一次，分片只传文件名，结果以 array 返回。
+    max_workers 为0时在当前进程内匹配，方便小批量使用和调试。
+    """
+
+    def __init__(self, matcher: CompiledMatcher, max_workers: Optional[int] = None):
+        self.matcher = matcher
+        self.max_workers = max_workers
+        self._executor = None
+
+    def __enter__(self):
+        if self.max_workers != 0:
+            # 进程池会加载 multiprocessing，只在真正需要多进程时导入
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.matcher,)
+            )
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def shutdown(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def submit(self, names: List[str], with_shadowed: bool = False) -> Future:
+        """提交一个分片，返回结果为 (规则索引数组, 模式编号数组) 的 Future
+
+        with_shadowed 为True时结果末尾再附加 count_shadowed 的统计。
+        """
+        if self._executor is None:
+            future = Future()
+            result = self.matcher.match_many(names)
+            if with_shadowed:
+                result += (count_shadowed(self.matcher, names, result[1]),)
+            future.set_result(result)
+            return future
+        return self._executor.submit(_match_chunk_with_shadowed if with_shadowed else _match_chunk, names)
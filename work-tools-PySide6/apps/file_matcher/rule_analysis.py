@@ -0,0 +1,138 @@
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+from matcher import PatternGroup, format_match_rule, iter_pattern_entries
+
+# 能确定“命中它的文件名一定包含整个关键字”的匹配类型；通配符和正则无法判断，不参与分析
+CONTAINABLE_TYPES = ("literal", "prefix", "suffix")
+
+# 包含关系的影响
+EFFECT_SHADOWED = "永远不会命中"
+EFFECT_SAME_RULE = "同一规则内重复"
+EFFECT_NONE = "无影响"
+
+# 规则永远不会胜出的原因
+REASON_NO_PATTERNS = "没有有效的关键字"
+REASON_ALL_SHADOWED = "所有关键字都被更靠前的规则遮蔽"
+
+
+class PatternOverlap(NamedTuple):
+    """一个关键字包含另一个关键字：命中 outer 的文件名一定也包含 inner"""
+    outer_id: int
+    inner_id: int
+    effect: str
+
+
+class RuleOverlapReport:
+    """规则重叠分析结果
+
+    patterns 与 CompiledMatcher.patterns 相同：模式编号 -> (规则索引, 关键字显示文本)。
+    """
+
+    def __init__(self, rules: List[Dict]):
+        self.rules = rules
+        self.patterns: List[Tuple[int, str]] = []
+        self.overlaps: List[PatternOverlap] = []
+        self.shadowed: Dict[int, int] = {}  # 永远不会命中的模式编号 -> 遮蔽它的最靠前的模式编号
+        self.duplicate_codes: Dict[str, List[int]] = {}  # code -> 使用该code的规则索引
+        self.never_win: List[Tuple[int, str]] = []  # (规则索引, 原因)
+
+    def code_of(self, rule_index: int) -> str:
+        return str(self.rules[rule_index].get('code', ''))
+
+    def describe_pattern(self, pattern_id: int) -> str:
+        rule_index, text = self.patterns[pattern_id]
+        return f"Code {self.code_of(rule_index)} 的关键字 {text!r}"
+
+    def has_issues(self) -> bool:
+        return bool(self.shadowed or self.duplicate_codes or self.never_win)
+
+    def report(self) -> str:
+        """生成文本格式的分析报告"""
+        lines = [f"共 {len(self.patterns)} 个关键字，发现 {len(self.overlaps)} 处包含关系"]
+        sections = [
+            ("重复的Code", [f"{code}: 第 {', '.join(str(index + 1) for index in indices)} 条规则"
+                            for code, indices in self.duplicate_codes.items()]),
+            ("永远不会胜出的规则", [f"第 {rule_index + 1} 条规则 Code {self.code_of(rule_index)}: {reason}"
+                                    for rule_index, reason in self.never_win]),
+            ("永远不会命中的关键字", [f"{self.describe_pattern(outer)} 被 {self.describe_pattern(inner)} 遮蔽"
+                                      for outer, inner in sorted(self.shadowed.items())]),
+        ]
+        for title, items in sections:
+            if items:
+                lines.append("")
+                lines.append(f"{title}（{len(items)}）:")
+                lines.extend(f"  {item}" for item in items)
+        return "\n".join(lines)
+
+
+def analyze_rules(rules: List[Dict]) -> RuleOverlapReport:
+    """分析合并后的规则列表中的重复Code、关键字包含关系和永远不会胜出的规则
+
+    每种规范化选项组合只用包含类型的关键字构建一个Aho-Corasick自动机，再把每个关键字本身
+    扫描一遍，就得到它包含的全部关键字，耗时与关键字总长度加包含关系的数量成正比，不需要两两比较。
+    开头/结尾类型的关键字另外按前缀/后缀查表，找出被更短的同类关键字包含的情况。
+    不同规范化选项的关键字之间不做比较。
+    """
+    report = RuleOverlapReport(rules)
+    entries_by_options = defaultdict(list)
+    for pattern_id, rule_index, match_rule, options, pattern_type, pattern in iter_pattern_entries(rules):
+        report.patterns.append((rule_index, format_match_rule(match_rule)))
+        if pattern and pattern_type in CONTAINABLE_TYPES:
+            entries_by_options[options].append((pattern_id, pattern_type, pattern))
+
+    for entries in entries_by_options.values():
+        _find_overlaps(report, entries)
+    report.overlaps.sort()
+
+    codes = defaultdict(list)
+    for rule_index, rule in enumerate(rules):
+        if not rule.get('deleted', False):
+            codes[str(rule.get('code', ''))].append(rule_index)
+    report.duplicate_codes = {code: indices for code, indices in codes.items() if len(indices) > 1}
+
+    pattern_ids_by_rule = defaultdict(list)
+    for pattern_id, (rule_index, _) in enumerate(report.patterns):
+        pattern_ids_by_rule[rule_index].append(pattern_id)
+    for rule_index, rule in enumerate(rules):
+        if rule.get('deleted', False):
+            continue
+        pattern_ids = pattern_ids_by_rule.get(rule_index)
+        if not pattern_ids:
+            report.never_win.append((rule_index, REASON_NO_PATTERNS))
+        elif all(pattern_id in report.shadowed for pattern_id in pattern_ids):
+            report.never_win.append((rule_index, REASON_ALL_SHADOWED))
+    return report
+
+
+def _find_overlaps(report: RuleOverlapReport, entries: List[Tuple[int, str, str]]):
+    """在一组规范化选项相同的关键字中查找包含关系"""
+    literal_group = PatternGroup(entry for entry in entries if entry[1] == 'literal')
+    affix_ids = {'prefix': defaultdict(list), 'suffix': defaultdict(list)}
+    for pattern_id, pattern_type, pattern in entries:
+        if pattern_type in affix_ids:
+            affix_ids[pattern_type][pattern].append(pattern_id)
+
+    for pattern_id, pattern_type, pattern in entries:
+        inner_ids: Set[int] = literal_group.search_all(pattern)
+        if pattern_type == 'prefix':
+            prefixes = affix_ids['prefix']
+            for end in range(1, len(pattern) + 1):
+                inner_ids.update(prefixes.get(pattern[:end], ()))
+        elif pattern_type == 'suffix':
+            suffixes = affix_ids['suffix']
+            for start in range(len(pattern)):
+                inner_ids.update(suffixes.get(pattern[start:], ()))
+        inner_ids.discard(pattern_id)
+
+        rule_index = report.patterns[pattern_id][0]
+        for inner_id in sorted(inner_ids):
+            inner_rule = report.patterns[inner_id][0]
+            if inner_rule == rule_index:
+                effect = EFFECT_SAME_RULE
+            elif inner_rule < rule_index:
+                effect = EFFECT_SHADOWED
+                report.shadowed.setdefault(pattern_id, inner_id)
+            else:
+                effect = EFFECT_NONE
+            report.overlaps.append(PatternOverlap(pattern_id, inner_id, effect))
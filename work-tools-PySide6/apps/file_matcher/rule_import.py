@@ -0,0 +1,244 @@
+import csv
+import os
+from collections import defaultdict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from matcher import NORMALIZE_OPTIONS, format_match_rule, parse_match_rule_text, validate_match_rule
+from rule_analysis import analyze_rules
+
+SUPPORTED_FORMATS = ("xlsx", "csv")
+
+# 表头别名（不区分大小写）；以 match_rule 或“匹配规则”开头的列都作为匹配规则列
+CODE_HEADERS = ("code", "编码")
+THIRTY_D_HEADERS = ("30d",)
+NORMALIZE_HEADERS = ("normalize", "匹配选项")
+MATCH_RULE_HEADER_PREFIXES = ("match_rule", "匹配规则")
+
+# 一个单元格中的多个关键字用 | 分隔，与规则表格的显示方式一致；regex: 开头的单元格整体作为一个正则
+MATCH_RULE_SEPARATOR = "|"
+
+
+class ImportIssue(NamedTuple):
+    """导入文件中某一行的问题"""
+    line: int
+    message: str
+
+
+class RuleImportPlan:
+    """规则导入计划 - 一次遍历完成校验，记录可导入的规则和冲突报告"""
+
+    def __init__(self):
+        self.rules: List[Dict] = []  # 可导入的规则，按文件中的顺序
+        self.errors: List[ImportIssue] = []  # 无法导入的行
+        self.duplicates: List[ImportIssue] = []  # 文件中重复的code，只保留最后一行
+        self.overrides: List[str] = []  # 将被替换的现有规则
+        self.kept: List[str] = []  # 与导入的规则同code、导入后仍然生效的现有规则
+        self.shadowed: List[ImportIssue] = []  # 被更靠前的规则遮蔽、永远不会命中的关键字
+
+    def has_conflicts(self) -> bool:
+        return bool(self.errors or self.duplicates or self.overrides or self.kept or self.shadowed)
+
+    def report(self) -> str:
+        """生成文本格式的冲突报告"""
+        lines = [f"可导入规则: {len(self.rules)} 条"]
+        sections = [
+            ("无法导入的行", [f"第 {issue.line} 行: {issue.message}" for issue in self.errors]),
+            ("重复的Code（使用最后一行）", [f"第 {issue.line} 行: {issue.message}" for issue in self.duplicates]),
+            ("将替换的现有规则", self.overrides),
+            ("同Code但不会被替换、仍然生效的现有规则", self.kept),
+            ("被遮蔽的关键字", [f"第 {issue.line} 行: {issue.message}" for issue in self.shadowed]),
+        ]
+        for title, items in sections:
+            if items:
+                lines.append("")
+                lines.append(f"{title}（{len(items)}）:")
+                lines.extend(f"  {item}" for item in items)
+        return "\n".join(lines)
+
+
+def import_format_for(file_path: str) -> str:
+    """根据文件扩展名确定导入格式，不支持的格式抛出 ValueError"""
+    extension = os.path.splitext(file_path)[1].lower().lstrip('.')
+    if extension not in SUPPORTED_FORMATS:
+        raise ValueError(f"不支持的导入格式: .{extension}，请选择 .xlsx 或 .csv")
+    return extension
+
+
+def iter_table_rows(file_path: str) -> Iterator[List[str]]:
+    """逐行读取 xlsx 或 csv 文件，单元格统一转换为字符串"""
+    if import_format_for(file_path) == "csv":
+        with open(file_path, newline='', encoding='utf_8_sig') as f:
+            yield from csv.reader(f)
+        return
+
+    # openpyxl 只在导入 xlsx 时才需要
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ["" if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def _find_columns(header: Sequence[str]) -> Tuple[Optional[int], Optional[int], Optional[int], List[int]]:
+    """在表头中查找 code、30d、规范化选项和匹配规则列"""
+    code_column = thirty_d_column = normalize_column = None
+    match_rule_columns = []
+    for column, title in enumerate(header):
+        title = title.strip().lower()
+        if title in CODE_HEADERS and code_column is None:
+            code_column = column
+        elif title in THIRTY_D_HEADERS and thirty_d_column is None:
+            thirty_d_column = column
+        elif title in NORMALIZE_HEADERS and normalize_column is None:
+            normalize_column = column
+        elif title.startswith(MATCH_RULE_HEADER_PREFIXES):
+            match_rule_columns.append(column)
+    return code_column, thirty_d_column, normalize_column, match_rule_columns
+
+
+def _split_match_rules(cell: str) -> List:
+    """把一个单元格拆分为匹配规则"""
+    cell = cell.strip()
+    if not cell:
+        return []
+    if cell.startswith("regex:"):
+        return [parse_match_rule_text(cell)]
+    return [parse_match_rule_text(part.strip()) for part in cell.split(MATCH_RULE_SEPARATOR) if part.strip()]
+
+
+def _parse_row(cells: Sequence[str], columns) -> Tuple[Optional[Dict], Optional[str]]:
+    """解析一行，返回 (规则, 错误信息)"""
+    code_column, thirty_d_column, normalize_column, match_rule_columns = columns
+
+    def cell(column: Optional[int]) -> str:
+        return cells[column].strip() if column is not None and column < len(cells) else ""
+
+    code = cell(code_column)
+    if not code:
+        return None, "缺少Code"
+    thirty_d = cell(thirty_d_column).upper() or "N"
+    if thirty_d not in ("Y", "N"):
+        return None, f"30d 应为 Y 或 N: {thirty_d}"
+
+    match_rules = []
+    for column in match_rule_columns:
+        match_rules.extend(_split_match_rules(cell(column)))
+    if not match_rules:
+        return None, "缺少匹配规则"
+    for match_rule in match_rules:
+        error = validate_match_rule(match_rule)
+        if error:
+            return None, error
+
+    rule = {'code': code, '30d': thirty_d, 'match_rules': match_rules}
+    normalize = [option.strip().lower() for option in cell(normalize_column).replace("，", ",").split(",")
+                 if option.strip()]
+    if normalize:
+        unknown = [option for option in normalize if option not in NORMALIZE_OPTIONS]
+        if unknown:
+            return None, f"未知的匹配选项: {', '.join(unknown)}"
+        rule['normalize'] = [option for option in NORMALIZE_OPTIONS if option in normalize]
+    return rule, None
+
+
+def plan_import(rows: Iterator[List[str]], existing_rules: List[Dict]) -> RuleImportPlan:
+    """校验导入数据并生成导入计划，第一行为表头
+
+    existing_rules 为当前合并后的规则列表，用于找出将被替换的规则和被遮蔽的关键字。
+    """
+    plan = RuleImportPlan()
+    header = next(rows, None)
+    if header is None:
+        plan.errors.append(ImportIssue(1, "文件为空"))
+        return plan
+    columns = _find_columns(header)
+    if columns[0] is None or not columns[3]:
+        plan.errors.append(ImportIssue(1, "表头中缺少 Code 或 匹配规则 列"))
+        return plan
+
+    rules_by_code: Dict[str, Tuple[int, Dict]] = {}
+    lines_by_code = defaultdict(list)
+    for line, cells in enumerate(rows, start=2):
+        if not any(cell.strip() for cell in cells):
+            continue
+        rule, error = _parse_row(cells, columns)
+        if error:
+            plan.errors.append(ImportIssue(line, error))
+            continue
+        code = rule['code']
+        lines_by_code[code].append(line)
+        # 同一code只保留最后一行，位置按第一次出现的位置
+        rules_by_code[code] = (rules_by_code[code][0] if code in rules_by_code else line, rule)
+
+    for code, lines in lines_by_code.items():
+        if len(lines) > 1:
+            plan.duplicates.append(ImportIssue(lines[-1], f"Code {code} 在第 {'、'.join(map(str, lines))} 行重复"))
+
+    imported = sorted(rules_by_code.values(), key=lambda item: item[0])
+    plan.rules = [rule for _, rule in imported]
+    replaced = _replaced_rules(existing_rules, rules_by_code)
+    for rule_index, rule in enumerate(existing_rules):
+        code = rule.get('code', '')
+        if code not in rules_by_code:
+            continue
+        description = f"Code {code} 第 {rule_index + 1} 条规则（{_describe_match_rules(rule)}）"
+        if replaced[code] == rule_index:
+            plan.overrides.append(description)
+        else:
+            plan.kept.append(description)
+    plan.shadowed = _find_shadowed(existing_rules, set(replaced.values()), imported, lines_by_code)
+    return plan
+
+
+def _describe_match_rules(rule: Dict) -> str:
+    return " | ".join(map(format_match_rule, rule.get('match_rules', [])))
+
+
+def _replaced_rules(existing_rules: List[Dict], codes) -> Dict[str, int]:
+    """导入的每个code将替换的现有规则的索引
+
+    与规则合并一致：已有同code的用户规则时替换第一条用户规则，否则覆盖第一条同code的默认规则；
+    同code的其他规则不受影响。
+    """
+    replaced = {}
+    for rule_index, rule in enumerate(existing_rules):
+        code = rule.get('code', '')
+        if code not in codes:
+            continue
+        if code not in replaced or (rule.get('source') == 'user'
+                                    and existing_rules[replaced[code]].get('source') != 'user'):
+            replaced[code] = rule_index
+    return replaced
+
+
+def _find_shadowed(existing_rules: List[Dict], replaced: Set[int], imported: List[Tuple[int, Dict]],
+                   lines_by_code: Dict[str, List[int]]) -> List[ImportIssue]:
+    """找出导入后永远不会命中的关键字
+
+    导入的规则排在未被替换的现有规则之后。关键字包含更靠前规则的关键字时，
+    任何命中它的文件名都会先被那条规则匹配。
+    """
+    final_rules = [rule for rule_index, rule in enumerate(existing_rules) if rule_index not in replaced]
+    first_imported = len(final_rules)
+    final_rules.extend(rule for _, rule in imported)
+    analysis = analyze_rules(final_rules)
+
+    shadowed = []
+    for pattern_id, inner_id in sorted(analysis.shadowed.items()):
+        rule_index, text = analysis.patterns[pattern_id]
+        if rule_index < first_imported:
+            continue
+        code = final_rules[rule_index]['code']
+        shadowed.append(ImportIssue(
+            lines_by_code[code][-1],
+            f"{analysis.describe_pattern(pattern_id)} 被 {analysis.describe_pattern(inner_id)} 遮蔽"
+        ))
+    return shadowed
+
+
+def load_import_plan(file_path: str, existing_rules: List[Dict]) -> RuleImportPlan:
+    """读取导入文件并生成导入计划，读取失败时抛出 OSError 或 ValueError"""
+    return plan_import(iter_table_rows(file_path), existing_rules)
@@ -1,6 +1,175 @@
+import hashlib
 import json
 import os
-from typing import List, Dict
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from config_journal import ConfigJournal
+from match_stats import MatchStats
+from matcher import (NO_MATCH, NORMALIZE_OPTIONS, UNMATCHED, CompiledMatcher,
+                     MatchResult, NameIndex, TypedPatternSet, make_match_rule,
+                     normalize_options, normalize_pattern, parse_match_rule,
+                     validate_match_rule)
+
+
+class RuleSet:
+    """规则集快照 - 合并后的规则、编译后的匹配器和内容哈希
+
+    快照创建后不再修改，规则变化时由RuleManager生成新的快照。
+    """
+    
+    def __init__(self, rules: List[Dict], version: int, keys: Optional[List[str]] = None):
+        self.rules = rules
+        self.keys = keys if keys is not None else [rule.get('code', '') for rule in rules]
+        self.version = version
+        self._matcher = None
+        self._content_hash = None
+    
+    @property
+    def matcher(self) -> CompiledMatcher:
+        """编译后的多模式匹配器，首次使用时构建"""
+        if self._matcher is None:
+            self._matcher = CompiledMatcher(self.rules)
+        return self._matcher
+    
+    @property
+    def content_hash(self) -> str:
+        """合并规则内容的哈希，规则内容相同则哈希相同"""
+        if self._content_hash is None:
+            content = json.dumps(self.rules, ensure_ascii=False, sort_keys=True)
+            self._content_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        return self._content_hash
+    
+    def diff(self, previous: 'RuleSet') -> 'RuleDiff':
+        """计算相对于旧规则集的变化"""
+        return RuleDiff(previous, self)
+
+
+def _rule_match_fields(rule: Dict) -> tuple:
+    """影响匹配结果的规则字段，来源(source)不同但内容相同视为未变化"""
+    return (rule.get('code', ''), rule.get('30d', ''),
+            rule.get('match_rules', []), rule.get('normalize', []), rule.get('deleted', False))
+
+
+def _same_rule(previous: Dict, current: Dict) -> bool:
+    """规则在两个规则集中是否未变化：合并时复用了同一对象则无需比较字段"""
+    return previous is current or _rule_match_fields(previous) == _rule_match_fields(current)
+
+
+class RuleDiff:
+    """两个规则集之间的变化 - 按规则键对比新增、修改和删除的规则
+
+    index_map[旧规则索引] 为未变化规则在新规则集中的索引，已修改或删除的规则为-1。
+    """
+    
+    def __init__(self, previous: RuleSet, current: RuleSet):
+        self.current = current
+        self.added: List[int] = []  # 新规则集中新增规则的索引
+        self.changed: List[int] = []  # 新规则集中内容变化规则的索引
+        self.deleted_keys: List[str] = []
+        self.index_map = array('i', [UNMATCHED] * len(previous.rules))
+        
+        previous_by_key = {key: index for index, key in enumerate(previous.keys)}
+        for index, key in enumerate(current.keys):
+            previous_index = previous_by_key.pop(key, None)
+            if previous_index is None:
+                self.added.append(index)
+            elif _same_rule(previous.rules[previous_index], current.rules[index]):
+                self.index_map[previous_index] = index
+            else:
+                self.changed.append(index)
+        self.deleted_keys = list(previous_by_key)
+        self._demote_reordered_rules()
+    
+    def _demote_reordered_rules(self):
+        """内容未变但相对顺序改变的规则（如默认规则被同内容的用户规则覆盖后移到末尾）
+        优先级已经变化，按修改处理。保留最长递增子序列中的规则，其余视为修改。
+        """
+        kept = [(old, new) for old, new in enumerate(self.index_map) if new != UNMATCHED]
+        tail_values = []  # tail_values[k] 为长度k+1的递增子序列的最小结尾值
+        tails = []  # 对应结尾在 kept 中的位置
+        previous_link = [-1] * len(kept)
+        for position, (_, new) in enumerate(kept):
+            k = bisect_left(tail_values, new)
+            if k > 0:
+                previous_link[position] = tails[k - 1]
+            if k == len(tails):
+                tail_values.append(new)
+                tails.append(position)
+            else:
+                tail_values[k] = new
+                tails[k] = position
+        
+        in_sequence = set()
+        position = tails[-1] if tails else -1
+        while position >= 0:
+            in_sequence.add(position)
+            position = previous_link[position]
+        
+        for position, (old, new) in enumerate(kept):
+            if position not in in_sequence:
+                self.index_map[old] = UNMATCHED
+                self.changed.append(new)
+    
+    def is_empty(self) -> bool:
+        """规则没有任何变化（索引位置也未变化）"""
+        return (not self.added and not self.changed and not self.deleted_keys
+                and all(new == old for old, new in enumerate(self.index_map)))
+    
+    def remap(self, rule_index: int) -> int:
+        """把旧规则索引换算为新索引，规则已修改或删除时返回-1"""
+        if rule_index == UNMATCHED:
+            return UNMATCHED
+        return self.index_map[rule_index]
+    
+    def affected_rows(self, rule_indices: Sequence[int], name_index: NameIndex) -> Set[int]:
+        """找出需要重新匹配的行
+        
+        rule_indices 为每行在旧规则集中的命中规则索引（未匹配为-1），包括：
+        命中的规则被修改或删除的行；以及包含新增/修改规则的关键字、
+        且当前未匹配或命中规则优先级更低的行。
+        """
+        affected = {row for row, rule_index in enumerate(rule_indices)
+                    if rule_index != UNMATCHED and self.index_map[rule_index] == UNMATCHED}
+        
+        typed_entries = defaultdict(list)  # 规范化选项 -> 非包含类型的关键字
+        for rule_index in sorted(self.added + self.changed):
+            rule = self.current.rules[rule_index]
+            if rule.get('deleted', False):
+                continue
+            options = normalize_options(rule)
+            for match_rule in rule.get('match_rules', []):
+                pattern_type, pattern = parse_match_rule(match_rule)
+                pattern = normalize_pattern(pattern_type, pattern, options)
+                if not pattern:
+                    continue
+                if pattern_type != 'literal':
+                    # 以规则索引作为编号，合并后一次扫描得到每个文件名命中的最靠前的规则
+                    typed_entries[options].append((rule_index, pattern_type, pattern))
+                    continue
+                for row in name_index.normalized(options).rows_containing(pattern):
+                    if row in affected:
+                        continue
+                    current_index = self.remap(rule_indices[row])
+                    if current_index == UNMATCHED or current_index > rule_index:
+                        affected.add(row)
+        
+        for options, entries in typed_entries.items():
+            typed_patterns = TypedPatternSet(entries)
+            if not typed_patterns:
+                continue
+            for row, name in enumerate(name_index.normalized(options).names()):
+                if row in affected:
+                    continue
+                current_index = self.remap(rule_indices[row])
+                limit = NO_MATCH if current_index == UNMATCHED else current_index
+                if typed_patterns.search(name, limit) < limit:
+                    affected.add(row)
+        return affected
 
 
 class RuleManager:
@@ -21,14 +190,36 @@ class RuleManager:
             
         self.config = {}  # 存储完整配置
         self.rules = []  # 存储合并后的规则列表
+        self.rule_keys = []  # 与 rules 一一对应的规则键
+        self._version = 0  # 规则版本号，每次合并规则后递增
+        self._rule_set = None  # 当前版本的规则集快照，按需构建
+        self.journal = ConfigJournal(self.config_path)  # 配置快照和修改日志
+        self.load_error = None  # 配置文件损坏时的提示信息
+        self._batch_depth = 0
+        self._pending_ops = []  # 批量修改期间尚未写入日志的操作
+        self._rules_dirty = False  # 配置已修改但尚未重新合并规则
+        self._merged_cache = {}  # id(配置中的规则) -> (规则, 来源, 合并后的规则)
+        self._user_rule_index = None  # code -> 用户规则（不含删除标记）在列表中的位置，按需构建
+        self.match_stats = MatchStats()  # 本次运行中的匹配统计，用于发现从未命中的规则
         self.load_config()
     
     def load_config(self):
-        """加载配置文件"""
+        """加载配置文件：读取快照并回放修改日志"""
+        self.load_error = None
+        self._user_rule_index = None
         try:
-            if os.path.exists(self.config_path):
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
+            content, ops = self.journal.load()
+            if content is not None:
+                try:
+                    self.config = json.loads(content.decode('utf-8'))
+                except ValueError:
+                    # 配置文件损坏时先备份，不直接用空配置覆盖
+                    backup_path = self.journal.backup_corrupt(content)
+                    self.load_error = (f"配置文件无法解析，已备份到: {backup_path}\n"
+                                       f"修复或删除配置文件并重新打开前，对规则和设置的修改不会保存")
+                    raise
+                for op in ops:
+                    self._apply_op(op)
             else:
                 # 创建默认配置
                 self.config = {
@@ -53,13 +244,48 @@ class RuleManager:
             self.merge_rules()
             
         except Exception as e:
-            # 静默处理加载失败，使用空配置
+            # 加载失败时使用空配置，损坏的文件已在上面备份
+            if self.load_error is None:
+                self.load_error = (f"加载配置文件失败: {e}\n"
+                                   f"修复配置文件并重新打开前，对规则和设置的修改不会保存")
             self.config = {
                 "version": "1.0",
                 "settings": {},
                 "rules": {"default": [], "user": []}
             }
             self.rules = []
+            self.rule_keys = []
+            self._user_rule_index = None
+            self._bump_version()
+    
+    def reload_if_changed(self) -> bool:
+        """配置文件或修改日志发生变化时重新加载，返回是否重新加载
+        
+        先比较 mtime/size，签名变化后再比较内容哈希，内容未变则不重新解析。
+        批量修改期间不重新加载，避免丢弃尚未写入的修改。
+        """
+        if self._batch_depth or not os.path.exists(self.config_path):
+            return False
+        try:
+            if not self.journal.has_changed():
+                return False
+        except OSError:
+            return False
+        
+        self.load_config()
+        return True
+    
+    def _bump_version(self):
+        """规则变化后递增版本号，并丢弃旧的规则集快照"""
+        self._version += 1
+        self._rule_set = None
+    
+    def get_rule_set(self) -> RuleSet:
+        """获取当前规则集快照，规则未变化时重复使用同一快照"""
+        self._ensure_merged()
+        if self._rule_set is None:
+            self._rule_set = RuleSet(self.rules, self._version, self.rule_keys)
+        return self._rule_set
     
     def merge_rules(self):
         """合并默认规则和用户规则"""
@@ -69,32 +295,77 @@ class RuleManager:
             
             # 合并规则：用户规则按code覆盖默认规则
             merged_rules = {}
+            keys_by_code = defaultdict(deque)  # code -> 按合并顺序排列的规则键
+            merged_cache = {}
+            
+            def add(rule, source):
+                key = self._generate_rule_key(rule, merged_rules)
+                merged_rules[key] = self._merged_rule(rule, source, merged_cache)
+                keys_by_code[rule.get('code', '')].append(key)
+            
+            def remove_first(code):
+                keys = keys_by_code.get(code)
+                if keys:
+                    del merged_rules[keys.popleft()]
+            
+            def remove_deleted(marker):
+                # 删除标记记录了被删除的默认规则的匹配规则，同code有多条默认规则时只移除这一条；
+                # 旧版本的删除标记只有code，仍移除第一条同code的规则
+                code = marker.get('code', '')
+                match_rules = marker.get('match_rules', [])
+                if not match_rules:
+                    remove_first(code)
+                    return
+                keys = keys_by_code.get(code, ())
+                for key in keys:
+                    rule = merged_rules[key]
+                    if rule.get('source') == 'default' and rule.get('match_rules', []) == match_rules:
+                        keys.remove(key)
+                        del merged_rules[key]
+                        return
             
             # 先添加默认规则
             for rule in default_rules:
                 if self._is_valid_rule(rule):
-                    key = self._generate_rule_key(rule, merged_rules)
-                    merged_rules[key] = {**rule, 'source': 'default'}
+                    add(rule, 'default')
             
-            # 再添加用户规则，按code覆盖
+            # 再添加用户规则，按code覆盖；删除标记只移除它指向的默认规则
             for rule in user_rules:
-                if self._is_valid_rule(rule):
-                    code = rule.get('code', '')
-                    # 查找是否有相同code的默认规则需要覆盖
-                    for key in list(merged_rules.keys()):
-                        if merged_rules[key].get('code') == code:
-                            del merged_rules[key]
-                            break
-                    
-                    # 添加用户规则
-                    key = self._generate_rule_key(rule, merged_rules)
-                    merged_rules[key] = {**rule, 'source': 'user'}
+                if rule.get('deleted', False):
+                    remove_deleted(rule)
+                elif self._is_valid_rule(rule):
+                    remove_first(rule.get('code', ''))
+                    add(rule, 'user')
             
             # 转换为列表
             self.rules = list(merged_rules.values())
+            self.rule_keys = list(merged_rules.keys())
+            self._merged_cache = merged_cache
             
         except Exception:
             self.rules = []
+            self.rule_keys = []
+            self._merged_cache = {}
+        
+        # 规则已变化，丢弃旧的快照和编译结果
+        self._rules_dirty = False
+        self._bump_version()
+    
+    def _merged_rule(self, rule: Dict, source: str, merged_cache: Dict) -> Dict:
+        """生成带来源的合并规则；配置中的规则对象未变化时复用上次合并的结果，
+        使相邻两次合并结果中未修改的规则是同一个对象，规则集对比时可以直接按对象判断"""
+        cached = self._merged_cache.get(id(rule))
+        if cached is not None and cached[0] is rule and cached[1] == source:
+            merged = cached[2]
+        else:
+            merged = {**rule, 'source': source}
+        merged_cache[id(rule)] = (rule, source, merged)
+        return merged
+    
+    def _ensure_merged(self):
+        """批量修改期间按需重新合并规则，保证按索引访问的规则是最新的"""
+        if self._rules_dirty:
+            self.merge_rules()
     
     def _is_valid_rule(self, rule: Dict) -> bool:
         """检查规则是否有效"""
@@ -102,6 +373,22 @@ class RuleManager:
                 rule.get('match_rules') and 
                 len(rule.get('match_rules', [])) > 0)
     
+    def _is_valid_edit(self, rule: Dict) -> bool:
+        """检查新增或修改的规则，同时检查每个关键字（如正则表达式能否编译）和规范化选项"""
+        return bool(self._is_valid_rule(rule) and
+                    all(validate_match_rule(match_rule) is None for match_rule in rule['match_rules']) and
+                    all(option in NORMALIZE_OPTIONS for option in rule.get('normalize', [])))
+    
+    @staticmethod
+    def _clean_match_rules(match_rules: List) -> List:
+        """去掉关键字首尾空白并丢弃空关键字"""
+        cleaned = []
+        for match_rule in match_rules:
+            pattern_type, pattern = parse_match_rule(match_rule)
+            if pattern.strip():
+                cleaned.append(make_match_rule(pattern_type, pattern.strip()))
+        return cleaned
+    
     def _generate_rule_key(self, rule: Dict, existing_rules: Dict) -> str:
         """生成规则的唯一键"""
         code = rule.get('code', '')
@@ -113,61 +400,177 @@ class RuleManager:
         return key
     
     def save_config(self):
-        """保存配置到文件"""
+        """把完整配置原子地写为新的快照，并清空修改日志"""
         try:
-            # 确保目录存在
-            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
-            
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, ensure_ascii=False, indent=2)
-            
+            content = json.dumps(self.config, ensure_ascii=False, indent=2).encode('utf-8')
+            self.journal.write_snapshot(content)
             return True
         except Exception:
             return False
     
+    def _user_rules(self) -> List[Dict]:
+        """获取配置中的用户规则列表，不存在时创建"""
+        if 'rules' not in self.config:
+            self.config['rules'] = {'default': [], 'user': []}
+        if 'user' not in self.config['rules']:
+            self.config['rules']['user'] = []
+        return self.config['rules']['user']
+    
+    def _apply_op(self, op: Dict):
+        """把一条修改操作应用到内存中的配置，修改规则和回放日志共用"""
+        kind = op.get('op')
+        if kind == 'set_setting':
+            if 'settings' not in self.config:
+                self.config['settings'] = {}
+            self.config['settings'][op['key']] = op['value']
+            return
+        
+        user_rules = self._user_rules()
+        if kind == 'append_rule':
+            self._append_user_rule(op['rule'])
+        elif kind in ('replace_rule', 'upsert_rule'):
+            # 替换第一条同code的用户规则，upsert 找不到时追加
+            position = self._find_user_rule(op['code'])
+            if position >= 0:
+                self._replace_user_rule(position, op['rule'])
+            elif kind == 'upsert_rule':
+                self._append_user_rule(op['rule'])
+        elif kind == 'remove_rules':
+            # 保留删除标记，否则被删除的默认规则会重新出现
+            self.config['rules']['user'] = [rule for rule in user_rules
+                                            if rule.get('code') != op['code'] or rule.get('deleted', False)]
+            self._user_rule_index = None
+        elif kind == 'clear_rules':
+            self.config['rules']['user'] = []
+            self._user_rule_index = None
+    
+    def _find_user_rule(self, code: str) -> int:
+        """查找第一条同code的用户规则（不含删除标记）的位置，不存在返回-1"""
+        if self._user_rule_index is None:
+            index = {}
+            for position, rule in enumerate(self._user_rules()):
+                if not rule.get('deleted', False):
+                    index.setdefault(rule.get('code'), []).append(position)
+            self._user_rule_index = index
+        positions = self._user_rule_index.get(code)
+        return positions[0] if positions else -1
+    
+    def _append_user_rule(self, rule: Dict):
+        user_rules = self._user_rules()
+        user_rules.append(rule)
+        if self._user_rule_index is not None and not rule.get('deleted', False):
+            self._user_rule_index.setdefault(rule.get('code'), []).append(len(user_rules) - 1)
+    
+    def _replace_user_rule(self, position: int, rule: Dict):
+        user_rules = self._user_rules()
+        old_code = user_rules[position].get('code')
+        user_rules[position] = rule
+        # 修改后的规则可能换了code，同步更新索引
+        positions = self._user_rule_index[old_code]
+        positions.remove(position)
+        if not positions:
+            del self._user_rule_index[old_code]
+        insort(self._user_rule_index.setdefault(rule.get('code'), []), position)
+    
+    def _commit(self, *ops: Dict) -> bool:
+        """应用修改并写入日志，返回是否保存成功；批量修改期间只记录，结束时统一写入"""
+        if self.load_error:
+            # 日志只能回放到原来的快照上，损坏的快照无法读取，修改会在下次加载时丢失
+            return False
+        for op in ops:
+            self._apply_op(op)
+        rules_changed = any(op['op'] != 'set_setting' for op in ops)
+        if self._batch_depth:
+            self._pending_ops.extend(ops)
+            self._rules_dirty = self._rules_dirty or rules_changed
+            return True
+        if rules_changed:
+            self.merge_rules()
+        return self._write_ops(list(ops))
+    
+    def _write_ops(self, ops: List[Dict]) -> bool:
+        """把已应用的操作写入磁盘：日志过长时写新快照，否则追加到日志"""
+        try:
+            if self.journal.has_changed():
+                # 其他实例修改过配置：在磁盘上的最新内容之后追加，再重新加载合并后的结果
+                self.journal.load()
+                self.journal.append(ops)
+                self.load_config()
+                return True
+            if self.journal.needs_compaction(len(ops)):
+                return self.save_config()
+            self.journal.append(ops)
+            return True
+        except Exception:
+            return False
+    
+    @contextmanager
+    def batch(self):
+        """批量修改规则：期间的修改只在内存中生效，结束时合并一次规则并一次性写入
+        
+        with rule_manager.batch():
+            for ...:
+                rule_manager.add_rule(...)
+        
+        写入失败时在退出时抛出 OSError。
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            saved = self._batch_depth > 0 or self._flush_batch()
+        if not saved:
+            raise OSError(f"保存配置失败: {self.config_path}")
+    
+    def _flush_batch(self) -> bool:
+        ops, self._pending_ops = self._pending_ops, []
+        if self.load_error:
+            return False
+        self._ensure_merged()
+        return self._write_ops(ops) if ops else True
+    
     def get_all_rules(self) -> List[Dict]:
         """获取所有规则"""
+        self._ensure_merged()
         # 返回规则副本，去除source字段
         return [{k: v for k, v in rule.items() if k != 'source'} for rule in self.rules]
     
-    def add_rule(self, code: str, thirty_d: str, match_rules: List[str]) -> bool:
-        """添加新规则"""
+    def add_rule(self, code: str, thirty_d: str, match_rules: List,
+                 normalize: Optional[List[str]] = None) -> bool:
+        """添加新规则，normalize 为规范化选项（见 NORMALIZE_OPTIONS）"""
         try:
             new_rule = {
                 'code': code.strip(),
                 '30d': thirty_d.strip(),
-                'match_rules': [rule.strip() for rule in match_rules if rule.strip()]
+                'match_rules': self._clean_match_rules(match_rules)
             }
+            if normalize:
+                new_rule['normalize'] = list(normalize)
             
-            if not self._is_valid_rule(new_rule):
+            if not self._is_valid_edit(new_rule):
                 return False
             
             # 添加到用户规则
-            if 'rules' not in self.config:
-                self.config['rules'] = {'default': [], 'user': []}
-            if 'user' not in self.config['rules']:
-                self.config['rules']['user'] = []
-            
-            self.config['rules']['user'].append(new_rule)
-            
-            # 重新合并规则
-            self.merge_rules()
-            
-            return self.save_config()
+            return self._commit({'op': 'append_rule', 'rule': new_rule})
         except Exception:
             return False
     
-    def update_rule(self, index: int, code: str, thirty_d: str, match_rules: List[str]) -> bool:
+    def update_rule(self, index: int, code: str, thirty_d: str, match_rules: List,
+                    normalize: Optional[List[str]] = None) -> bool:
         """更新指定索引的规则"""
         try:
+            self._ensure_merged()
             if 0 <= index < len(self.rules):
                 updated_rule = {
                     'code': code.strip(),
                     '30d': thirty_d.strip(),
-                    'match_rules': [rule.strip() for rule in match_rules if rule.strip()]
+                    'match_rules': self._clean_match_rules(match_rules)
                 }
+                if normalize:
+                    updated_rule['normalize'] = list(normalize)
                 
-                if not self._is_valid_rule(updated_rule):
+                if not self._is_valid_edit(updated_rule):
                     return False
                 
                 # 获取当前规则的来源
@@ -176,35 +579,12 @@ class RuleManager:
                 rule_code = current_rule.get('code', '')
                 
                 if rule_source == 'default':
-                    # 如果是默认规则，则将更新的规则添加到用户规则中
-                    if 'rules' not in self.config:
-                        self.config['rules'] = {'default': [], 'user': []}
-                    if 'user' not in self.config['rules']:
-                        self.config['rules']['user'] = []
-                    
-                    # 检查用户规则中是否已存在同code的规则
-                    user_rules = self.config['rules']['user']
-                    found = False
-                    for i, rule in enumerate(user_rules):
-                        if rule.get('code') == rule_code:
-                            user_rules[i] = updated_rule
-                            found = True
-                            break
-                    
-                    if not found:
-                        user_rules.append(updated_rule)
+                    # 如果是默认规则，则将更新的规则添加到用户规则中（已有同code的用户规则时替换）
+                    op = 'upsert_rule'
                 else:
                     # 如果是用户规则，直接更新
-                    user_rules = self.config['rules']['user']
-                    for i, rule in enumerate(user_rules):
-                        if rule.get('code') == rule_code:
-                            user_rules[i] = updated_rule
-                            break
-                
-                # 重新合并规则
-                self.merge_rules()
-                
-                return self.save_config()
+                    op = 'replace_rule'
+                return self._commit({'op': op, 'code': rule_code, 'rule': updated_rule})
             return False
         except Exception:
             return False
@@ -212,81 +592,96 @@ class RuleManager:
     def delete_rule(self, index: int) -> bool:
         """删除指定索引的规则"""
         try:
+            self._ensure_merged()
             if 0 <= index < len(self.rules):
                 current_rule = self.rules[index]
                 rule_source = current_rule.get('source', 'user')
                 rule_code = current_rule.get('code', '')
                 
                 if rule_source == 'default':
-                    # 如果是默认规则，添加一个空的用户规则来覆盖它
-                    if 'rules' not in self.config:
-                        self.config['rules'] = {'default': [], 'user': []}
-                    if 'user' not in self.config['rules']:
-                        self.config['rules']['user'] = []
-                    
-                    # 添加一个标记为删除的规则
+                    # 如果是默认规则，添加一个标记为删除的用户规则来覆盖它，
+                    # 记录匹配规则以区分同code的多条默认规则
                     deleted_rule = {
                         'code': rule_code,
                         '30d': '',
-                        'match_rules': [],
+                        'match_rules': list(current_rule.get('match_rules', [])),
                         'deleted': True
                     }
-                    self.config['rules']['user'].append(deleted_rule)
-                else:
-                    # 如果是用户规则，直接删除
-                    user_rules = self.config['rules']['user']
-                    self.config['rules']['user'] = [
-                        rule for rule in user_rules 
-                        if rule.get('code') != rule_code
-                    ]
-                
-                # 重新合并规则
-                self.merge_rules()
-                
-                return self.save_config()
+                    return self._commit({'op': 'append_rule', 'rule': deleted_rule})
+                # 如果是用户规则，直接删除
+                return self._commit({'op': 'remove_rules', 'code': rule_code})
+            return False
+        except Exception:
             return False
+    
+    def import_rules(self, rules: List[Dict]) -> bool:
+        """批量导入已校验的规则：替换同code的用户规则、覆盖同code的默认规则，其余追加
+        
+        所有修改只合并一次规则，并作为一次写入保存。
+        """
+        try:
+            with self.batch():
+                for rule in rules:
+                    self._commit({'op': 'upsert_rule', 'code': rule['code'], 'rule': rule})
+            return True
         except Exception:
             return False
     
+    def get_matcher(self) -> CompiledMatcher:
+        """获取编译后的多模式匹配器，规则变化后首次调用时重新构建"""
+        return self.get_rule_set().matcher
+    
     def match_filename(self, filename: str) -> tuple:
         """
         匹配文件名，返回 (是否匹配, 匹配的规则信息)
+        按规则顺序取第一个命中的规则，与逐条检查的结果一致
         """
-        for index, rule in enumerate(self.rules):
-            # 跳过被删除的规则
-            if rule.get('deleted', False):
-                continue
-                
-            match_rules = rule.get('match_rules', [])
-            
-            for match_rule in match_rules:
-                if match_rule and match_rule in filename:
-                    return True, {
-                        'index': index,
-                        'code': rule.get('code', ''),
-                        '30d': rule.get('30d', ''),
-                        'matched_rule': match_rule
-                    }
+        rule_set = self.get_rule_set()
+        pattern_id = rule_set.matcher.match(filename)
+        if pattern_id is None:
+            return False, None
         
-        return False, None
+        index, match_rule = rule_set.matcher.patterns[pattern_id]
+        rule = rule_set.rules[index]
+        return True, {
+            'index': index,
+            'code': rule.get('code', ''),
+            '30d': rule.get('30d', ''),
+            'matched_rule': match_rule
+        }
+    
+    def diff_since(self, previous: RuleSet) -> RuleDiff:
+        """报告自某个规则集快照以来新增、修改和删除的规则"""
+        return self.get_rule_set().diff(previous)
+    
+    def match_many(self, names: Iterable[str]) -> MatchResult:
+        """批量匹配文件名，返回列式的匹配结果，命中次数和耗时计入匹配统计"""
+        rule_set = self.get_rule_set()
+        matcher = rule_set.matcher
+        started = time.perf_counter()
+        rule_indices, pattern_ids = matcher.match_many(names)
+        self.record_match(rule_set, pattern_ids, time.perf_counter() - started)
+        return MatchResult(rule_indices, pattern_ids, rule_set.rules, matcher.patterns)
+    
+    def collects_shadowed(self) -> bool:
+        """是否统计被遮蔽的关键字，需要对已匹配的文件名再查找一次全部命中，可在 settings 中用 match_stats_shadowed 关闭"""
+        return bool(self.get_setting("match_stats_shadowed", True))
+    
+    def record_match(self, rule_set: RuleSet, pattern_ids: Sequence[int], seconds: Optional[float] = None,
+                     source: str = "filename", shadowed=None):
+        """把一批匹配结果计入匹配统计，参数见 MatchStats.record_batch"""
+        self.match_stats.record_batch(rule_set, pattern_ids, seconds, source, shadowed)
     
     def reset_to_default(self) -> bool:
         """重置用户规则（清空用户规则，只保留默认规则）"""
         try:
-            if 'rules' in self.config:
-                self.config['rules']['user'] = []
-            
-            # 重新合并规则
-            self.merge_rules()
-            
-            return self.save_config()
-            
+            return self._commit({'op': 'clear_rules'})
         except Exception:
             return False
     
     def load_rules(self):
-        """重新加载配置文件（兼容性方法）"""
-        self.load_config()
+        """重新加载配置文件（兼容性方法），文件未变化时直接复用已加载的规则"""
+        self.reload_if_changed()
     
     # 保持兼容性的方法
     def get_match_rule_columns(self) -> List[str]:
@@ -304,10 +699,7 @@ class RuleManager:
     
     def set_setting(self, key: str, value):
         """设置配置值"""
-        if 'settings' not in self.config:
-            self.config['settings'] = {}
-        self.config['settings'][key] = value
-        return self.save_config()
+        return self._commit({'op': 'set_setting', 'key': key, 'value': value})
     
     def get_all_settings(self) -> Dict:
         """获取所有设置"""
@@ -1,11 +1,38 @@
-from PySide6.QtCore import Qt
-from PySide6.QtWidgets import (QComboBox, QDialog, QDialogButtonBox,
-                               QFormLayout, QGroupBox, QHBoxLayout,
-                               QHeaderView, QLabel, QLineEdit, QMenu,
-                               QMessageBox, QPushButton, QScrollArea,
-                               QTableWidget, QTableWidgetItem, QVBoxLayout,
-                               QWidget)
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (QAbstractItemView, QApplication, QCheckBox,
+                               QComboBox, QDialog, QDialogButtonBox,
+                               QFileDialog, QFormLayout, QGroupBox,
+                               QHBoxLayout, QHeaderView, QLabel, QLineEdit,
+                               QMenu, QMessageBox, QPushButton, QScrollArea,
+                               QTableView, QTabWidget, QVBoxLayout, QWidget)
+
+from file_table_model import SearchFilterProxyModel
+from match_stats_dialog import StatsTableModel
+from matcher import (NORMALIZE_OPTIONS, PATTERN_TYPES, format_match_rule,
+                     make_match_rule, parse_match_rule, validate_match_rule)
+from rule_analysis import EFFECT_SHADOWED, RuleOverlapReport, analyze_rules
+from rule_import import load_import_plan
 from rule_manager import RuleManager
+from rule_table_model import (COLUMN_30D, COLUMN_CODE, COLUMN_MATCH_RULES,
+                              RuleTableModel)
+from search import SEARCH_DELAY_MS
+
+# 匹配类型在编辑界面中的名称，顺序与 PATTERN_TYPES 一致
+PATTERN_TYPE_LABELS = {
+    "literal": "包含",
+    "glob": "通配符",
+    "regex": "正则表达式",
+    "prefix": "开头是",
+    "suffix": "结尾是",
+}
+
+# 规范化选项在编辑界面中的名称，顺序与 NORMALIZE_OPTIONS 一致
+NORMALIZE_OPTION_LABELS = {
+    "nfkc": "NFKC规范化",
+    "width": "全角转半角",
+    "casefold": "忽略大小写",
+    "whitespace": "合并空白",
+}
 
 
 class RuleEditDialog(QDialog):
@@ -16,6 +43,7 @@ class RuleEditDialog(QDialog):
         self.rule_manager = rule_manager
         self.rule_data = rule_data or {}
         self.match_rule_widgets = []  # 改为列表存储匹配规则控件
+        self.match_type_combos = []  # 与 match_rule_widgets 一一对应的匹配类型
         self.is_editing = rule_data is not None
         
         self.setWindowTitle("编辑规则" if rule_data else "添加规则")
@@ -49,6 +77,17 @@ class RuleEditDialog(QDialog):
         self.thirty_d_combo.addItems(["Y", "N"])
         basic_layout.addRow("30d:", self.thirty_d_combo)
         
+        # 规范化选项：文件名和关键字按相同方式转换后再比较
+        normalize_widget = QWidget()
+        normalize_layout = QHBoxLayout(normalize_widget)
+        normalize_layout.setContentsMargins(0, 0, 0, 0)
+        self.normalize_checks = {}
+        for option in NORMALIZE_OPTIONS:
+            check = QCheckBox(NORMALIZE_OPTION_LABELS[option])
+            normalize_layout.addWidget(check)
+            self.normalize_checks[option] = check
+        basic_layout.addRow("匹配选项:", normalize_widget)
+        
         layout.addWidget(basic_group)
         
         # 匹配规则组
@@ -82,12 +121,17 @@ class RuleEditDialog(QDialog):
         button_box.rejected.connect(self.reject)
         layout.addWidget(button_box)
     
-    def add_match_rule_widget(self, value=""):
+    def add_match_rule_widget(self, value="", pattern_type="literal"):
         """添加匹配规则输入控件"""
         rule_widget = QWidget()
         rule_layout = QHBoxLayout(rule_widget)
         rule_layout.setContentsMargins(0, 0, 0, 0)
         
+        type_combo = QComboBox()
+        for type_name in PATTERN_TYPES:
+            type_combo.addItem(PATTERN_TYPE_LABELS[type_name], type_name)
+        type_combo.setCurrentIndex(max(type_combo.findData(pattern_type), 0))
+        
         rule_edit = QLineEdit()
         rule_edit.setText(value)
         rule_edit.setPlaceholderText("输入匹配关键字")
@@ -96,10 +140,12 @@ class RuleEditDialog(QDialog):
         remove_btn.setFixedSize(30, 30)
         remove_btn.clicked.connect(lambda widget=rule_widget, edit=rule_edit: self.remove_match_rule(widget, edit))
         
+        rule_layout.addWidget(type_combo)
         rule_layout.addWidget(rule_edit)
         rule_layout.addWidget(remove_btn)
         
         self.match_rule_widgets.append(rule_edit)
+        self.match_type_combos.append(type_combo)
         self.rules_form_layout.addRow(f"匹配规则 {len(self.match_rule_widgets)}:", rule_widget)
     
     def add_new_match_rule(self):
@@ -110,6 +156,7 @@ class RuleEditDialog(QDialog):
         """移除匹配规则"""
         if edit in self.match_rule_widgets:
             # 从列表中移除
+            del self.match_type_combos[self.match_rule_widgets.index(edit)]
             self.match_rule_widgets.remove(edit)
             
             # 找到并移除对应的行
@@ -137,8 +184,13 @@ class RuleEditDialog(QDialog):
         if index >= 0:
             self.thirty_d_combo.setCurrentIndex(index)
         
+        normalize = self.rule_data.get('normalize', [])
+        for option, check in self.normalize_checks.items():
+            check.setChecked(option in normalize)
+        
         # 清除现有的匹配规则控件
         self.match_rule_widgets.clear()
+        self.match_type_combos.clear()
         # 清除表单中的所有行
         while self.rules_form_layout.rowCount() > 0:
             self.rules_form_layout.removeRow(0)
@@ -147,8 +199,9 @@ class RuleEditDialog(QDialog):
         match_rules = self.rule_data.get('match_rules', [])
         if match_rules:
             for rule_value in match_rules:
-                if rule_value and str(rule_value).strip():
-                    self.add_match_rule_widget(str(rule_value).strip())
+                pattern_type, pattern = parse_match_rule(rule_value)
+                if pattern and str(pattern).strip():
+                    self.add_match_rule_widget(str(pattern).strip(), pattern_type)
         
         # 如果没有匹配规则，至少添加一个空的
         if not self.match_rule_widgets:
@@ -165,10 +218,16 @@ class RuleEditDialog(QDialog):
         
         # 收集匹配规则
         match_rules = []
-        for widget in self.match_rule_widgets:
+        for widget, type_combo in zip(self.match_rule_widgets, self.match_type_combos):
             value = widget.text().strip()
             if value:  # 只保存非空的规则
-                match_rules.append(value)
+                match_rule = make_match_rule(type_combo.currentData(), value)
+                error = validate_match_rule(match_rule)
+                if error:
+                    QMessageBox.warning(self, "警告", error)
+                    widget.setFocus()
+                    return
+                match_rules.append(match_rule)
         
         if not match_rules:
             QMessageBox.warning(self, "警告", "请至少输入一个匹配规则")
@@ -177,7 +236,8 @@ class RuleEditDialog(QDialog):
         self.result_data = {
             'code': code,
             '30d': thirty_d,
-            'match_rules': match_rules
+            'match_rules': match_rules,
+            'normalize': [option for option, check in self.normalize_checks.items() if check.isChecked()]
         }
         
         self.accept()
@@ -257,9 +317,13 @@ class RuleEditDialog(QDialog):
 class RuleSettingsDialog(QDialog):
     """规则设置主对话框"""
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, rule_manager=None):
         super().__init__(parent)
-        self.rule_manager = RuleManager()
+        # 与主窗口共用同一个规则管理器，修改后主窗口无需重新读取配置
+        self.rule_manager = rule_manager or RuleManager()
+        self.rule_model = RuleTableModel(self.rule_manager, self)
+        self.rule_proxy = SearchFilterProxyModel(self)
+        self.rule_proxy.setSourceModel(self.rule_model)
         self.setWindowTitle("匹配规则设置")
         self.setModal(True)
         # 设置窗口标志：对话框，带有标题栏、系统菜单、最小化和关闭按钮，但不显示帮助按钮
@@ -290,6 +354,15 @@ class RuleSettingsDialog(QDialog):
         delete_btn.clicked.connect(self.delete_rule)
         toolbar_layout.addWidget(delete_btn)
         
+        import_btn = QPushButton("📥 导入规则")
+        import_btn.clicked.connect(self.import_rules)
+        toolbar_layout.addWidget(import_btn)
+        
+        analyze_btn = QPushButton("🔍 冲突分析")
+        analyze_btn.setToolTip("查找重复的Code、互相包含的关键字和永远不会命中的规则")
+        analyze_btn.clicked.connect(self.analyze_overlaps)
+        toolbar_layout.addWidget(analyze_btn)
+        
         reset_btn = QPushButton("🔄 重置规则")
         reset_btn.clicked.connect(self.reset_rules)
         toolbar_layout.addWidget(reset_btn)
@@ -302,19 +375,34 @@ class RuleSettingsDialog(QDialog):
         
         self.search_edit = QLineEdit()
         self.search_edit.setPlaceholderText("输入关键字搜索...")
-        self.search_edit.textChanged.connect(self.filter_table)
         self.search_edit.setFixedWidth(200)
         toolbar_layout.addWidget(self.search_edit)
+
+        # 输入停顿后再过滤
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.filter_table)
+        self.search_edit.textChanged.connect(self.search_timer.start)
         
         layout.addLayout(toolbar_layout)
         
         # 规则表格
-        self.rules_table = QTableWidget()
+        self.rules_table = QTableView()
+        self.rules_table.setModel(self.rule_proxy)
+        self.rules_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.rules_table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.rules_table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.rules_table.customContextMenuRequested.connect(self.show_context_menu)
-        self.rules_table.itemDoubleClicked.connect(self.edit_rule)
+        self.rules_table.doubleClicked.connect(self.edit_rule)
         self.rules_table.setSortingEnabled(True)  # 启用排序
         
+        # 调整列宽
+        header = self.rules_table.horizontalHeader()
+        header.setSectionResizeMode(COLUMN_CODE, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(COLUMN_30D, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(COLUMN_MATCH_RULES, QHeaderView.Stretch)
+        
         layout.addWidget(self.rules_table)
         
         # 按钮组
@@ -336,7 +424,7 @@ class RuleSettingsDialog(QDialog):
                     stop:1 rgba(255, 255, 255, 1.0));
                 font-family: "PingFang SC", "SF Pro Display", "Helvetica Neue", "Microsoft YaHei UI", "Segoe UI", Arial, sans-serif;
             }
-            QTableWidget {
+            QTableView {
                 background: white;
                 border: 1px solid rgba(0, 0, 0, 0.1);
                 border-radius: 8px;
@@ -373,49 +461,30 @@ class RuleSettingsDialog(QDialog):
         """)
     
     def load_rules(self):
-        """加载规则到表格"""
-        self.rule_manager.load_rules()
-        rules = self.rule_manager.get_all_rules()
-        
-        # 设置表格列
-        self.rules_table.setColumnCount(3)
-        self.rules_table.setHorizontalHeaderLabels(["Code", "30d", "匹配规则"])
-        
-        if not rules:
-            self.rules_table.setRowCount(0)
-            return
-        
-        # 设置表格行数
-        self.rules_table.setRowCount(len(rules))
-        
-        # 填充数据
-        for row, rule in enumerate(rules):
-            # Code列
-            self.rules_table.setItem(row, 0, QTableWidgetItem(str(rule.get('code', ''))))
-            # 30d列
-            self.rules_table.setItem(row, 1, QTableWidgetItem(str(rule.get('30d', ''))))
-            
-            # 合并所有匹配规则到一列，用|分割
-            match_rules = rule.get('match_rules', [])
-            combined_rules = ' | '.join(match_rules) if match_rules else ''
-            self.rules_table.setItem(row, 2, QTableWidgetItem(combined_rules))
-        
-        # 调整列宽
-        self.rules_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        self.rules_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        self.rules_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        """加载规则到表格：配置文件被其他程序修改过时才重新读取"""
+        self.rule_manager.reload_if_changed()
+        self.rule_model.refresh()
     
-    def filter_table(self, text):
+    def filter_table(self):
         """根据搜索文本过滤表格"""
-        text = text.lower()
-        for row in range(self.rules_table.rowCount()):
-            show_row = False
-            for col in range(self.rules_table.columnCount()):
-                item = self.rules_table.item(row, col)
-                if item and text in item.text().lower():
-                    show_row = True
-                    break
-            self.rules_table.setRowHidden(row, not show_row)
+        self.rule_proxy.set_filter_text(self.search_edit.text())
+    
+    def selected_rule_index(self) -> int:
+        """获取当前选中行对应的规则索引，未选中返回-1"""
+        index = self.rules_table.currentIndex()
+        if not index.isValid():
+            return -1
+        return self.rule_model.rule_index(self.rule_proxy.mapToSource(index).row())
+    
+    def select_rule(self, rule_index: int):
+        """选中指定规则所在的行"""
+        row = self.rule_model.row_for_rule(rule_index)
+        if row < 0:
+            return
+        index = self.rule_proxy.mapFromSource(self.rule_model.index(row, 0))
+        if index.isValid():
+            self.rules_table.setCurrentIndex(index)
+            self.rules_table.selectRow(index.row())
     
     def add_rule(self):
         """添加新规则"""
@@ -425,7 +494,8 @@ class RuleSettingsDialog(QDialog):
             if self.rule_manager.add_rule(
                 result['code'], 
                 result['30d'], 
-                result['match_rules']
+                result['match_rules'],
+                result['normalize']
             ):
                 self.load_rules()  # 自动刷新
                 QMessageBox.information(self, "成功", "规则添加成功")
@@ -434,26 +504,27 @@ class RuleSettingsDialog(QDialog):
     
     def edit_rule(self):
         """编辑选中的规则"""
-        current_row = self.rules_table.currentRow()
-        if current_row < 0:
+        rule_index = self.selected_rule_index()
+        if rule_index < 0:
             QMessageBox.warning(self, "警告", "请选择要编辑的规则")
             return
         
-        # 获取当前行的数据
-        rules = self.rule_manager.get_all_rules()
-        if current_row >= len(rules):
+        # 获取当前行的数据，去除source字段
+        rules = self.rule_manager.get_rule_set().rules
+        if rule_index >= len(rules):
             return
         
-        rule_data = rules[current_row]
+        rule_data = {k: v for k, v in rules[rule_index].items() if k != 'source'}
         
         dialog = RuleEditDialog(self, rule_data, self.rule_manager)
         if dialog.exec() == QDialog.Accepted:
             result = dialog.result_data
             if self.rule_manager.update_rule(
-                current_row,
+                rule_index,
                 result['code'],
                 result['30d'],
-                result['match_rules']
+                result['match_rules'],
+                result['normalize']
             ):
                 self.load_rules()  # 自动刷新
                 QMessageBox.information(self, "成功", "规则更新成功")
@@ -462,8 +533,8 @@ class RuleSettingsDialog(QDialog):
     
     def delete_rule(self):
         """删除选中的规则"""
-        current_row = self.rules_table.currentRow()
-        if current_row < 0:
+        rule_index = self.selected_rule_index()
+        if rule_index < 0:
             QMessageBox.warning(self, "警告", "请选择要删除的规则")
             return
         
@@ -474,12 +545,62 @@ class RuleSettingsDialog(QDialog):
         )
         
         if reply == QMessageBox.Yes:
-            if self.rule_manager.delete_rule(current_row):
+            if self.rule_manager.delete_rule(rule_index):
                 self.load_rules()  # 自动刷新
                 QMessageBox.information(self, "成功", "规则删除成功")
             else:
                 QMessageBox.critical(self, "错误", "规则删除失败")
     
+    def import_rules(self):
+        """从 xlsx/CSV 文件批量导入规则：先整体校验并显示冲突报告，确认后一次性保存"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "导入规则", "",
+            "Excel/CSV Files (*.xlsx *.csv);;Excel Files (*.xlsx);;CSV Files (*.csv)"
+        )
+        if not file_path:
+            return
+        
+        try:
+            plan = load_import_plan(file_path, self.rule_manager.get_all_rules())
+        except Exception as e:
+            QMessageBox.critical(self, "导入失败", f"读取文件时发生错误:\n{str(e)}")
+            return
+        
+        if not plan.rules:
+            QMessageBox.warning(self, "导入失败", plan.report())
+            return
+        
+        message = f"将导入 {len(plan.rules)} 条规则"
+        if plan.has_conflicts():
+            message += "，发现冲突，详情见下方报告。\n\n是否继续导入？"
+        else:
+            message += "，是否继续？"
+        confirm_box = QMessageBox(QMessageBox.Question, "确认导入", message,
+                                  QMessageBox.Yes | QMessageBox.No, self)
+        confirm_box.setDetailedText(plan.report())
+        if confirm_box.exec() != QMessageBox.Yes:
+            return
+        
+        if self.rule_manager.import_rules(plan.rules):
+            self.load_rules()  # 自动刷新
+            QMessageBox.information(self, "成功", f"已导入 {len(plan.rules)} 条规则")
+        else:
+            QMessageBox.critical(self, "错误", "规则导入失败")
+    
+    def analyze_overlaps(self):
+        """分析规则冲突，在结果中双击某一行可定位到对应的规则"""
+        self.rule_manager.reload_if_changed()
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            report = analyze_rules(self.rule_manager.get_rule_set().rules)
+        finally:
+            QApplication.restoreOverrideCursor()
+        
+        dialog = RuleOverlapDialog(self, report)
+        if dialog.exec() == QDialog.Accepted and dialog.selected_rule >= 0:
+            self.load_rules()
+            self.select_rule(dialog.selected_rule)
+    
     def reset_rules(self):
         """重置规则为默认配置"""
         reply = QMessageBox.question(
@@ -503,11 +624,113 @@ class RuleSettingsDialog(QDialog):
         add_action = menu.addAction("添加规则")
         add_action.triggered.connect(self.add_rule)
         
-        if self.rules_table.itemAt(position):
+        if self.rules_table.indexAt(position).isValid():
             edit_action = menu.addAction("编辑规则")
             edit_action.triggered.connect(self.edit_rule)
             
             delete_action = menu.addAction("删除规则")
             delete_action.triggered.connect(self.delete_rule)
         
-        menu.exec_(self.rules_table.mapToGlobal(position)) 
\ No newline at end of file
+        menu.exec_(self.rules_table.mapToGlobal(position)) 
+
+
+class RuleOverlapDialog(QDialog):
+    """规则冲突分析结果对话框 - 双击某一行关闭对话框并定位到对应的规则"""
+    
+    def __init__(self, parent, report: RuleOverlapReport):
+        super().__init__(parent)
+        self.report = report
+        self.selected_rule = -1  # 双击选中的规则索引
+        self.setWindowTitle("规则冲突分析")
+        self.setModal(True)
+        self.setWindowFlags(Qt.Dialog | Qt.WindowTitleHint | Qt.WindowSystemMenuHint |
+                           Qt.WindowMinimizeButtonHint | Qt.WindowCloseButtonHint)
+        self.resize(900, 600)
+        
+        self.duplicate_model = StatsTableModel(["Code", "规则序号", "匹配规则"], self)
+        self.never_win_model = StatsTableModel(["规则序号", "Code", "原因"], self)
+        self.overlap_model = StatsTableModel(["Code", "关键字", "包含的关键字所属Code", "包含的关键字", "影响"], self)
+        self.setup_ui()
+        self.load_report()
+    
+    def setup_ui(self):
+        """设置界面"""
+        layout = QVBoxLayout(self)
+        
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        
+        tabs = QTabWidget()
+        tabs.addTab(self.create_table(self.duplicate_model), "重复的Code")
+        tabs.addTab(self.create_table(self.never_win_model), "永远不会胜出的规则")
+        overlap_page = QWidget()
+        overlap_layout = QVBoxLayout(overlap_page)
+        self.shadowed_only_check = QCheckBox("只显示导致关键字永远不会命中的包含关系")
+        self.shadowed_only_check.setChecked(True)
+        self.shadowed_only_check.toggled.connect(lambda checked: self.load_overlaps())
+        overlap_layout.addWidget(self.shadowed_only_check)
+        overlap_layout.addWidget(self.create_table(self.overlap_model))
+        tabs.addTab(overlap_page, "关键字包含关系")
+        layout.addWidget(tabs)
+        
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(QLabel("双击一行定位到对应的规则"))
+        button_layout.addStretch()
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.reject)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+    
+    def create_table(self, model: StatsTableModel) -> QTableView:
+        """创建只读、可排序的结果表格，双击定位规则"""
+        table = QTableView()
+        table.setModel(model)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSortingEnabled(True)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        table.doubleClicked.connect(lambda index: self.locate_rule(model, index.row()))
+        return table
+    
+    def load_report(self):
+        """把分析结果填入各表格，每行末尾附带用于定位的规则索引"""
+        report = self.report
+        rules = report.rules
+        duplicate_rows = []
+        for code, indices in report.duplicate_codes.items():
+            for rule_index in indices:
+                match_rules = rules[rule_index].get('match_rules', [])
+                duplicate_rows.append([code, rule_index + 1, ' | '.join(map(format_match_rule, match_rules)),
+                                       rule_index])
+        self.duplicate_model.set_rows(duplicate_rows)
+        self.never_win_model.set_rows([[rule_index + 1, str(rules[rule_index].get('code', '')), reason, rule_index]
+                                       for rule_index, reason in report.never_win])
+        self.load_overlaps()
+        
+        self.summary_label.setText(
+            f"共 {len(report.patterns)} 个关键字：重复的Code {len(report.duplicate_codes)} 个，"
+            f"永远不会胜出的规则 {len(report.never_win)} 条，永远不会命中的关键字 {len(report.shadowed)} 个，"
+            f"关键字包含关系 {len(report.overlaps)} 处。\n"
+            f"通配符和正则表达式无法判断包含关系，不参与分析；不同匹配选项的关键字之间不做比较。"
+        )
+    
+    def load_overlaps(self):
+        """按过滤条件显示关键字包含关系"""
+        report = self.report
+        shadowed_only = self.shadowed_only_check.isChecked()
+        rows = []
+        for overlap in report.overlaps:
+            if shadowed_only and overlap.effect != EFFECT_SHADOWED:
+                continue
+            rule_index, text = report.patterns[overlap.outer_id]
+            inner_rule, inner_text = report.patterns[overlap.inner_id]
+            rows.append([report.code_of(rule_index), text, report.code_of(inner_rule), inner_text,
+                         overlap.effect, rule_index])
+        self.overlap_model.set_rows(rows)
+    
+    def locate_rule(self, model: StatsTableModel, row: int):
+        """关闭对话框并定位到该行对应的规则"""
+        self.selected_rule = model.row_values(row)[-1]
+        self.accept()
@@ -0,0 +1,102 @@
+from typing import List
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from matcher import format_match_rule
+from search import make_search_key
+
+# 表格列定义
+COLUMN_CODE = 0
+COLUMN_30D = 1
+COLUMN_MATCH_RULES = 2
+
+HEADER_LABELS = ["Code", "30d", "匹配规则"]
+
+
+class RuleTableModel(QAbstractTableModel):
+    """规则表格模型 - 直接读取 RuleManager 当前的规则集快照
+
+    与主窗口共用同一个 RuleManager，不重新读取配置文件。
+    排序只调整 行 -> 规则索引 的顺序，编辑和删除时按规则索引操作。
+    """
+
+    def __init__(self, rule_manager, parent=None):
+        super().__init__(parent)
+        self.rule_manager = rule_manager
+        self._texts: List[tuple] = []  # 规则索引 -> 各列显示文本
+        self._order: List[int] = []  # 行 -> 规则索引
+        self._search_keys: List[str] = []  # 规则索引 -> 搜索键
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self.refresh()
+
+    def refresh(self):
+        """规则修改后重新读取规则集快照，保持当前排序"""
+        self.beginResetModel()
+        self._texts = []
+        for rule in self.rule_manager.get_rule_set().rules:
+            match_rules = rule.get('match_rules', [])
+            self._texts.append((
+                str(rule.get('code', '')),
+                str(rule.get('30d', '')),
+                # 合并所有匹配规则到一列，用|分割
+                ' | '.join(map(format_match_rule, match_rules)) if match_rules else ''
+            ))
+        self._search_keys = [make_search_key(texts) for texts in self._texts]
+        self._order = list(range(len(self._texts)))
+        self._apply_sort()
+        self.endResetModel()
+
+    def rule_index(self, row: int) -> int:
+        """获取行对应的规则索引"""
+        return self._order[row]
+
+    def row_for_rule(self, rule_index: int) -> int:
+        """获取规则索引所在的行，不存在返回-1"""
+        try:
+            return self._order.index(rule_index)
+        except ValueError:
+            return -1
+
+    def search_rows(self, query: str, candidates=None) -> List[int]:
+        """返回 candidates（None 表示全部行）中搜索键包含查询文本（已 casefold）的行号"""
+        rows = range(len(self._order)) if candidates is None else candidates
+        return [row for row in rows if self.row_matches(query, row)]
+
+    def row_matches(self, query: str, row: int) -> bool:
+        """判断当前第 row 行的搜索键是否包含查询文本（已 casefold）"""
+        return query in self._search_keys[self._order[row]]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADER_LABELS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADER_LABELS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self._texts[self._order[index.row()]][index.column()]
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """按列排序，只调整行顺序"""
+        self.layoutAboutToBeChanged.emit()
+        self._sort_column = column
+        self._sort_order = order
+        self._apply_sort()
+        self.layoutChanged.emit()
+
+    def _apply_sort(self):
+        if self._sort_column < 0:
+            self._order = list(range(len(self._texts)))
+            return
+        column = self._sort_column
+        self._order.sort(key=lambda rule_index: self._texts[rule_index][column],
+                         reverse=(self._sort_order == Qt.DescendingOrder))
@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+
+class ScanEntry(NamedTuple):
+    """目录扫描得到的文件条目"""
+    path: str
+    name: str
+    directory: str
+    size: int
+    mtime: float
+
+
+def path_key(path: str) -> str:
+    """生成路径的规范化键：统一分隔符并按平台规则处理大小写（Windows 不区分大小写）"""
+    return os.path.normcase(os.path.normpath(path))
+
+
+def parse_extensions(text: str) -> Optional[frozenset]:
+    """解析扩展名过滤文本（如 "pdf, .docx"），返回小写带点的扩展名集合，空文本返回None"""
+    extensions = set()
+    for part in text.replace('，', ',').replace(';', ',').split(','):
+        part = part.strip().lower()
+        if part:
+            extensions.add(part if part.startswith('.') else f'.{part}')
+    return frozenset(extensions) or None
+
+
+def _iter_directory_entries(directory: str, subdirectories: List[str], recursive: bool,
+                            extensions: Optional[Iterable[str]]) -> Iterator[ScanEntry]:
+    """扫描单个目录，逐个返回文件条目；需要递归时把子目录追加到 subdirectories"""
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        if extensions and os.path.splitext(entry.name)[1].lower() not in extensions:
+                            continue
+                        stat = entry.stat()
+                        yield ScanEntry(entry.path, entry.name, directory,
+                                        stat.st_size, stat.st_mtime)
+                    elif recursive and entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        return
+
+
+def iter_directory(root: str, recursive: bool = False,
+                   extensions: Optional[Iterable[str]] = None,
+                   is_cancelled: Optional[Callable[[], bool]] = None) -> Iterator[ScanEntry]:
+    """基于 os.scandir 遍历目录中的文件
+
+    大小和修改时间直接取自目录项，Windows 上不需要为每个文件单独 stat。
+    无权限或已消失的目录和文件会被跳过。
+    """
+    pending = [os.path.normpath(root)]
+    while pending:
+        if is_cancelled and is_cancelled():
+            return
+        subdirectories = []
+        yield from _iter_directory_entries(pending.pop(), subdirectories, recursive, extensions)
+        # 逆序入栈，保证子目录按目录项顺序遍历
+        pending.extend(reversed(subdirectories))
+
+
+def _scan_directory(directory: str, recursive: bool,
+                    extensions: Optional[Iterable[str]]) -> Tuple[List[ScanEntry], List[str]]:
+    """扫描单个目录，返回 (文件条目, 子目录)"""
+    subdirectories = []
+    entries = list(_iter_directory_entries(directory, subdirectories, recursive, extensions))
+    return entries, subdirectories
+
+
+def iter_directories_parallel(roots: Iterable[str], recursive: bool = True,
+                              extensions: Optional[Iterable[str]] = None,
+                              max_workers: int = 8) -> Iterator[ScanEntry]:
+    """用线程池并行扫描多个目录树
+
+    每个目录作为一个任务提交，发现的子目录继续提交，网络共享上可以同时等待多个目录的响应。
+    结果按目录完成的顺序返回，不保证与目录顺序一致。
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(_scan_directory, os.path.normpath(root), recursive, extensions)
+                   for root in roots}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entries, subdirectories = future.result()
+                for subdirectory in subdirectories:
+                    pending.add(executor.submit(_scan_directory, subdirectory, recursive, extensions))
+                yield from entries
+
+
+def diff_directory(directory: str, known_names: Set[str],
+                   extensions: Optional[Iterable[str]] = None) -> Tuple[List[ScanEntry], List[str]]:
+    """对比目录（不含子目录）当前的文件和已知文件名，只为新出现的文件读取大小和修改时间
+
+    返回 (新增的文件条目, 已消失的文件名)，并就地更新 known_names。目录无法访问时抛出 OSError。
+    """
+    current_names = set()
+    added = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_file():
+                    continue
+                if extensions and os.path.splitext(entry.name)[1].lower() not in extensions:
+                    continue
+                if entry.name not in known_names:
+                    stat = entry.stat()
+                    added.append(ScanEntry(entry.path, entry.name, directory,
+                                           stat.st_size, stat.st_mtime))
+                current_names.add(entry.name)
+            except OSError:
+                continue
+
+    removed = [name for name in known_names if name not in current_names]
+    known_names.difference_update(removed)
+    known_names.update(entry.name for entry in added)
+    return added, removed
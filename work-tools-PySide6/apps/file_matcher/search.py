@@ -0,0 +1,53 @@
+from typing import Iterable, List, Optional
+
+# 拼接各列文本时使用的分隔符，避免搜索词跨列匹配
+SEARCH_KEY_SEPARATOR = "\x1f"
+
+# 搜索框输入停止多久后再执行过滤（毫秒）
+SEARCH_DELAY_MS = 200
+
+
+def make_search_key(texts: Iterable[str]) -> str:
+    """把一行中各列的显示文本拼接为不区分大小写的搜索键"""
+    return SEARCH_KEY_SEPARATOR.join(texts).casefold()
+
+
+class RowFilter:
+    """子串过滤 - 记录当前查询和满足条件的行
+
+    一行是否包含查询文本由 searcher 判断：searcher.search_rows(query, candidates) 返回 candidates
+    （None 表示全部行）中满足条件的行号（升序），searcher.row_matches(query, row) 判断单独一行。
+    查询在上一次查询的基础上延长（新查询包含旧查询）时，只在上次的结果中继续筛选。
+    结果为按行号升序的列表，None 表示不过滤。
+    """
+
+    def __init__(self):
+        self.query = ""
+        self.rows: Optional[List[int]] = None
+
+    def apply(self, searcher, text: str) -> Optional[List[int]]:
+        """按搜索文本过滤，返回满足条件的行号"""
+        query = text.casefold()
+        if not query:
+            self.query, self.rows = "", None
+            return None
+        candidates = self.rows if self.rows is not None and self.query in query else None
+        self.rows = searcher.search_rows(query, candidates)
+        self.query = query
+        return self.rows
+
+    def refilter(self, searcher) -> Optional[List[int]]:
+        """行或显示文本发生变化后，用当前查询重新完整过滤"""
+        self.rows = None
+        return self.apply(searcher, self.query)
+
+    def accepts(self, searcher, row: int) -> bool:
+        """判断一行是否满足当前查询"""
+        return not self.query or searcher.row_matches(self.query, row)
+
+    def append_rows(self, searcher, rows: Iterable[int]) -> List[int]:
+        """新行追加到末尾时，把其中满足条件的行加入结果，返回加入的行号"""
+        accepted = [row for row in rows if searcher.row_matches(self.query, row)]
+        if self.rows is not None:
+            self.rows.extend(accepted)
+        return accepted
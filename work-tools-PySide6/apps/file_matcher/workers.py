@@ -0,0 +1,254 @@
+import os
+import time
+from array import array
+from collections import Counter, deque
+from typing import List, Optional, Tuple
+
+from PySide6.QtCore import QThread, Signal
+
+from content import (DEFAULT_CONTENT_BYTES, DEFAULT_CONTENT_WORKERS, ContentCache,
+                     ContentCancelled, match_contents)
+from exporter import ExportCancelled, export_rows, iter_export_rows
+from file_store import FileStore
+from manifest import ManifestProgress, iter_manifest
+from match_stats import count_shadowed
+from matcher import CompiledMatcher
+from parallel import ParallelMatcher
+from scanner import iter_directory
+
+# 每批发送给界面的文件数量
+SCAN_BATCH_SIZE = 300
+# 慢速网络共享上即使未凑满一批，也按此间隔（秒）发送已发现的文件
+SCAN_FLUSH_INTERVAL = 0.5
+# 多进程匹配时每个分片包含的文件数
+MATCH_CHUNK_SIZE = 20000
+# 导入路径清单时每批匹配并发送给界面的文件数量
+MANIFEST_BATCH_SIZE = 5000
+
+
+class DirectoryScanWorker(QThread):
+    """目录扫描工作线程 - 分批发送扫描到的文件，界面可以边扫描边使用"""
+    batch_found = Signal(list)  # List[ScanEntry]
+    progress_updated = Signal(int)  # 已发现的文件数
+    scan_finished = Signal(int, bool)  # 文件总数, 是否被取消
+
+    def __init__(self, roots: List[str], recursive: bool = False,
+                 extensions: Optional[frozenset] = None):
+        super().__init__()
+        self.roots = roots
+        self.recursive = recursive
+        self.extensions = extensions
+        self.is_stopped = False
+
+    def run(self):
+        """执行目录扫描"""
+        found_count = 0
+        batch = []
+        last_flush = time.monotonic()
+        is_cancelled = lambda: self.is_stopped
+
+        for root in self.roots:
+            for entry in iter_directory(root, self.recursive, self.extensions, is_cancelled):
+                if self.is_stopped:
+                    break
+                batch.append(entry)
+                found_count += 1
+                now = time.monotonic()
+                if len(batch) >= SCAN_BATCH_SIZE or now - last_flush >= SCAN_FLUSH_INTERVAL:
+                    self.batch_found.emit(batch)
+                    self.progress_updated.emit(found_count)
+                    batch = []
+                    last_flush = now
+            if self.is_stopped:
+                break
+
+        if batch:
+            self.batch_found.emit(batch)
+            self.progress_updated.emit(found_count)
+        self.scan_finished.emit(found_count, self.is_stopped)
+
+    def stop(self):
+        """停止扫描"""
+        self.is_stopped = True
+
+
+class ExportWorker(QThread):
+    """导出工作线程 - 流式写出匹配结果，支持进度显示和取消"""
+    progress_updated = Signal(int)  # 已写入的行数
+    export_finished = Signal(str, int)  # 文件路径, 行数
+    export_failed = Signal(str)  # 错误信息
+    export_cancelled = Signal()
+
+    def __init__(self, files: FileStore, file_path: str):
+        super().__init__()
+        self.files = files
+        self.file_path = file_path
+        self.is_stopped = False
+
+    def run(self):
+        """执行导出"""
+        try:
+            count = export_rows(
+                iter_export_rows(self.files),
+                self.file_path,
+                progress_callback=self.progress_updated.emit,
+                is_cancelled=lambda: self.is_stopped
+            )
+        except ExportCancelled:
+            self.export_cancelled.emit()
+        except Exception as e:
+            self.export_failed.emit(str(e))
+        else:
+            self.export_finished.emit(self.file_path, count)
+
+    def stop(self):
+        """停止导出"""
+        self.is_stopped = True
+
+
+class MatchWorker(QThread):
+    """多进程匹配工作线程 - 把文件名分片交给进程池，按提交顺序拼接结果数组"""
+    progress_updated = Signal(int)  # 已匹配的文件数
+    # 规则索引数组, 模式编号数组, 耗时(秒), 被遮蔽的关键字统计（未统计时为None）
+    match_finished = Signal(object, object, float, object)
+    match_failed = Signal(str)  # 错误信息
+    match_cancelled = Signal()
+
+    def __init__(self, matcher: CompiledMatcher, names: List[str], max_workers: Optional[int] = None,
+                 chunk_size: int = MATCH_CHUNK_SIZE, with_shadowed: bool = False):
+        super().__init__()
+        self.matcher = matcher
+        self.names = names
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.with_shadowed = with_shadowed
+        self.is_stopped = False
+
+    def run(self):
+        """执行匹配"""
+        started = time.perf_counter()
+        rule_indices = array('i')
+        pattern_ids = array('i')
+        shadowed = (Counter(), Counter()) if self.with_shadowed else None
+        # 在途分片数量有上限，取消时最多只需等待这些分片
+        max_in_flight = 2 * (self.max_workers or os.cpu_count() or 1)
+        in_flight = deque()
+
+        def collect():
+            chunk_rules, chunk_patterns, *chunk_shadowed = in_flight.popleft().result()
+            if chunk_shadowed:
+                shadowed[0].update(chunk_shadowed[0][0])
+                shadowed[1].update(chunk_shadowed[0][1])
+            rule_indices.extend(chunk_rules)
+            pattern_ids.extend(chunk_patterns)
+            self.progress_updated.emit(len(rule_indices))
+
+        try:
+            with ParallelMatcher(self.matcher, self.max_workers) as pool:
+                for start in range(0, len(self.names), self.chunk_size):
+                    if self.is_stopped:
+                        break
+                    in_flight.append(pool.submit(self.names[start:start + self.chunk_size], self.with_shadowed))
+                    while in_flight and (len(in_flight) > max_in_flight or in_flight[0].done()):
+                        collect()
+                while in_flight and not self.is_stopped:
+                    collect()
+                for future in in_flight:
+                    future.cancel()
+        except Exception as e:
+            self.match_failed.emit(str(e))
+            return
+
+        if self.is_stopped:
+            self.match_cancelled.emit()
+        else:
+            self.match_finished.emit(rule_indices, pattern_ids, time.perf_counter() - started, shadowed)
+
+    def stop(self):
+        """停止匹配"""
+        self.is_stopped = True
+
+
+class ContentMatchWorker(QThread):
+    """内容匹配工作线程 - 在线程池中读取文件开头一段和文档属性，用同一套规则匹配提取的文本"""
+    progress_updated = Signal(int)  # 已处理的文件数
+    match_finished = Signal(object, object, float)  # 规则索引数组, 模式编号数组, 耗时(秒)
+    match_failed = Signal(str)  # 错误信息
+    match_cancelled = Signal()
+
+    def __init__(self, matcher: CompiledMatcher, files: List[Tuple[str, Optional[int], Optional[float]]],
+                 max_workers: int = DEFAULT_CONTENT_WORKERS, max_bytes: int = DEFAULT_CONTENT_BYTES):
+        super().__init__()
+        self.matcher = matcher
+        self.files = files
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self.is_stopped = False
+
+    def run(self):
+        """执行内容匹配"""
+        # SQLite 连接只能在创建它的线程中使用，缓存在工作线程内打开
+        cache = ContentCache()
+        started = time.perf_counter()
+        try:
+            rule_indices, pattern_ids = match_contents(
+                self.matcher, self.files, cache,
+                max_workers=self.max_workers,
+                max_bytes=self.max_bytes,
+                progress_callback=self.progress_updated.emit,
+                is_cancelled=lambda: self.is_stopped
+            )
+        except ContentCancelled:
+            self.match_cancelled.emit()
+        except Exception as e:
+            self.match_failed.emit(str(e))
+        else:
+            self.match_finished.emit(rule_indices, pattern_ids, time.perf_counter() - started)
+        finally:
+            cache.close()
+
+    def stop(self):
+        """停止内容匹配"""
+        self.is_stopped = True
+
+
+class ManifestWorker(QThread):
+    """路径清单导入线程 - 逐批读取清单中的路径并直接匹配文件名，不访问文件系统"""
+    # ManifestBatch, 规则索引数组, 模式编号数组, 耗时(秒), 被遮蔽计数或None
+    batch_found = Signal(object, object, object, float, object)
+    progress_updated = Signal(int, int)  # 已读取的文件数, 已读取的百分比
+    manifest_finished = Signal(int, bool, list)  # 文件总数, 是否被取消, 清单中出现过的目录
+    manifest_failed = Signal(str)  # 错误信息
+
+    def __init__(self, manifest_path: str, matcher: CompiledMatcher,
+                 batch_size: int = MANIFEST_BATCH_SIZE, with_shadowed: bool = False):
+        super().__init__()
+        self.manifest_path = manifest_path
+        self.matcher = matcher
+        self.batch_size = batch_size
+        self.with_shadowed = with_shadowed
+        self.is_stopped = False
+
+    def run(self):
+        """读取并匹配路径清单"""
+        found_count = 0
+        directories = {}
+        try:
+            progress = ManifestProgress(os.path.getsize(self.manifest_path))
+            for batch in iter_manifest(self.manifest_path, self.batch_size, lambda: self.is_stopped,
+                                       progress, directories):
+                started = time.perf_counter()
+                rule_indices, pattern_ids = self.matcher.match_many(batch.names)
+                seconds = time.perf_counter() - started
+                shadowed = count_shadowed(self.matcher, batch.names, pattern_ids) if self.with_shadowed else None
+                found_count += len(batch.names)
+                self.batch_found.emit(batch, rule_indices, pattern_ids, seconds, shadowed)
+                self.progress_updated.emit(found_count, progress.percent())
+        except Exception as e:
+            self.manifest_failed.emit(str(e))
+            return
+        self.manifest_finished.emit(found_count, self.is_stopped, list(directories))
+
+    def stop(self):
+        """停止导入"""
+        self.is_stopped = True
@@ -5,7 +5,6 @@ import sys
 from pathlib import Path
 import datetime
 
-import pandas as pd
 from PySide6.QtCore import QDateTime, QSize, Qt, QTimer, QUrl
 from PySide6.QtGui import (
     QAction,
@@ -2460,6 +2459,9 @@ class FileRenamer(QMainWindow):
             if not file_path:
                 return
 
+            # pandas 加载较慢，只在导出时导入，避免拖慢程序启动
+            import pandas as pd
+
             # 准备数据
             data = []
             headers = [
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+文件名匹配工具 - 规则匹配性能基准测试
+
+生成不同规模的合成规则集（中英文混合关键字，与 config.json 相近）和文件名语料，
+测量规则合并、逐个匹配、批量匹配、配置加载/保存、单条规则修改和导出的吞吐量，
+结果以 JSON 输出，便于在不同版本之间对比回归。
+
+    python scripts/benchmark_file_matcher.py --output benchmark.json
+    python scripts/benchmark_file_matcher.py --rules 100,5000,50000 --names 10000,1000000
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "apps", "file_matcher"))
+
+from check_matcher_parity import legacy_match  # noqa: E402
+from exporter import export_rows, iter_export_rows  # noqa: E402
+from file_store import FileStore  # noqa: E402
+from rule_manager import RuleManager  # noqa: E402
+
+# 合成关键字使用的词汇，与实际规则中的英文短语、中文名称和编号相近
+LATIN_WORDS = [
+    "Confidential", "Disclosure", "Agreement", "Privacy", "Notice", "Local", "Destruction",
+    "Extension", "Expiry", "Date", "Memo", "Final", "Investigational", "Product",
+    "Reconciliation", "Statement", "Form", "Temperature", "Log", "Monitoring", "Visit",
+    "Report", "Letter", "Follow", "Up", "Site", "Training", "Record", "Delegation",
+]
+CJK_WORDS = [
+    "药品", "有效期", "延长", "说明", "访视", "登记表", "温度", "记录", "销毁", "确认",
+    "监查", "报告", "培训", "授权", "签名", "样本", "运输", "回收", "知情", "同意书",
+]
+# 文件名中与规则无关的填充词
+FILLER_WORDS = ["scan", "copy", "final", "v2", "draft", "扫描件", "副本", "已签", "归档", "新建"]
+
+DEFAULT_RULE_SIZES = [100, 5000, 50000]
+DEFAULT_NAME_SIZES = [10000, 1000000]
+# 逐个匹配和旧实现对照只在语料前N个文件名上测量，避免耗时过长
+SINGLE_MATCH_SAMPLE = 10000
+PARITY_SAMPLE = 300
+PATTERNS_PER_RULE = 2
+SEED = 20240601
+
+
+def random_pattern(rng: random.Random) -> str:
+    """生成一个匹配关键字：英文短语、中文词组或数字编号"""
+    kind = rng.random()
+    if kind < 0.4:
+        return " ".join(rng.sample(LATIN_WORDS, rng.randint(2, 3)))
+    if kind < 0.75:
+        return "".join(rng.sample(CJK_WORDS, rng.randint(2, 3)))
+    return f"{rng.randint(0, 999999):06d}"
+
+
+def generate_rules(pattern_count: int, rng: random.Random):
+    """生成包含约 pattern_count 个关键字的规则列表"""
+    rules = []
+    for index in range(max(1, pattern_count // PATTERNS_PER_RULE)):
+        rules.append({
+            "code": f"{index // 10000:02d}.{index // 100 % 100:02d}.{index % 100:02d}",
+            "30d": rng.choice(["Y", "N"]),
+            "match_rules": [random_pattern(rng) for _ in range(PATTERNS_PER_RULE)],
+        })
+    return rules
+
+
+def generate_names(count: int, rules, rng: random.Random):
+    """生成文件名语料，约三分之一包含某条规则的关键字"""
+    extensions = [".pdf", ".docx", ".xlsx", ".msg", ".txt"]
+    names = []
+    for _ in range(count):
+        parts = [rng.choice(FILLER_WORDS), rng.choice(FILLER_WORDS), f"{rng.randint(2000, 2030)}{rng.randint(1, 12):02d}"]
+        if rng.random() < 0.33:
+            parts.insert(rng.randint(0, len(parts)), rng.choice(rng.choice(rules)["match_rules"]))
+        names.append("_".join(parts) + rng.choice(extensions))
+    return names
+
+
+def timed(function, *args):
+    """执行函数，返回 (结果, 耗时秒数)"""
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def write_config(path: str, rules):
+    """写入合成配置：一半作为默认规则，一小部分作为覆盖默认规则的用户规则"""
+    user_rules = [dict(rule, **{"30d": "Y"}) for rule in rules[::20]]
+    config = {"version": "1.0", "settings": {}, "rules": {"default": rules, "user": user_rules}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+
+def benchmark_rule_set(pattern_count: int, name_sizes, work_dir: str, rng: random.Random):
+    """对一个规模的规则集运行全部测量"""
+    rules = generate_rules(pattern_count, rng)
+    config_path = os.path.join(work_dir, f"config_{pattern_count}.json")
+    write_config(config_path, rules)
+
+    result = {"patterns": pattern_count, "rules": len(rules)}
+
+    manager, elapsed = timed(RuleManager, config_path)
+    result["config_load_seconds"] = elapsed
+    result["config_bytes"] = os.path.getsize(config_path)
+
+    _, elapsed = timed(manager.save_config)
+    result["config_save_seconds"] = elapsed
+
+    # 单条规则修改只追加修改日志，不重写整个配置文件
+    _, elapsed = timed(manager.add_rule, "99.99.99", "Y", ["benchmark"])
+    result["add_rule_seconds"] = elapsed
+
+    _, elapsed = timed(manager.merge_rules)
+    result["merge_rules_seconds"] = elapsed
+
+    _, elapsed = timed(lambda: manager.get_rule_set().matcher)
+    result["compile_seconds"] = elapsed
+
+    corpora = []
+    for name_count in name_sizes:
+        names = generate_names(name_count, manager.rules, rng)
+        corpus = {"names": name_count}
+
+        sample = names[:SINGLE_MATCH_SAMPLE]
+        _, elapsed = timed(lambda: [manager.match_filename(name) for name in sample])
+        corpus["match_filename_names_per_second"] = len(sample) / elapsed
+
+        match_result, elapsed = timed(manager.match_many, names)
+        corpus["match_many_seconds"] = elapsed
+        corpus["match_many_names_per_second"] = name_count / elapsed
+        corpus["matched"] = match_result.matched_count()
+
+        parity_sample = names[:PARITY_SAMPLE]
+        for position, name in enumerate(parity_sample):
+            expected = legacy_match(manager.rules, name)
+            info = match_result.match_info(position)
+            actual = (info["index"], info["matched_rule"]) if info else None
+            if actual != expected:
+                raise AssertionError(f"匹配结果与逐条匹配不一致: {name!r} {actual} != {expected}")
+        corpus["parity_checked"] = len(parity_sample)
+
+        # 文件分布在1000个目录中，同一目录下重名的文件只保留一个
+        files_data = FileStore()
+        files_data.set_rule_set(manager.get_rule_set())
+        entries = ((f"D:\\归档\\{position % 1000:03d}\\{name}", name, f"D:\\归档\\{position % 1000:03d}",
+                    None, None) for position, name in enumerate(names))
+        stored_count, elapsed = timed(files_data.add_files, entries,
+                                      match_result.rule_indices, match_result.pattern_ids)
+        corpus["store_files_per_second"] = stored_count / elapsed
+        export_path = os.path.join(work_dir, f"export_{pattern_count}_{name_count}.csv")
+        row_count, elapsed = timed(export_rows, iter_export_rows(files_data), export_path)
+        corpus["export_csv_rows_per_second"] = row_count / elapsed
+        os.remove(export_path)
+
+        corpora.append(corpus)
+
+    result["corpora"] = corpora
+    return result
+
+
+def parse_sizes(text: str):
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文件名匹配工具 - 规则匹配性能基准测试")
+    parser.add_argument("--rules", default=",".join(map(str, DEFAULT_RULE_SIZES)),
+                        help="规则集的关键字数量，逗号分隔")
+    parser.add_argument("--names", default=",".join(map(str, DEFAULT_NAME_SIZES)),
+                        help="文件名语料的规模，逗号分隔")
+    parser.add_argument("--output", "-o", help="结果JSON文件，默认输出到标准输出")
+    args = parser.parse_args()
+
+    rng = random.Random(SEED)
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": SEED,
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for pattern_count in parse_sizes(args.rules):
+            print(f"测量 {pattern_count} 个关键字的规则集...", file=sys.stderr)
+            report["results"].append(
+                benchmark_rule_set(pattern_count, parse_sizes(args.names), work_dir, rng)
+            )
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+启动导入耗时检查
+
+用 python -X importtime 导入各工具的入口模块，统计导入总耗时，
+超出预算或在启动时导入了应当延迟加载的重型模块（pandas、openpyxl、pywin32 等）时返回非零退出码。
+
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --app file_matcher --budget-scale 2
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ImportTarget(NamedTuple):
+    """一个需要检查的入口模块"""
+    app_dir: str
+    module: str
+    budget_ms: float
+    banned: tuple
+
+
+# 只在用到时才加载的模块，启动阶段不应出现
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "win32print", "win32api", "win32com")
+
+# 文件匹配工具中只在匹配缓存、内容匹配和后台线程里用到的模块
+FILE_MATCHER_DEFERRED = ("sqlite3", "match_cache", "content", "workers", "folder_watcher")
+
+# 预算约为开发机上冷启动导入耗时的2.5倍，避免较慢的机器误报，主要用于发现新增的重型依赖
+TARGETS: Dict[str, ImportTarget] = {
+    "file_matcher": ImportTarget("apps/file_matcher", "gui", 800, HEAVY_MODULES + FILE_MATCHER_DEFERRED),
+    "file_matcher_cli": ImportTarget("apps/file_matcher", "cli", 250,
+                                     HEAVY_MODULES + FILE_MATCHER_DEFERRED + ("PySide6",)),
+    "file_renamer": ImportTarget("apps/file_renamer", "gui", 800, HEAVY_MODULES),
+    "batch_printer": ImportTarget("apps/batch_printer", "gui", 800, HEAVY_MODULES),
+}
+
+
+class ImportRecord(NamedTuple):
+    """importtime 输出中的一行"""
+    self_us: int
+    cumulative_us: int
+    module: str
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """解析 -X importtime 写到标准错误的输出"""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # 表头行
+        name = fields[2].rstrip()
+        module = name.lstrip()
+        depth = (len(name) - len(module)) // 2
+        records.append(ImportRecord(int(fields[0]), int(fields[1]), module, depth))
+    return records
+
+
+def measure(target: ImportTarget) -> List[ImportRecord]:
+    """在新的解释器中导入入口模块，返回导入记录；导入失败时抛出 RuntimeError"""
+    app_dir = os.path.join(PROJECT_ROOT, target.app_dir)
+    code = f"import sys; sys.path.insert(0, {app_dir!r}); import {target.module}"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=app_dir, capture_output=True, text=True, encoding="utf-8", errors="replace"
+    )
+    if completed.returncode != 0:
+        errors = [line for line in completed.stderr.splitlines()
+                  if not line.startswith("import time:")]
+        raise RuntimeError("\n".join(errors[-5:]))
+    return parse_importtime(completed.stderr)
+
+
+def check(name: str, target: ImportTarget, budget_scale: float) -> List[str]:
+    """检查一个入口模块，返回发现的问题"""
+    try:
+        records = measure(target)
+    except RuntimeError as e:
+        return [f"{name}: 导入 {target.module} 失败\n{e}"]
+
+    problems = []
+    # 顶层导入（depth 为0）的累计耗时之和即为全部导入耗时
+    total_ms = sum(record.cumulative_us for record in records if record.depth == 0) / 1000
+    budget_ms = target.budget_ms * budget_scale
+    print(f"{name}: 导入耗时 {total_ms:.1f} ms（预算 {budget_ms:.0f} ms），共 {len(records)} 个模块")
+    if total_ms > budget_ms:
+        slowest = sorted((record for record in records if record.depth == 0),
+                         key=lambda record: record.cumulative_us, reverse=True)[:5]
+        details = ", ".join(f"{record.module} {record.cumulative_us / 1000:.1f} ms" for record in slowest)
+        problems.append(f"{name}: 导入耗时 {total_ms:.1f} ms 超出预算 {budget_ms:.0f} ms（最慢: {details}）")
+
+    loaded = {record.module for record in records}
+    for banned in target.banned:
+        if banned in loaded:
+            problems.append(f"{name}: 启动时导入了应延迟加载的模块 {banned}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查各工具启动时的导入耗时和重型依赖")
+    parser.add_argument("--app", action="append", choices=sorted(TARGETS),
+                        help="只检查指定的入口，可重复指定，默认检查全部")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="预算倍数，在较慢的机器或CI上可以适当放宽")
+    args = parser.parse_args()
+
+    problems = []
+    for name in args.app or sorted(TARGETS):
+        problems.extend(check(name, TARGETS[name], args.budget_scale))
+
+    if problems:
+        print("\n".join(problems), file=sys.stderr)
+        sys.exit(1)
+    print("导入检查通过")
+
+
+if __name__ == "__main__":
+    main()
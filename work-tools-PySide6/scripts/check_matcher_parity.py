@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+文件名匹配工具 - 自动机匹配与逐条匹配的结果对照
+
+用改为自动机之前的逐条 `in` 匹配作为基准，检查 CompiledMatcher 的 match 和 match_many
+对每个文件名返回的 (规则索引, 匹配关键字) 是否一致，发现不一致时返回非零退出码。
+文件名由规则中的关键字拼接、截断、相互嵌套生成，也可以用 --names-file 指定真实文件名列表。
+旧实现只支持包含匹配，对照时忽略带类型的关键字和规范化选项。
+
+    python scripts/check_matcher_parity.py
+    python scripts/check_matcher_parity.py --config path/to/config.json --names-file names.txt
+"""
+
+import argparse
+import os
+import random
+import sys
+from typing import Dict, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "apps", "file_matcher"))
+
+from matcher import UNMATCHED, CompiledMatcher  # noqa: E402
+from rule_manager import RuleManager  # noqa: E402
+
+DEFAULT_NAME_COUNT = 20000
+# 合成规则集的规则数，关键字取自很小的字符集，短关键字经常嵌套在长关键字中
+SYNTHETIC_RULE_COUNT = 500
+SYNTHETIC_ALPHABET = "ab中文_1"
+SEED = 20240601
+# 最多打印多少条不一致的文件名
+MAX_REPORTED = 20
+
+
+def legacy_match(rules: List[Dict], filename: str) -> Optional[Tuple[int, str]]:
+    """改为自动机之前的逐条匹配实现，用于结果对照"""
+    for index, rule in enumerate(rules):
+        if rule.get("deleted", False):
+            continue
+        for match_rule in rule.get("match_rules", []):
+            if match_rule and match_rule in filename:
+                return index, match_rule
+    return None
+
+
+def literal_rules(rules: List[Dict]) -> List[Dict]:
+    """只保留旧实现支持的包含匹配关键字，去掉规范化选项，规则顺序不变"""
+    return [{
+        "code": rule.get("code", ""),
+        "match_rules": [match_rule for match_rule in rule.get("match_rules", []) if isinstance(match_rule, str)],
+        "deleted": rule.get("deleted", False),
+    } for rule in rules]
+
+
+def synthetic_rules(rng: random.Random) -> List[Dict]:
+    """生成关键字大量重叠的规则集，覆盖同一文件名命中多条规则的情况"""
+    rules = []
+    for index in range(SYNTHETIC_RULE_COUNT):
+        patterns = ["".join(rng.choice(SYNTHETIC_ALPHABET) for _ in range(rng.randint(1, 6)))
+                    for _ in range(rng.randint(1, 3))]
+        if rng.random() < 0.05:
+            patterns.append("")  # 空关键字不命中任何文件名
+        rules.append({"code": f"S{index:04d}", "match_rules": patterns, "deleted": rng.random() < 0.05})
+    return rules
+
+
+def generate_names(rules: List[Dict], count: int, rng: random.Random) -> List[str]:
+    """由规则中的关键字生成文件名：整段或截断的关键字与填充文本拼接，部分文件名不含任何关键字"""
+    patterns = [match_rule for rule in rules for match_rule in rule["match_rules"] if match_rule]
+    filler = SYNTHETIC_ALPHABET + "xyz -."
+    names = []
+    for _ in range(count):
+        parts = ["".join(rng.choice(filler) for _ in range(rng.randint(0, 4)))]
+        for _ in range(rng.randint(0, 3) if patterns else 0):
+            pattern = rng.choice(patterns)
+            if rng.random() < 0.3:
+                start = rng.randint(0, len(pattern) - 1)
+                pattern = pattern[start:rng.randint(start + 1, len(pattern))]
+            parts.append(pattern)
+            parts.append("".join(rng.choice(filler) for _ in range(rng.randint(0, 2))))
+        names.append("".join(parts) + rng.choice([".pdf", ".docx", ""]))
+    return names
+
+
+def check_parity(rules: List[Dict], names: List[str]) -> List[str]:
+    """对照每个文件名的匹配结果，返回不一致的说明"""
+    matcher = CompiledMatcher(rules)
+    rule_indices, pattern_ids = matcher.match_many(names)
+    mismatches = []
+    for position, name in enumerate(names):
+        expected = legacy_match(rules, name)
+        pattern_id = matcher.match(name)
+        single = None if pattern_id is None else matcher.patterns[pattern_id]
+        batch = None
+        if pattern_ids[position] != UNMATCHED:
+            batch = (rule_indices[position], matcher.patterns[pattern_ids[position]][1])
+        if single != expected or batch != expected:
+            mismatches.append(f"{name!r}: 逐条匹配 {expected}，match {single}，match_many {batch}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文件名匹配工具 - 自动机匹配与逐条匹配的结果对照")
+    parser.add_argument("--config", help="配置文件，默认使用随程序发布的 config.json")
+    parser.add_argument("--names-file", help="文件名列表，每行一个；默认由关键字生成")
+    parser.add_argument("--count", type=int, default=DEFAULT_NAME_COUNT, help="生成的文件名数量")
+    args = parser.parse_args()
+
+    rng = random.Random(SEED)
+    config_path = args.config or os.path.join(PROJECT_ROOT, "apps", "file_matcher", "resources", "config.json")
+    manager = RuleManager(config_path)
+    if manager.load_error:
+        print(manager.load_error, file=sys.stderr)
+        sys.exit(2)
+    rule_sets = [("配置文件中的规则", literal_rules(manager.rules)), ("合成的重叠规则", synthetic_rules(rng))]
+
+    if args.names_file:
+        with open(args.names_file, "r", encoding="utf-8") as f:
+            file_names = [line.strip() for line in f if line.strip()]
+
+    failed = False
+    for title, rules in rule_sets:
+        names = file_names if args.names_file else generate_names(rules, args.count, rng)
+        mismatches = check_parity(rules, names)
+        print(f"{title}: {len(rules)} 条规则，{len(names)} 个文件名，{len(mismatches)} 个不一致")
+        for line in mismatches[:MAX_REPORTED]:
+            print(f"  {line}")
+        failed = failed or bool(mismatches)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()